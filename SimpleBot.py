@@ -1,16 +1,37 @@
-import os
 import logging
-import json
-import io
+import math
+import threading
 from datetime import datetime, timedelta
 import pytz
-from gtts import gTTS
-from telegram import Update, Bot, CallbackQuery
+from telegram import Update, CallbackQuery
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 import google.generativeai as genai
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import asyncio
 
+from utils.write_behind import user_buffer
+from utils.subscriber_index import subscriber_index, delivery_settings, parse_hhmm, DEFAULT_TIMES
+from config.settings import DELIVERY_WINDOW_MINUTES, DELIVERY_TZ_ALIASES
+from utils.chat_locks import chat_locks
+from utils.leaderboard import leaderboard, LEADERBOARD_CATEGORIES
+from utils.response_cache import gemini_cache, make_cache_key
+from utils.single_flight import gemini_flight
+from utils.message_utils import stream_reply, finish_reply
+from services.model_guard import model_guard
+from services.tts_service import send_speech
+from utils.script_segmenter import describe_languages
+from services.tts_pool import tts_pool
+from services.broadcast_service import broadcast_engine
+from services.daily_pack import send_daily_now
+from utils.audio_bundle import audio_bundle
+from utils.vocabulary_index import vocabulary_index
+from utils.seen_words import sample_unseen_words
+from utils.audio_cache import audio_cache
+from utils.file_registry import file_id_registry
+from utils.user_session import (
+    get_user_record, save_user_records, increment_user_record_stats
+)
+
 # --- 기본 설정 ---
 
 # 러시아 모스크바 시간대 설정
@@ -47,30 +68,8 @@ MODEL_CONFIG = [
     {'name': 'gemini-1.5-flash', 'display_name': 'Gemini 1.5 Flash'}
 ]
 
-# 모델 상태 로드/저장
-def load_model_status():
-    if os.path.exists(MODEL_STATUS_FILE):
-        try:
-            with open(MODEL_STATUS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
-    return {
-        'current_index': 0,
-        'quota_exceeded_time': None,
-        'last_primary_attempt': None,
-        'failure_count': 0
-    }
-
-def save_model_status(status):
-    try:
-        with open(MODEL_STATUS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(status, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        logger.error(f"모델 상태 저장 오류: {e}")
-
-# 현재 모델 상태
-model_status = load_model_status()
+# 현재 모델 상태 (분당/일일 한도와 서킷 브레이커는 model_guard가 관리하고 주기적으로 저장)
+model_status = model_guard.status
 
 # 모델 인스턴스 생성
 def get_model(idx=None):
@@ -328,20 +327,22 @@ PRONUNCIATION_SENTENCES = {
 
 # --- 사용자 데이터 관리 ---
 def load_user_data():
-    if os.path.exists(USER_DATA_FILE):
-        with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    """전체 사용자 로드 (브로드캐스트 등 전체 순회가 필요한 곳에서만 사용)"""
+    return user_buffer.load_all()
 
 def save_user_data(data):
-    with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    """주어진 사용자들만 저장 (업데이트 처리 중인 사용자는 핸들러 종료 시 한 번에 커밋)"""
+    save_user_records(data)
+
+def increment_user_stats(chat_id, **deltas):
+    """stats 카운터만 부분 증가 (전체 레코드 재작성 없음)"""
+    increment_user_record_stats(str(chat_id), deltas)
 
 def get_user(chat_id):
-    users = load_user_data()
     user_id = str(chat_id)
-    if user_id not in users:
-        users[user_id] = {
+    user = get_user_record(user_id)
+    if user is None:
+        user = {
             'subscribed_daily': False,
             'quest_state': {'current_quest': None, 'stage': 0},
             'stats': {
@@ -381,11 +382,10 @@ def get_user(chat_id):
                 'ranking_points': 0
             }
         }
-        save_user_data(users)
     
     # 기존 사용자 데이터에 새 필드 추가 (하위 호환성)
-    if 'learning' not in users[user_id]:
-        users[user_id]['learning'] = {
+    if 'learning' not in user:
+        user['learning'] = {
             'vocabulary_srs': {},
             'pronunciation_scores': [],
             'game_stats': {
@@ -404,8 +404,8 @@ def get_user(chat_id):
             'difficulty_preference': 'adaptive'
         }
     
-    if 'social' not in users[user_id]:
-        users[user_id]['social'] = {
+    if 'social' not in user:
+        user['social'] = {
             'friends': [],
             'challenges_sent': 0,
             'challenges_won': 0,
@@ -414,71 +414,139 @@ def get_user(chat_id):
     
     # 일일 연속 학습 체크
     today = datetime.now(MSK).date()
-    last_study = users[user_id]['learning']['last_study_date']
+    last_study = user['learning']['last_study_date']
     
     if last_study:
         last_study_date = datetime.fromisoformat(last_study).date()
         if today == last_study_date + timedelta(days=1):
-            users[user_id]['learning']['daily_streak'] += 1
+            user['learning']['daily_streak'] += 1
         elif today != last_study_date:
-            users[user_id]['learning']['daily_streak'] = 1
+            user['learning']['daily_streak'] = 1
     else:
-        users[user_id]['learning']['daily_streak'] = 1
+        user['learning']['daily_streak'] = 1
     
-    users[user_id]['learning']['last_study_date'] = today.isoformat()
-    users[user_id]['stats']['last_active_date'] = datetime.now(MSK).isoformat()
-    save_user_data(users)
-    return users[user_id]
+    user['learning']['last_study_date'] = today.isoformat()
+    user['stats']['last_active_date'] = datetime.now(MSK).isoformat()
+    save_user_records({user_id: user})
+    return user
 
 # --- AI 기능 헬퍼 ---
-async def call_gemini(prompt: str) -> str:
-    global model_status, model
-    now = datetime.now(pytz.timezone('America/Los_Angeles'))
-
-    # 할당량 리셋(매일 0시 PST) 후 2.5-pro로 복귀
-    if model_status['current_index'] != 0:
-        last_quota = model_status.get('quota_exceeded_time')
-        if last_quota:
-            last_quota_time = datetime.fromisoformat(last_quota)
-            if now.date() > datetime.fromisoformat(last_quota).date():
-                model_status['current_index'] = 0
-                model_status['failure_count'] = 0
-                model = get_model(0)
-                save_model_status(model_status)
-
-    for idx in range(model_status['current_index'], len(MODEL_CONFIG)):
+async def call_gemini(prompt: str, task: str = 'default') -> str:
+    # 같은 요청은 캐시에서 바로 응답 (할당량 절약)
+    cached = gemini_cache.get(task, prompt)
+    if cached is not None:
+        return cached
+    
+    # 동시에 들어온 같은 프롬프트는 업스트림 호출 하나를 함께 기다림
+    return await gemini_flight.do(
+        make_cache_key(task, prompt),
+        lambda: _call_gemini_upstream(prompt, task)
+    )
+
+GEMINI_ERROR_MESSAGE = "죄송합니다. AI 모델과 통신 중 오류가 발생했습니다. 😅"
+GEMINI_QUOTA_MESSAGE = "죄송합니다. 현재 AI 서비스 할당량이 모두 소진되었습니다. 내일 다시 시도해주세요. 😅"
+GEMINI_BUSY_MESSAGE = "죄송합니다. 지금 AI 요청이 몰려 있습니다. 약 {seconds}초 후 다시 시도해주세요. 😅"
+GEMINI_TRUNCATED_MESSAGE = "\n\n⚠️ 응답이 중간에 끊겼습니다. 다시 시도해주세요."
+
+def gemini_unavailable_message() -> str:
+    """호출할 수 있는 모델이 없을 때 안내 (일일 한도가 모두 소진됐을 때만 '내일')"""
+    retry_after = model_guard.retry_after()
+    if retry_after is None:
+        return GEMINI_QUOTA_MESSAGE
+    return GEMINI_BUSY_MESSAGE.format(seconds=max(1, math.ceil(retry_after)))
+
+async def _call_gemini_upstream(prompt: str, task: str) -> str:
+    global model
+    attempted = False
+    # 한도/서킷이 허용하는 모델만 기본 모델부터 차례로 시도 (분당 한도에만 막혔으면 잠깐 기다림)
+    async for idx in model_guard.acquire():
+        attempted = True
         try:
             model = get_model(idx)
             response = await asyncio.get_event_loop().run_in_executor(
                 None, lambda: model.generate_content(prompt)
             )
-            if idx != 0:
-                # 폴백에서 성공하면 다시 2.5-pro로 복귀 예약
-                model_status['current_index'] = 0
-                model_status['failure_count'] = 0
-                save_model_status(model_status)
-            logger.info(f"✅ {MODEL_CONFIG[idx]['display_name']} 사용 성공")
+            model_guard.record_success(idx)
+            gemini_cache.put(task, prompt, response.text)
             return response.text
+        except asyncio.CancelledError:
+            model_guard.release(idx)
+            raise
         except Exception as e:
-            error_str = str(e).lower()
-            logger.error(f"❌ {MODEL_CONFIG[idx]['display_name']} 에러: {e}")
-            # 할당량/404/429/Quota 에러 시 다음 모델로
-            if any(k in error_str for k in ['quota', '429', 'rate limit', 'resource_exhausted', 'not found', '404']):
-                model_status['current_index'] = idx + 1
-                model_status['quota_exceeded_time'] = now.isoformat()
-                model_status['failure_count'] = 0
-                save_model_status(model_status)
-                continue
-            else:
-                model_status['failure_count'] += 1
-                save_model_status(model_status)
-                if model_status['failure_count'] >= 3 and idx < len(MODEL_CONFIG) - 1:
-                    model_status['current_index'] = idx + 1
-                    model_status['failure_count'] = 0
-                    save_model_status(model_status)
-                    continue
-                return "죄송합니다. AI 모델과 통신 중 오류가 발생했습니다. 😅"
-    return "죄송합니다. 현재 AI 서비스 할당량이 모두 소진되었습니다. 내일 다시 시도해주세요. 😅"
+            model_guard.record_failure(idx, e)
+    return GEMINI_ERROR_MESSAGE if attempted else gemini_unavailable_message()
+
+async def stream_gemini(prompt: str, task: str = 'default'):
+    """Gemini 응답을 생성되는 대로 조각 단위로 전달 (async generator)
+
+    같은 프롬프트를 이미 다른 요청이 생성 중이면 업스트림을 다시 부르지 않고 그 결과를 한 번에 받음
+    """
+    cached = gemini_cache.get(task, prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    key = make_cache_key(task, prompt)
+    flight = gemini_flight.lead(key)
+    if flight is None:
+        yield await gemini_flight.do(key, lambda: _call_gemini_upstream(prompt, task))
+        return
+
+    loop = asyncio.get_running_loop()
+    attempted = False
+    parts = []
+    try:
+        async for idx in model_guard.acquire():
+            attempted = True
+            queue: asyncio.Queue = asyncio.Queue()
+            stop = threading.Event()
+            stream_model = get_model(idx)
+
+            def produce():
+                # 스트리밍 응답 반복은 블로킹이므로 실행기 스레드에서 읽고 큐로 넘김 (읽는 쪽이 멈추면 중단)
+                try:
+                    for chunk in stream_model.generate_content(prompt, stream=True):
+                        if stop.is_set():
+                            return
+                        if chunk.text:
+                            loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+                    loop.call_soon_threadsafe(queue.put_nowait, None)
+                except Exception as e:
+                    loop.call_soon_threadsafe(queue.put_nowait, e)
+
+            loop.run_in_executor(None, produce)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        model_guard.record_success(idx)
+                        text = ''.join(parts)
+                        gemini_cache.put(task, prompt, text)
+                        flight.set_result(text)
+                        return
+                    if isinstance(item, Exception):
+                        break
+                    parts.append(item)
+                    yield item
+            except (asyncio.CancelledError, GeneratorExit):
+                # 핸들러 취소/제너레이터 종료 - 업스트림 읽기를 멈추고 시험 호출 자리 반환
+                stop.set()
+                model_guard.release(idx)
+                raise
+
+            model_guard.record_failure(idx, item)
+            if parts:
+                # 이미 일부를 보냈으면 다른 모델로 처음부터 다시 하지 않고 끊겼다고 알림
+                parts.append(GEMINI_TRUNCATED_MESSAGE)
+                flight.set_result(''.join(parts))
+                yield GEMINI_TRUNCATED_MESSAGE
+                return
+        message = GEMINI_ERROR_MESSAGE if attempted else gemini_unavailable_message()
+        flight.set_result(message)
+        yield message
+    finally:
+        # 결과를 채우지 못하고 끝났으면 합류해 기다리던 같은 요청은 일반 호출로 넘김
+        gemini_flight.abandon(key, flight, lambda: _call_gemini_upstream(prompt, task))
 
 def get_fallback_translation(prompt: str) -> str:
     """기본 번역 사전을 활용한 폴백 번역"""
@@ -507,53 +575,6 @@ def get_fallback_translation(prompt: str) -> str:
     
     return "죄송합니다. 현재 AI 서비스에 일시적인 문제가 발생했습니다. 잠시 후 다시 시도해주세요. 😅"
 
-async def convert_text_to_speech(text: str, lang: str = "auto") -> bytes:
-    """무료 Google TTS로 텍스트를 음성으로 변환 (한국어, 러시아어 지원)"""
-    try:
-        # 언어 자동 감지 또는 지정
-        if lang == "auto":
-            # 한글이 포함되어 있으면 한국어, 키릴 문자가 포함되어 있으면 러시아어
-            if any('\u3131' <= char <= '\u3163' or '\uac00' <= char <= '\ud7a3' for char in text):
-                detected_lang = "ko"
-                lang_name = "한국어"
-            elif any('\u0400' <= char <= '\u04ff' for char in text):
-                detected_lang = "ru"
-                lang_name = "러시아어"
-            else:
-                # 기본값을 한국어로 설정
-                detected_lang = "ko"
-                lang_name = "한국어 (기본값)"
-        else:
-            detected_lang = lang
-            lang_name = "러시아어" if lang == "ru" else "한국어" if lang == "ko" else lang
-            
-        logger.info(f"TTS 시작 - 텍스트: '{text}', 감지된 언어: {lang_name} ({detected_lang})")
-        
-        # 텍스트가 너무 길면 자르기 (gTTS 제한: 200자 정도)
-        if len(text) > 200:
-            text = text[:200] + "..."
-            logger.info(f"텍스트 자름 - 새 길이: {len(text)}")
-        
-        # gTTS 객체 생성
-        logger.info("gTTS 객체 생성 중...")
-        tts = gTTS(text=text, lang=detected_lang, slow=False)
-        
-        # 메모리에서 음성 파일 생성
-        logger.info("음성 파일 생성 중...")
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        
-        audio_data = audio_buffer.getvalue()
-        logger.info(f"음성 파일 생성 완료 - 크기: {len(audio_data)} bytes, 언어: {lang_name}")
-        
-        return audio_data
-    except Exception as e:
-        logger.error(f"TTS 오류: {e}")
-        import traceback
-        logger.error(f"상세 오류: {traceback.format_exc()}")
-        return None
-
 async def split_long_message(text: str, max_length: int = 4096) -> list:
     """긴 메시지를 여러 부분으로 나누기"""
     if len(text) <= max_length:
@@ -823,7 +844,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 **📅 일일 학습**
 • `/subscribe_daily` - 매일 러시아어 콘텐츠 받기
 • `/unsubscribe_daily` - 일일 학습 구독 해제
-  └ 매일 아침 7시, 낮 12시 (모스크바 시간)
+• `/daily_time` - 받을 시각과 시간대 설정
+  └ 기본: 매일 아침 7시, 낮 12시 (모스크바 시간)
   └ 새로운 단어 30개 + 회화 20개
 
 ━━━━━━━━━━━━━━━━━━━━━━━━
@@ -857,15 +879,16 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 async def subscribe_daily_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat_id = update.effective_chat.id
-    users = load_user_data()
     user = get_user(chat_id)
 
     if not user['subscribed_daily']:
-        users[str(chat_id)]['subscribed_daily'] = True
-        save_user_data(users)
+        user['subscribed_daily'] = True
+        save_user_data({str(chat_id): user})
+        subscriber_index.update(str(chat_id), user)
+        tz, times = delivery_settings(user)
         await update.message.reply_text(
             "✅ **일일 학습 구독 완료!**\n\n"
-            "📅 **배송 시간**: 매일 오전 7시, 낮 12시 (모스크바 기준)\n"
+            f"📅 **배송 시간**: 매일 {', '.join(times)} ({tz}) - `/daily_time`으로 변경\n"
             "📚 **학습 내용**: 러시아어 단어 30개 + 실용 회화 20개\n"
             "🎯 **학습 효과**: 꾸준한 반복으로 어휘력 대폭 향상\n\n"
             "💡 **팁**: 받은 단어들을 `/write` 명령어로 문장 만들기 연습하면 더욱 효과적!"
@@ -879,12 +902,12 @@ async def subscribe_daily_command(update: Update, context: ContextTypes.DEFAULT_
 
 async def unsubscribe_daily_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat_id = update.effective_chat.id
-    users = load_user_data()
     user = get_user(chat_id)
 
     if user['subscribed_daily']:
-        users[str(chat_id)]['subscribed_daily'] = False
-        save_user_data(users)
+        user['subscribed_daily'] = False
+        save_user_data({str(chat_id): user})
+        subscriber_index.update(str(chat_id), user)
         await update.message.reply_text(
             "✅ **일일 학습 구독 해제 완료**\n\n"
             "😢 아쉽지만 언제든 다시 `/subscribe_daily`로 구독할 수 있습니다.\n"
@@ -896,6 +919,46 @@ async def unsubscribe_daily_command(update: Update, context: ContextTypes.DEFAUL
             "`/subscribe_daily`로 구독하시면 매일 새로운 러시아어 콘텐츠를 받아볼 수 있어요!"
         )
 
+async def daily_time_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """일일 학습 받을 시각/시간대 설정 (예: /daily_time 08:00 19:30 Asia/Seoul)"""
+    chat_id = update.effective_chat.id
+    user = get_user(chat_id)
+    tz, times = delivery_settings(user)
+
+    if not context.args:
+        await update.message.reply_text(
+            f"🕰️ **일일 학습 전송 시각**\n\n"
+            f"• 시각: {', '.join(times)}\n"
+            f"• 시간대: {tz}\n"
+            f"• 실제 전송: 각 시각부터 {DELIVERY_WINDOW_MINUTES}분 안에 도착\n\n"
+            f"💡 변경: `/daily_time 08:00 19:30 Asia/Seoul` (시각 최대 {len(DEFAULT_TIMES)}개, 시간대 생략 시 유지)\n"
+            f"   시간대 약어: {', '.join(DELIVERY_TZ_ALIASES)}"
+        )
+        return
+
+    new_times = [arg for arg in context.args if parse_hhmm(arg) is not None]
+    others = [arg for arg in context.args if parse_hhmm(arg) is None]
+    if others:
+        tz = DELIVERY_TZ_ALIASES.get(others[-1].upper(), others[-1])
+        try:
+            pytz.timezone(tz)
+        except pytz.UnknownTimeZoneError:
+            await update.message.reply_text(f"❌ 알 수 없는 시간대입니다: `{others[-1]}`\n예: Asia/Seoul, Europe/Moscow, KST, MSK")
+            return
+    if len(new_times) > len(DEFAULT_TIMES):
+        await update.message.reply_text(f"❌ 시각은 최대 {len(DEFAULT_TIMES)}개까지 설정할 수 있습니다.")
+        return
+
+    user['delivery'] = {'tz': tz, 'times': sorted(new_times, key=parse_hhmm) or list(times)}
+    save_user_data({str(chat_id): user})
+    subscriber_index.update(str(chat_id), user)
+    status = "" if user['subscribed_daily'] else "\n\n📭 아직 구독 전입니다. `/subscribe_daily`로 구독하세요!"
+    await update.message.reply_text(
+        f"✅ **전송 시각 변경 완료**\n\n"
+        f"• 시각: {', '.join(user['delivery']['times'])} ({tz})\n"
+        f"• 각 시각부터 {DELIVERY_WINDOW_MINUTES}분 안에 도착합니다.{status}"
+    )
+
 async def quest_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat_id = update.effective_chat.id
     user = get_user(chat_id)
@@ -903,9 +966,8 @@ async def quest_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
     if quest_state['current_quest'] is None:
         quest_id = 'q1'
-        users = load_user_data()
-        users[str(chat_id)]['quest_state'] = {'current_quest': quest_id, 'stage': 1}
-        save_user_data(users)
+        user['quest_state'] = {'current_quest': quest_id, 'stage': 1}
+        save_user_data({str(chat_id): user})
         
         quest = QUEST_DATA[quest_id]
         stage_data = quest['stages'][1]
@@ -959,8 +1021,7 @@ async def action_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return
 
-    users = load_user_data()
-    user = users[str(chat_id)]
+    user = get_user(chat_id)
     quest_state = user['quest_state']
 
     if quest_state['current_quest'] is None:
@@ -982,7 +1043,7 @@ async def action_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             user['quest_state'] = {'current_quest': None, 'stage': 0}
             user['stats']['quests_completed'] += 1
             user['stats']['total_exp'] += 50  # 퀘스트 완료 시 경험치 추가
-            save_user_data(users)
+            save_user_data({str(chat_id): user})
             
             await update.message.reply_text(
                 f"🎉 **퀘스트 완료: {quest['title']}** 🎉\n\n"
@@ -994,7 +1055,7 @@ async def action_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
         else:
             user['quest_state']['stage'] = next_stage
-            save_user_data(users)
+            save_user_data({str(chat_id): user})
             
             next_stage_data = quest['stages'][next_stage]
             
@@ -1069,16 +1130,11 @@ async def write_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     [비슷한 실수를 피하는 방법이나 관련 문법 규칙]
     """
     
-    corrected_text = await call_gemini(prompt)
-    
-    await processing_message.delete()
-    await update.message.reply_text(corrected_text)
+    # 생성되는 대로 자리표시 메시지를 수정해서 보여줌
+    await stream_reply(processing_message, stream_gemini(prompt, task='correct'))
 
-    # 통계 업데이트
-    users = load_user_data()
-    users[str(chat_id)]['stats']['sentences_corrected'] += 1
-    users[str(chat_id)]['stats']['total_exp'] += 10  # 작문 교정 시 경험치 추가
-    save_user_data(users)
+    # 통계 업데이트 (작문 교정 시 경험치 추가)
+    increment_user_stats(chat_id, sentences_corrected=1, total_exp=10)
 
 async def my_progress_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat_id = update.effective_chat.id
@@ -1203,7 +1259,7 @@ async def translate_simple_command(update: Update, context: ContextTypes.DEFAULT
         # 간단한 번역만 요청
         translate_prompt = f"다음 텍스트를 {korean_language}로 최고의 번역만 제공해주세요. 설명이나 추가 정보 없이 가장 자연스러운 번역문만 제공해주세요: {text_to_translate}"
         
-        translated_text = await call_gemini(translate_prompt)
+        translated_text = await call_gemini(translate_prompt, task='translate')
         
         # 번역 결과에서 불필요한 부분 제거 (첫 번째 줄만 사용)
         clean_translation = translated_text.split('\n')[0].strip()
@@ -1223,10 +1279,7 @@ async def translate_simple_command(update: Update, context: ContextTypes.DEFAULT
         
         # 통계 업데이트
         chat_id = update.effective_chat.id
-        users = load_user_data()
-        users[str(chat_id)]['stats']['translations_made'] += 1
-        users[str(chat_id)]['stats']['total_exp'] += 5  # 번역 시 경험치 추가
-        save_user_data(users)
+        increment_user_stats(chat_id, translations_made=1, total_exp=5)  # 번역 시 경험치 추가
                 
     except Exception as e:
         logger.error(f"간단 번역 오류: {e}")
@@ -1321,20 +1374,12 @@ async def translate_long_command(update: Update, context: ContextTypes.DEFAULT_T
 (모든 답변에서 별표 강조 표시 사용하지 마세요)
 """
         
-        translated_text = await call_gemini(translate_prompt)
-        
-        # "처리 중..." 메시지 삭제
-        await processing_message.delete()
-        
-        # 번역 결과 전송 (긴 메시지 처리)
-        full_response = f"📚 상세 번역 결과 ({korean_language}):\n\n{translated_text}"
-        message_parts = await split_long_message(full_response)
-        
-        for i, part in enumerate(message_parts):
-            if i == 0:
-                await update.message.reply_text(part)
-            else:
-                await update.message.reply_text(f"📄 (계속 {i+1}/{len(message_parts)})\n\n{part}")
+        # 번역 결과를 생성되는 대로 "처리 중..." 메시지에 표시 (긴 메시지는 마지막에 나눠 전송)
+        await stream_reply(
+            processing_message,
+            stream_gemini(translate_prompt, task='translate'),
+            header=f"📚 상세 번역 결과 ({korean_language}):\n\n"
+        )
                 
     except Exception as e:
         logger.error(f"상세 번역 오류: {e}")
@@ -1361,37 +1406,23 @@ async def listening_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # "변환 중..." 메시지 표시
         processing_message = await update.message.reply_text("🎵 음성 변환 중...")
         
-        # 자동 언어 감지로 음성 변환
-        audio_data = await convert_text_to_speech(input_text, "auto")
+        # 언어 감지 (한글/키릴/라틴 구간을 한 번에 나누고, 같은 결과를 TTS에서도 재사용)
+        lang_flag, lang_name = describe_languages(input_text)
+        
+        # 자동 언어 감지로 음성 변환 후 전송 (이미 올린 음성은 file_id 재사용)
+        sent = await send_speech(
+            update.message.reply_audio, input_text, "auto",
+            title=f"{lang_name} 음성: {input_text[:50]}...",
+            caption=f"{lang_flag} {lang_name} 음성\n📝 텍스트: {input_text}\n🎤 엔진: Google TTS"
+        )
         
-        if audio_data:
+        if sent:
             # "변환 중..." 메시지 삭제
             await processing_message.delete()
             
-            # 언어 감지
-            if any('\u3131' <= char <= '\u3163' or '\uac00' <= char <= '\ud7a3' for char in input_text):
-                lang_flag = "🇰🇷"
-                lang_name = "한국어"
-            elif any('\u0400' <= char <= '\u04ff' for char in input_text):
-                lang_flag = "🇷🇺"
-                lang_name = "러시아어"
-            else:
-                lang_flag = "🇰🇷"
-                lang_name = "한국어 (기본값)"
-            
-            # 음성 파일 전송
-            await update.message.reply_audio(
-                audio=audio_data,
-                title=f"{lang_name} 음성: {input_text[:50]}...",
-                caption=f"{lang_flag} {lang_name} 음성\n📝 텍스트: {input_text}\n🎤 엔진: Google TTS"
-            )
-            
             # 통계 업데이트
             chat_id = update.effective_chat.id
-            users = load_user_data()
-            users[str(chat_id)]['stats']['tts_generated'] += 1
-            users[str(chat_id)]['stats']['total_exp'] += 3  # TTS 시 경험치 추가
-            save_user_data(users)
+            increment_user_stats(chat_id, tts_generated=1, total_exp=3)  # TTS 시 경험치 추가
         else:
             await processing_message.edit_text("음성 변환 실패. 다시 시도해주세요. 😅")
             
@@ -1446,7 +1477,7 @@ async def translate_listen_command(update: Update, context: ContextTypes.DEFAULT
         else:
             translate_prompt = f"다음 텍스트를 {korean_language}로 간단하고 자연스럽게 번역해주세요. 설명이나 추가 정보 없이 번역문만 제공해주세요: {text_to_translate}"
         
-        translated_text = await call_gemini(translate_prompt)
+        translated_text = await call_gemini(translate_prompt, task='translate')
         
         # 번역 결과에서 불필요한 부분 제거 (첫 번째 줄만 사용)
         clean_translation = translated_text.split('\n')[0].strip()
@@ -1476,19 +1507,16 @@ async def translate_listen_command(update: Update, context: ContextTypes.DEFAULT
             # 음성 변환 메시지 표시
             tts_message = await update.message.reply_text("🎵 음성 변환 중...")
             
-            # 정리된 번역 텍스트를 음성으로 변환
-            audio_data = await convert_text_to_speech(clean_translation, tts_lang)
+            # 정리된 번역 텍스트를 음성으로 변환해 전송
+            sent = await send_speech(
+                update.message.reply_audio, clean_translation, tts_lang,
+                title=f"{lang_name} 음성: {clean_translation[:50]}...",
+                caption=f"{lang_flag} {lang_name} 음성 (간단 번역+TTS)\n📝 텍스트: {clean_translation}\n🎤 엔진: Google TTS"
+            )
             
-            if audio_data:
+            if sent:
                 # 음성 변환 메시지 삭제
                 await tts_message.delete()
-                
-                # 음성 파일 전송
-                await update.message.reply_audio(
-                    audio=audio_data,
-                    title=f"{lang_name} 음성: {clean_translation[:50]}...",
-                    caption=f"{lang_flag} {lang_name} 음성 (간단 번역+TTS)\n📝 텍스트: {clean_translation}\n🎤 엔진: Google TTS"
-                )
             else:
                 await tts_message.edit_text("음성 변환 실패. 번역만 완료되었습니다. 😅")
         else:
@@ -1520,19 +1548,64 @@ async def model_status_command(update: Update, context: ContextTypes.DEFAULT_TYP
         if model_status.get('quota_exceeded_time'):
             exceeded_time = datetime.fromisoformat(model_status['quota_exceeded_time'])
             status_message += f"⏰ 할당량 초과 시간: {exceeded_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        
-        # 다음 복구 시도 시간
-        if model_status.get('last_primary_attempt'):
-            last_attempt = datetime.fromisoformat(model_status['last_primary_attempt'])
-            next_attempt = last_attempt + timedelta(hours=4)
-            status_message += f"🔄 다음 복구 시도: {next_attempt.strftime('%Y-%m-%d %H:%M:%S')}\n"
     
     status_message += f"\n📊 **실패 횟수**: {model_status.get('failure_count', 0)}\n"
     
-    # 모델 설정 정보
-    status_message += f"\n🔧 **모델 설정**:\n"
-    status_message += f"• Primary: {MODEL_CONFIG[0]['display_name']}\n"
-    status_message += f"• Fallback: {MODEL_CONFIG[1]['display_name']}\n"
+    # 모델별 한도/서킷 상태
+    state_icons = {'closed': '🟢', 'half_open': '🟡', 'open': '🔴'}
+    status_message += f"\n🔧 **모델별 상태**:\n"
+    for state in model_guard.get_model_states():
+        status_message += f"{state_icons[state['state']]} {state['display_name']}: 오늘 {state['requests_today']}/{state['rpd']}회 (분당 {state['rpm']}회)\n"
+        if state['retry_at']:
+            retry_at = datetime.fromtimestamp(state['retry_at'], MSK)
+            status_message += f"   🔄 다음 시험 호출: {retry_at.strftime('%H:%M:%S')}\n"
+        elif state['rpm_wait'] > 0:
+            status_message += f"   ⏳ 분당 한도 대기: {state['rpm_wait']:.0f}초\n"
+    
+    # 사용자 저장소 (쓰기 지연 버퍼) 지표
+    storage = user_buffer.get_metrics()
+    status_message += f"\n💾 **사용자 저장소**:\n"
+    status_message += f"• 대기 중인 쓰기: {storage['pending_writes']}건\n"
+    status_message += f"• 플러시: {storage['flush_count']}회 (평균 {storage['avg_flush_ms']:.1f}ms, 최대 {storage['max_flush_ms']:.1f}ms)\n"
+    status_message += f"• 병합된 업데이트: {storage['coalesced_updates']}건\n"
+    status_message += f"• 일일 학습 구독자: {len(subscriber_index)}명\n"
+    locks = chat_locks.get_metrics()
+    status_message += f"• 채팅 잠금: 활성 {locks['active_locks']}개, 대기 발생 {locks['contended']}회\n"
+    
+    # Gemini 응답 캐시 지표
+    cache = gemini_cache.get_metrics()
+    status_message += f"\n🗂️ **응답 캐시**:\n"
+    status_message += f"• 적중률: {cache['hit_rate']:.1f}% (메모리 {cache['memory_hits']} / 디스크 {cache['disk_hits']} / 미스 {cache['misses']})\n"
+    status_message += f"• 메모리: {cache['memory_entries']}개, {cache['memory_bytes'] / 1024:.0f}KB\n"
+    status_message += f"• 디스크: {cache['disk_entries']}개, {cache['disk_bytes'] / 1024 / 1024:.1f}MB\n"
+    status_message += f"• 축출: 메모리 {cache['memory_evictions']} / 디스크 {cache['disk_evictions']}, 만료 {cache['expired']}\n"
+    flight = gemini_flight.get_metrics()
+    status_message += f"• 동시 요청 병합: {flight['coalesced']}건 (업스트림 호출 {flight['upstream_calls']}회, 진행 중 {flight['in_flight']})\n"
+    
+    # TTS 음성 캐시 지표
+    tts_cache = audio_cache.get_metrics()
+    status_message += f"\n🔊 **음성 캐시**:\n"
+    status_message += f"• 적중률: {tts_cache['hit_rate']:.1f}% (적중 {tts_cache['hits']} / 미스 {tts_cache['misses']})\n"
+    status_message += f"• 저장: {tts_cache['entries']}개, {tts_cache['bytes'] / 1024 / 1024:.1f}MB (축출 {tts_cache['evictions']})\n"
+    bundle = audio_bundle.get_metrics()
+    status_message += f"• 발음 번들: {bundle['entries']}개, {bundle['bytes'] / 1024 / 1024:.1f}MB (사용 {bundle['hits']}회)\n"
+    file_ids = file_id_registry.get_metrics()
+    status_message += f"• file_id 재사용: {file_ids['reuse_rate']:.1f}% (재사용 {file_ids['reuses']} / 업로드 {file_ids['uploads']}, 등록 {file_ids['entries']}개)\n"
+    pool = tts_pool.get_metrics()
+    status_message += f"• 합성 풀: 실행 {pool['running']}/{pool['max_workers']}, 대기 {pool['queued']} (최대 {pool['max_queue_depth']})\n"
+    status_message += f"• 합성: 완료 {pool['completed']} / 실패 {pool['failed']} / 시간 초과 {pool['timeouts']}, 평균 대기 {pool['avg_wait_ms']:.0f}ms · 합성 {pool['avg_run_ms']:.0f}ms\n"
+    
+    # 브로드캐스트 진행 상황
+    broadcast = broadcast_engine.get_metrics()
+    if broadcast['progress']:
+        status_message += "\n📣 **브로드캐스트**:\n"
+        for progress in broadcast['progress'][:5]:
+            finished = progress['done'] + progress['failed']
+            state = "완료" if progress['finished_at'] else f"진행 중, 남은 시간 약 {(progress['eta_seconds'] or 0) / 60:.1f}분"
+            status_message += f"• {progress['name']}: {finished}/{progress['total']}명 (실패 {progress['failed']}) - {state}\n"
+        status_message += f"• 메시지 {broadcast['messages']}건, 한도 대기 {broadcast['retry_after']}회\n"
+        jobs = broadcast['jobs']
+        status_message += f"• 체크포인트 {jobs['checkpoints']}건 (저장 대기 {jobs['pending_checkpoints']}), 재개 {jobs['resumed_jobs']}회\n"
     
     await update.message.reply_text(status_message)
 
@@ -1597,231 +1670,6 @@ async def translation_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         f"💬 `/action [선택한 러시아어]`로 진행하세요!"
     )
 
-async def send_daily_learning(bot: Bot):
-    users = load_user_data()
-    
-    # 러시아어 학습 데이터베이스 로드
-    try:
-        with open('russian_korean_vocab_2000.json', 'r', encoding='utf-8') as f:
-            database = json.load(f)
-    except FileNotFoundError:
-        logger.error("러시아어 학습 데이터베이스 파일이 없습니다!")
-        return
-    
-    import random
-    
-    # 15개 단어와 10개 회화로 조정 (개별 음성 때문에)
-    vocabulary = random.sample(database['vocabulary'], min(15, len(database['vocabulary'])))
-    
-    # 회화 문장은 기존 데이터베이스에서 로드
-    try:
-        with open('russian_learning_database.json', 'r', encoding='utf-8') as f:
-            old_database = json.load(f)
-        conversations = random.sample(old_database['conversations'], min(10, len(old_database['conversations'])))
-    except FileNotFoundError:
-        # 기존 파일이 없으면 단어로 대체
-        conversations = random.sample(database['vocabulary'], min(10, len(database['vocabulary'])))
-    
-    current_date = datetime.now(MSK)
-    date_str = current_date.strftime('%Y년 %m월 %d일')
-    weekday = ['월', '화', '수', '목', '금', '토', '일'][current_date.weekday()]
-    
-    for user_id, user_data in users.items():
-        if user_data.get('subscribed_daily', False):
-            try:
-                # 🎨 새로운 헤더 메시지 (인라인 키보드 없음)
-                header = f"""
-🌟 **러시아어 마스터 일일 학습** 🌟
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-📅 **{date_str} ({weekday}요일)**
-🕐 **모스크바 시간**: {current_date.strftime('%H:%M')}
-━━━━━━━━━━━━━━━━━━━━━━━━
-
-✨ **오늘도 함께 러시아어 정복하러 가요!** ✨
-
-🎯 **학습 목표**: 단어 15개 + 회화 10개 마스터
-🚀 **예상 학습 시간**: 15-20분
-🏆 **완료 시 보상**: +50 EXP + 성취 배지!
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-📱 **학습 옵션**
-━━━━━━━━━━━━━━━━━━━━━━━━
-
-`/1` - 🎮 게임으로 학습하기
-`/2` - 📊 학습 진도 확인하기  
-`/3` - 🏆 성취 배지 보기
-`/4` - 🤖 AI 튜터 분석받기
-
-💡 **팁**: 각 단어와 회화마다 개별 음성이 전송됩니다!
-                """
-                
-                await bot.send_message(chat_id=user_id, text=header)
-                await asyncio.sleep(1)
-                
-                # 📚 단어 섹션 - 개별 음성과 함께
-                words_header = f"""
-📚 **오늘의 핵심 단어 컬렉션** (15개) 📚
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-🎯 **학습법**: 음성을 들으며 3번씩 따라 읽어보세요!
-━━━━━━━━━━━━━━━━━━━━━━━━
-                """
-                
-                await bot.send_message(chat_id=user_id, text=words_header)
-                await asyncio.sleep(0.5)
-                
-                # 각 단어마다 개별 처리
-                for i, word in enumerate(vocabulary, 1):
-                    # 단어 정보 메시지
-                    word_message = f"""
-{i}️⃣ **{word['russian']}** `[{word['pronunciation']}]`
-💡 **뜻**: {word['korean']}
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-                    """
-                    
-                    await bot.send_message(chat_id=user_id, text=word_message)
-                    
-                    # 개별 음성 파일 생성 및 전송
-                    try:
-                        word_audio = await convert_text_to_speech(word['russian'], "ru")
-                        if word_audio:
-                            word_audio_buffer = io.BytesIO(word_audio)
-                            word_audio_buffer.name = f"word_{i}_{word['russian']}.mp3"
-                            
-                            await bot.send_audio(
-                                chat_id=user_id,
-                                audio=word_audio_buffer,
-                                title=f"🎵 {word['russian']} 발음",
-                                performer="루샤 봇",
-                                caption=f"🔊 **{word['russian']}** 발음\n💡 따라 읽어보세요: `{word['pronunciation']}`"
-                            )
-                            
-                            logger.info(f"개별 단어 음성 전송 완료: {word['russian']} - 사용자: {user_id}")
-                    except Exception as e:
-                        logger.error(f"단어 음성 생성 실패: {word['russian']} - {e}")
-                    
-                    await asyncio.sleep(0.8)  # 각 단어 간 간격
-                
-                # 단어 섹션 완료 메시지
-                words_complete = """
-✅ **단어 학습 완료!** 📚
-
-🎉 15개 단어와 발음을 모두 익혔습니다!
-이제 실전 회화로 넘어가볼까요? 💬
-                """
-                await bot.send_message(chat_id=user_id, text=words_complete)
-                await asyncio.sleep(1)
-                
-                # 💬 회화 섹션 - 개별 음성과 함께
-                conversations_header = f"""
-💬 **실전 회화 마스터 클래스** (10개) 💬
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-🎭 **연습법**: 음성을 들으며 상황을 상상해보세요!
-━━━━━━━━━━━━━━━━━━━━━━━━
-                """
-                
-                await bot.send_message(chat_id=user_id, text=conversations_header)
-                await asyncio.sleep(0.5)
-                
-                # 각 회화마다 개별 처리
-                for i, conv in enumerate(conversations, 1):
-                    # 회화 카테고리 결정
-                    if i <= 3:
-                        category = "🏠 일상 대화"
-                    elif i <= 6:
-                        category = "🛍️ 쇼핑 & 서비스"
-                    elif i <= 8:
-                        category = "🚇 교통 & 여행"
-                    else:
-                        category = "💼 비즈니스 & 격식"
-                    
-                    # 회화 정보 메시지
-                    conv_message = f"""
-{i}️⃣ **{category}**
-
-🗣️ **{conv['russian']}**
-🔤 `[{conv['pronunciation']}]`
-🇰🇷 **{conv['korean']}**
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-                    """
-                    
-                    await bot.send_message(chat_id=user_id, text=conv_message)
-                    
-                    # 개별 음성 파일 생성 및 전송
-                    try:
-                        conv_audio = await convert_text_to_speech(conv['russian'], "ru")
-                        if conv_audio:
-                            conv_audio_buffer = io.BytesIO(conv_audio)
-                            conv_audio_buffer.name = f"conversation_{i}_{current_date.strftime('%Y%m%d')}.mp3"
-                            
-                            await bot.send_audio(
-                                chat_id=user_id,
-                                audio=conv_audio_buffer,
-                                title=f"🎭 회화 {i}번 발음",
-                                performer="루샤 봇",
-                                caption=f"🗣️ **{category}**\n💬 {conv['korean']}\n\n🎯 상황을 상상하며 따라 해보세요!"
-                            )
-                            
-                            logger.info(f"개별 회화 음성 전송 완료: {i}번 - 사용자: {user_id}")
-                    except Exception as e:
-                        logger.error(f"회화 음성 생성 실패: {i}번 - {e}")
-                    
-                    await asyncio.sleep(1.0)  # 각 회화 간 간격
-                
-                # 🏆 최종 완료 메시지
-                completion_message = f"""
-🎉 **오늘의 학습 완료!** 🎉
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-✅ **완벽한 성과!**
-━━━━━━━━━━━━━━━━━━━━━━━━
-
-📚 **새로운 단어**: 15개 + 개별 발음 ✓
-💬 **실전 회화**: 10개 + 개별 발음 ✓  
-🎵 **음성 연습**: 25개 파일 완료 ✓
-⭐ **획득 경험치**: +50 EXP 
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-🚀 **다음 단계 추천**
-━━━━━━━━━━━━━━━━━━━━━━━━
-
-`/1` - 🎮 오늘 배운 단어로 게임하기
-`/2` - ✍️ 새로운 문장 만들어보기
-`/3` - 🏆 학습 진도 확인하기
-`/4` - 🎯 AI 튜터 개인 분석받기
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-💡 **오늘의 격려**
-━━━━━━━━━━━━━━━━━━━━━━━━
-
-꾸준함이 실력을 만듭니다! 매일 조금씩이라도
-러시아어와 친해지는 당신이 정말 대단해요! 🌟
-
-각 단어와 회화의 개별 발음을 들으며
-더 정확한 발음을 익힐 수 있었을 거예요! 
-
-🔥 **내일도 함께 러시아어 마스터하러 가요!** 🔥
-                """
-                
-                await bot.send_message(chat_id=user_id, text=completion_message)
-                
-                # 사용자 데이터 업데이트
-                user_data['stats']['daily_words_received'] += 1
-                user_data['stats']['total_exp'] += 50  # 일일 학습 완료 보상
-                
-                logger.info(f"새로운 개별 음성 일일 학습 전송 완료 - 사용자: {user_id}")
-                
-            except Exception as e:
-                logger.error(f"개별 음성 일일 학습 전송 실패 - 사용자: {user_id}: {e}")
-                import traceback
-                logger.error(f"상세 오류: {traceback.format_exc()}")
-    
-    save_user_data(users)
-
 # 먼저, 일반 메시지 처리 핸들러 함수 추가
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """명령어가 아닌 일반 메시지를 처리하여 Gemini AI에 질문을 전달합니다."""
@@ -1831,7 +1679,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # AI 호출
     processing_message = await update.message.reply_text("🤔 생각 중... 😊")
-    response = await call_gemini(user_message)
+    response = await call_gemini(user_message, task='chat')
     
     # 응답 전송
     await processing_message.delete()
@@ -1876,11 +1724,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # 러시아어 학습 관련 키워드 감지 및 맞춤 응답
     if any(keyword in user_message.lower() for keyword in ['게임', 'game', '게임하고싶어', '놀자']):
-        response = await generate_game_recommendation(user)
+        await finish_reply(processing_message, await generate_game_recommendation(user))
     elif any(keyword in user_message.lower() for keyword in ['진도', '진척', '레벨', '경험치']):
-        response = await generate_progress_summary(user)
+        await finish_reply(processing_message, await generate_progress_summary(user))
     elif any(keyword in user_message.lower() for keyword in ['번역', 'translate', '뜻']):
-        response = await generate_translation_help(user_message)
+        await finish_reply(processing_message, await generate_translation_help(user_message))
     else:
         # 일반 AI 대화
         enhanced_prompt = f"""
@@ -1896,11 +1744,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 3. 관련 명령어나 기능 추천
 4. 이모지 활용으로 재미있게
 """
-        response = await call_gemini(enhanced_prompt)
-    
-    # 응답 전송
-    await processing_message.delete()
-    await update.message.reply_text(response)
+        await stream_reply(processing_message, stream_gemini(enhanced_prompt, task='chat'))
 
 # ===========================================
 # 🎮 게임별 입력 처리 함수들
@@ -2017,6 +1861,7 @@ async def end_word_match_game(update: Update, context: ContextTypes.DEFAULT_TYPE
         best_score_text = ""
     
     save_user_data({str(chat_id): user_data})
+    leaderboard.record_game_score(chat_id, 'word_match', final_score)
     
     result_text_msg = f"""
 🎯 **단어 매칭 게임 완료!** 🎯
@@ -2092,15 +1937,6 @@ async def pronunciation_challenge_command(update: Update, context: ContextTypes.
     import random
     selected_sentence = random.choice(available_sentences)
     
-    # 음성 파일 생성
-    try:
-        audio_bytes = await convert_text_to_speech(selected_sentence['ru'], "ru")
-        audio_file = io.BytesIO(audio_bytes)
-        audio_file.name = f"pronunciation_{selected_sentence['ru'][:10]}.mp3"
-    except Exception as e:
-        logger.error(f"TTS error: {e}")
-        audio_file = None
-    
     challenge_text = f"""
 🎤 **발음 챌린지 시작!** 🎤
 
@@ -2142,11 +1978,14 @@ async def pronunciation_challenge_command(update: Update, context: ContextTypes.
     await update.message.reply_text(challenge_text)
     
     # 음성 파일 전송
-    if audio_file:
-        await update.message.reply_audio(
-            audio=audio_file,
+    try:
+        await send_speech(
+            update.message.reply_audio, selected_sentence['ru'], "ru",
+            filename=f"pronunciation_{selected_sentence['ru'][:10]}.mp3",
             caption=f"🔊 **{selected_sentence['ru']}** 발음을 들어보세요!"
         )
+    except Exception as e:
+        logger.error(f"TTS error: {e}")
     
     # 게임 통계 업데이트
     user_data['learning']['game_stats']['pronunciation_challenge']['played'] += 1
@@ -2272,7 +2111,7 @@ async def award_achievements(update: Update, user_data, new_achievements):
         
         await update.message.reply_text(achievement_text)
     
-    save_user_data(load_user_data())  # 변경사항 저장
+    save_user_data({str(update.effective_chat.id): user_data})  # 변경사항 저장
 
 # === 🧠 개인화된 AI 튜터 시스템 ===
 
@@ -2420,7 +2259,7 @@ async def personalized_lesson_command(update: Update, context: ContextTypes.DEFA
     """
     
     try:
-        lesson_content = await call_gemini(lesson_prompt)
+        lesson_content = await call_gemini(lesson_prompt, task='lesson')
         
         lesson_text = f"""
 🎓 **{user.first_name}님만의 맞춤형 수업** 🎓
@@ -2448,7 +2287,7 @@ async def personalized_lesson_command(update: Update, context: ContextTypes.DEFA
             'content': lesson_content,
             'date': datetime.now(MSK).isoformat()
         })
-        save_user_data(load_user_data())
+        save_user_data({str(chat_id): user_data})
         
     except Exception as e:
         await update.message.reply_text("❌ 맞춤형 수업을 생성할 수 없습니다. 잠시 후 다시 시도해주세요.")
@@ -2794,15 +2633,12 @@ async def vocabulary_builder_command(update: Update, context: ContextTypes.DEFAU
     chat_id = user.id
     user_data = get_user(chat_id)
     
-    try:
-        with open('russian_korean_vocab_2000.json', 'r', encoding='utf-8') as f:
-            vocab_data = json.load(f)
-    except:
+    if not len(vocabulary_index):
         await update.message.reply_text("❌ 어휘 데이터를 불러올 수 없습니다.")
         return
     
-    import random
-    selected_words = random.sample(list(vocab_data.items()), 5)
+    # 아직 안 본 단어 중에서 (본 단어 표시는 아래 저장 때 함께 기록)
+    selected_words = [(entry.russian, entry.korean) for entry in sample_unseen_words(user_data, 5)]
     
     vocab_text = f"""
 📚 **어휘 확장 시스템** 📚
@@ -2847,7 +2683,7 @@ async def vocabulary_builder_command(update: Update, context: ContextTypes.DEFAU
                 'repetitions': 0
             }
     
-    save_user_data(load_user_data())
+    save_user_data({str(chat_id): user_data})
     
     await update.message.reply_text(vocab_text)
 
@@ -2911,33 +2747,58 @@ async def pronunciation_score_command(update: Update, context: ContextTypes.DEFA
 # === 👥 소셜 학습 기능 ===
 
 async def leaderboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """리더보드"""
-    leaderboard_text = """
-🏆 **글로벌 리더보드** 🏆
+    """리더보드 (/leaderboard [exp|quiz|streak] 또는 /leaderboard <게임> [daily|weekly|season])"""
+    chat_id = str(update.effective_chat.id)
+    args = [arg.lower() for arg in context.args] if context.args else []
+    aliases = {'exp': 'overall', 'overall': 'overall', 'quiz': 'quiz', 'streak': 'streak'}
+    window_names = {'daily': '오늘', 'weekly': '이번 주', 'season': '이번 시즌'}
+    
+    if args and args[0] in LEARNING_GAMES:
+        # 게임별 기간 순위
+        game = args[0]
+        window = args[1] if len(args) > 1 and args[1] in window_names else 'weekly'
+        title = f"{LEARNING_GAMES[game]['name']} - {window_names[window]}"
+        unit = '점'
+        top = leaderboard.game_top(game, window, 10)
+        my_rank, my_score, total = leaderboard.game_rank(game, window, chat_id)
+    else:
+        category = aliases.get(args[0], 'overall') if args else 'overall'
+        title = LEADERBOARD_CATEGORIES[category]
+        unit = {'overall': '점', 'quiz': '점', 'streak': '일'}[category]
+        top = leaderboard.top(category, 10)
+        my_rank, my_score, total = leaderboard.rank(category, chat_id)
+    
+    medals = ['🥇', '🥈', '🥉']
+    lines = []
+    rank = 0
+    previous_score = None
+    for position, (user_id, score) in enumerate(top, 1):
+        if score <= 0:
+            break
+        if score != previous_score:
+            rank, previous_score = position, score
+        icon = medals[rank - 1] if rank <= 3 else f"{rank}위"
+        name = "나" if user_id == chat_id else f"학습자 ***{user_id[-4:]}"
+        lines.append(f"{icon} {name} - {score:,} {unit}")
+    
+    my_line = f"{my_rank}위 / {total}명 ({my_score:,} {unit})" if my_rank and my_score > 0 else "아직 순위가 없습니다"
+    
+    leaderboard_text = f"""
+🏆 **리더보드 - {title}** 🏆
 
 ━━━━━━━━━━━━━━━━━━━━━━━━
 **🥇 TOP 학습자들**
 ━━━━━━━━━━━━━━━━━━━━━━━━
 
-🥇 **1위** 익명사용자1 - 2,850 점
-🥈 **2위** 익명사용자2 - 2,720 점  
-🥉 **3위** 익명사용자3 - 2,650 점
-4위 익명사용자4 - 2,400 점
-5위 익명사용자5 - 2,200 점
+{chr(10).join(lines) if lines else '아직 기록이 없습니다. 첫 번째 주인공이 되어보세요!'}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━
-**📊 랭킹 점수 산정 기준**
+**📍 내 순위**: {my_line}
 ━━━━━━━━━━━━━━━━━━━━━━━━
 
-• 퀘스트 완료: +50점
-• 게임 승리: +30점
-• 연속 학습일: 일당 +10점
-• 성취 달성: +100점
-
+💡 다른 순위 보기: `/leaderboard exp` · `/leaderboard quiz` · `/leaderboard streak`
+🎮 게임 순위: `/leaderboard speed_quiz weekly` · `/leaderboard word_match daily`
 🎯 더 많이 학습하고 순위를 올려보세요!
-
-💡 **아직 개발 중인 기능입니다**
-실제 랭킹 시스템은 곧 업데이트될 예정입니다!
     """
     
     await update.message.reply_text(leaderboard_text)
@@ -3081,8 +2942,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     elif callback_data == "daily_learning":
         from telegram import InlineKeyboardButton, InlineKeyboardMarkup
         
-        users = load_user_data()
-        user_data = users.get(str(user_id), {})
+        user_data = get_user_record(str(user_id)) or {}
         subscribed = user_data.get('subscribed_daily', False)
         
         if subscribed:
@@ -3140,9 +3000,8 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await unsubscribe_daily_command(update, context)
     
     elif callback_data == "get_daily_now":
-        # 즉시 일일 학습 콘텐츠 전송
-        bot = context.bot
-        await send_daily_learning(bot)
+        # 누른 사용자에게만 즉시 일일 학습 콘텐츠 전송
+        await send_daily_now(context.bot, query.message.chat_id)
         await query.edit_message_text("📚 **일일 학습 콘텐츠를 전송했습니다!**\n\n🎵 음성 파일도 함께 받으셨어요!")
     
     # 🌍 번역 관련 콜백
@@ -3606,34 +3465,27 @@ async def word_match_game_command(update: Update, context: ContextTypes.DEFAULT_
     chat_id = user.id
     user_data = get_user(chat_id)
     
-    try:
-        # 어휘 데이터 로드
-        with open('russian_korean_vocab_2000.json', 'r', encoding='utf-8') as f:
-            vocab_data = json.load(f)
-    except Exception as e:
+    if not len(vocabulary_index):
         await update.message.reply_text("❌ 어휘 데이터를 불러올 수 없습니다. 관리자에게 문의해주세요.")
-        logger.error(f"Vocab data load error: {e}")
         return
     
-    import random
-    
     # 사용자 레벨에 따른 단어 선택
     level = user_data['stats']['level']
     if level <= 5:
         # 초급: 기본 단어 5개
         sample_size = 5
-        word_list = list(vocab_data.items())[:500]  # 첫 500개 기본 단어
+        vocab_level = 'beginner'
     elif level <= 15:
         # 중급: 중간 단어 6개
         sample_size = 6
-        word_list = list(vocab_data.items())[500:1200]  # 중간 700개 단어
+        vocab_level = 'intermediate'
     else:
         # 고급: 고급 단어 8개
         sample_size = 8
-        word_list = list(vocab_data.items())[1200:]  # 고급 단어들
+        vocab_level = 'advanced'
     
-    # 랜덤 단어 선택
-    game_words = random.sample(word_list, min(sample_size, len(word_list)))
+    # 레벨별 목록에서 아직 안 본 단어 선택 (다 봤으면 그 레벨만 새로 시작)
+    game_words = [(entry.russian, entry.korean) for entry in sample_unseen_words(user_data, sample_size, level=vocab_level)]
     
     # 게임 시작 메시지
     game_text = f"""
@@ -3801,17 +3653,12 @@ async def speed_quiz_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     chat_id = user.id
     user_data = get_user(chat_id)
     
-    try:
-        with open('russian_korean_vocab_2000.json', 'r', encoding='utf-8') as f:
-            vocab_data = json.load(f)
-    except Exception as e:
+    if not len(vocabulary_index):
         await update.message.reply_text("❌ 어휘 데이터를 불러올 수 없습니다.")
         return
     
-    import random
-    
     # 5개 문제 준비
-    quiz_words = random.sample(list(vocab_data.items()), 5)
+    quiz_words = [(entry.russian, entry.korean) for entry in sample_unseen_words(user_data, 5)]
     
     game_text = f"""
 ⚡ **스피드 퀴즈 시작!** ⚡
@@ -3935,6 +3782,7 @@ async def end_speed_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
         best_score_text = ""
     
     save_user_data({str(chat_id): user_data})
+    leaderboard.record_game_score(chat_id, 'speed_quiz', final_score)
     
     result_text_msg = f"""
 ⚡ **스피드 퀴즈 완료!** ⚡
@@ -4014,6 +3862,7 @@ async def handle_sentence_builder_input(update: Update, context: ContextTypes.DE
             best_score_text = ""
         
         save_user_data({str(chat_id): user_data})
+        leaderboard.record_game_score(chat_id, 'sentence_builder', final_score)
         
         result_msg = f"""
 🔧 **문장 조립 게임 완료!** 🔧
@@ -4117,13 +3966,13 @@ async def handle_pronunciation_input(update: Update, context: ContextTypes.DEFAU
     if user_input.lower() in ['음성', 'audio', '다시']:
         sentence = game_data['sentence']['ru']
         try:
-            audio_bytes = await convert_text_to_speech(sentence, "ru")
-            audio_file = io.BytesIO(audio_bytes)
-            audio_file.name = f"pronunciation_{sentence[:10]}.mp3"
-            await update.message.reply_audio(
-                audio=audio_file,
+            sent = await send_speech(
+                update.message.reply_audio, sentence, "ru",
+                filename=f"pronunciation_{sentence[:10]}.mp3",
                 caption=f"🔊 **{sentence}** 발음을 들어보세요!"
             )
+            if not sent:
+                raise RuntimeError("음성 생성 실패")
         except Exception as e:
             await update.message.reply_text("❌ 음성 생성 중 오류가 발생했습니다.")
         return
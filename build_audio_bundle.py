@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+러시아어 발음 번들 빌더
+---------------------------------------------------------
+• 대상   : 2000단어 단어장 + 학습 DB의 단어/회화 문장 (러시아어)
+• 합성   : gTTS, 동시 합성 수 제한 + 실패 시 재시도
+• 재개   : 합성한 음성은 빌드 폴더에 하나씩 저장 → 중단 후 다시 실행하면 남은 것만 합성
+• 결과   : 데이터 파일 하나 + 오프셋 인덱스 (봇이 mmap으로 바로 읽음)
+
+사용법: python build_audio_bundle.py [--concurrency 4] [--pack-only]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+
+from gtts import gTTS
+
+from config.settings import (
+    AUDIO_BUNDLE_BUILD_DIR, AUDIO_BUNDLE_CONCURRENCY, AUDIO_BUNDLE_SOURCES,
+    AUDIO_BUNDLE_DATA_FILE, AUDIO_BUNDLE_INDEX_FILE
+)
+from utils.speech_keys import speech_runs, speech_key
+from utils.audio_bundle import write_bundle
+
+MAX_RETRIES = 3
+
+
+def collect_texts():
+    """모든 원본 JSON에서 중복 없이 러시아어 문장 수집 → {캐시 키: 문장}"""
+    texts = {}
+    for path, section in AUDIO_BUNDLE_SOURCES:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get(section, [])
+        except FileNotFoundError:
+            print(f"  ⚠️ 파일 없음, 건너뜀: {path}")
+            continue
+        before = len(texts)
+        for entry in entries:
+            text = (entry.get('russian') or '').strip()
+            if text:
+                texts.setdefault(speech_key(text, "ru"), text)
+        print(f"  📖 {path} [{section}]: 새 문장 {len(texts) - before}개")
+    return texts
+
+
+def staged_path(key):
+    return os.path.join(AUDIO_BUNDLE_BUILD_DIR, f"{key}.mp3")
+
+
+def synthesize(text):
+    """gTTS 한 문장 합성 (번들 키와 같은 텍스트/언어 사용)"""
+    lang, text = speech_runs(text, "ru")[0]
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang, slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+async def render_one(semaphore, key, text, progress):
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                data = await loop.run_in_executor(None, synthesize, text)
+                break
+            except Exception as e:
+                if attempt == MAX_RETRIES:
+                    progress['failed'] += 1
+                    print(f"    ❌ 실패: {text} - {e}")
+                    return
+                await asyncio.sleep(2 ** attempt)
+
+        # 임시 파일에 쓴 뒤 교체 (중간에 죽어도 깨진 파일이 남지 않음)
+        fd, tmp_path = tempfile.mkstemp(dir=AUDIO_BUNDLE_BUILD_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, staged_path(key))
+
+        progress['done'] += 1
+        if progress['done'] % 50 == 0 or progress['done'] == progress['total']:
+            elapsed = time.time() - progress['started']
+            print(f"    ✅ {progress['done']}/{progress['total']} ({elapsed:.0f}초)")
+
+
+async def render_missing(texts, concurrency):
+    os.makedirs(AUDIO_BUNDLE_BUILD_DIR, exist_ok=True)
+    missing = {key: text for key, text in texts.items() if not os.path.exists(staged_path(key))}
+    print(f"🎵 합성 대상: {len(missing)}개 (이미 합성됨 {len(texts) - len(missing)}개, 동시 {concurrency}개)")
+    progress = {'done': 0, 'failed': 0, 'total': len(missing), 'started': time.time()}
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(*(render_one(semaphore, key, text, progress) for key, text in missing.items()))
+    return progress['failed']
+
+
+def pack(texts):
+    """합성된 음성을 번들 파일로 묶기 (빠진 문장은 봇이 요청 시 합성)"""
+    def clips():
+        for key in sorted(texts):
+            path = staged_path(key)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    yield key, f.read()
+
+    count = write_bundle(clips(), AUDIO_BUNDLE_DATA_FILE, AUDIO_BUNDLE_INDEX_FILE)
+    size = os.path.getsize(AUDIO_BUNDLE_DATA_FILE)
+    print(f"📦 번들 기록: {count}/{len(texts)}개, {size / 1024 / 1024:.1f}MB → {AUDIO_BUNDLE_DATA_FILE}, {AUDIO_BUNDLE_INDEX_FILE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="러시아어 발음 번들 빌드")
+    parser.add_argument('--concurrency', type=int, default=AUDIO_BUNDLE_CONCURRENCY, help="동시 합성 수")
+    parser.add_argument('--pack-only', action='store_true', help="합성 없이 빌드 폴더의 음성만 묶기")
+    args = parser.parse_args()
+
+    print("🚀 발음 번들 빌드 시작...")
+    texts = collect_texts()
+    if not args.pack_only:
+        failed = asyncio.run(render_missing(texts, max(1, args.concurrency)))
+        if failed:
+            print(f"⚠️ {failed}개 합성 실패 - 다시 실행하면 실패한 것만 이어서 합성합니다")
+    pack(texts)
+    print("🎉 발음 번들 빌드 완료!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+단어장 컴파일러 (JSON → mmap 바이너리)
+---------------------------------------------------------
+• 입력   : russian_korean_vocab_2000.json (generate_2000_vocab.py / complete_vocab.py 결과)
+• 문자열 : 중복 없이 한 번만 저장 (같은 뜻/레벨/카테고리 공유)
+• 열     : 단어별 문자열 번호 + 레벨/카테고리 코드 배열, 러시아어 정렬 순서, 레벨/카테고리별 번호 목록
+• 결과   : 파일 하나 - 봇 프로세스들이 mmap으로 열어 페이지를 공유 (시작 시 파싱 없음)
+• 비교   : --benchmark 로 JSON 로더와 로드 시간/메모리/조회 속도 비교 (--scale 로 단어 수 늘려서)
+
+사용법: python compile_vocab.py [--input 단어장.json] [--output 단어장.bin] [--benchmark [--scale 10]]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from config.settings import VOCAB_FILE, VOCAB_BINARY_FILE
+from utils.vocab_binary import write_vocab_binary
+from utils.vocabulary_index import VocabularyIndex
+
+
+def compile_vocab(input_path, output_path):
+    with open(input_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    count = write_vocab_binary(data.get('vocabulary', []), data.get('metadata', {}), output_path)
+    json_size = os.path.getsize(input_path)
+    binary_size = os.path.getsize(output_path)
+    print(f"📦 단어장 컴파일: {count}개, {json_size / 1024:.0f}KB → {binary_size / 1024:.0f}KB ({output_path})")
+    return count
+
+
+def scaled_copy(input_path, scale, directory):
+    """단어장을 scale배로 늘린 임시 JSON (러시아어만 바꾸고 뜻/발음/레벨/카테고리는 원본 공유)"""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    words = data.get('vocabulary', [])
+    vocabulary = [
+        dict(word, russian=word['russian'] if copy == 0 else f"{word['russian']} {copy}")
+        for copy in range(scale) for word in words if word.get('russian')
+    ]
+    path = os.path.join(directory, 'vocab_scaled.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': data.get('metadata', {}), 'vocabulary': vocabulary}, f, ensure_ascii=False)
+    return path
+
+
+def measure_open(make, repeat):
+    """인덱스 생성 시간(중앙값)과 생성 후 남은 파이썬 힙 (mmap 페이지는 포함되지 않음)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    index = make()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, statistics.median(timings), retained, peak
+
+
+def measure_lookups(index, operations=20000):
+    levels = index.levels or [None]
+    words = [entry.russian for entry in index.sample(1000)]
+    start = time.perf_counter()
+    for i in range(operations):
+        index.sample(5, level=levels[i % len(levels)])
+    sample_us = (time.perf_counter() - start) / operations * 1e6
+    start = time.perf_counter()
+    for i in range(operations):
+        index.get(words[i % len(words)])
+    get_us = (time.perf_counter() - start) / operations * 1e6
+    return sample_us, get_us
+
+
+def benchmark(input_path, scale, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        if scale > 1:
+            input_path = scaled_copy(input_path, scale, directory)
+        output_path = os.path.join(directory, 'vocab.bin')
+        compile_vocab(input_path, output_path)
+
+        # 자동 재로드 확인은 끄고 (간격 무한대) 로더 자체만 비교
+        loaders = {
+            'json': lambda: VocabularyIndex(input_path, None, reload_interval=float('inf')),
+            'binary': lambda: VocabularyIndex(input_path, output_path, reload_interval=float('inf'))
+        }
+        print(f"\n⏱️ 벤치마크 (반복 {repeat}회)")
+        print(f"{'형식':<8}{'단어':>9}{'파일':>10}{'로드':>10}{'힙 유지':>10}{'힙 최대':>10}{'sample(5)':>12}{'get':>9}")
+        for name, make in loaders.items():
+            index, load_ms, retained, peak = measure_open(make, repeat)
+            assert index.get_metrics()['backend'] == name
+            sample_us, get_us = measure_lookups(index)
+            size = os.path.getsize(output_path if name == 'binary' else input_path)
+            print(
+                f"{name:<8}{len(index):>9}{size / 1024 / 1024:>8.1f}MB{load_ms:>8.1f}ms"
+                f"{retained / 1024 / 1024:>8.1f}MB{peak / 1024 / 1024:>8.1f}MB{sample_us:>10.1f}µs{get_us:>7.1f}µs"
+            )
+        print("※ 바이너리는 파일 페이지를 mmap으로 공유하므로 프로세스별 힙에 포함되지 않습니다")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="단어장 JSON을 mmap 바이너리로 컴파일")
+    parser.add_argument('--input', default=VOCAB_FILE, help="원본 단어장 JSON")
+    parser.add_argument('--output', default=VOCAB_BINARY_FILE, help="컴파일 결과 파일")
+    parser.add_argument('--benchmark', action='store_true', help="JSON 로더와 성능 비교 (임시 파일 사용)")
+    parser.add_argument('--scale', type=int, default=1, help="벤치마크 때 단어장을 몇 배로 늘릴지")
+    parser.add_argument('--repeat', type=int, default=5, help="벤치마크 로드 반복 횟수")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        random.seed(0)
+        benchmark(args.input, max(1, args.scale), max(1, args.repeat))
+        return
+    compile_vocab(args.input, args.output)
+    print("🎉 단어장 컴파일 완료! 봇을 다시 시작하지 않아도 다음 조회 때 새 파일을 씁니다")
+
+
+if __name__ == "__main__":
+    main()
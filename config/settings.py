@@ -14,13 +14,103 @@ MSK = pytz.timezone('Europe/Moscow')
 USER_DATA_FILE = 'user_data.json'
 MODEL_STATUS_FILE = 'model_status.json'
 
+# --- 단어장 인덱스 (시작 시 한 번 로드) ---
+VOCAB_FILE = 'russian_korean_vocab_2000.json'
+VOCAB_RELOAD_INTERVAL = 30.0   # 단어장 파일 변경 확인 간격 (초)
+VOCAB_BINARY_FILE = os.getenv("VOCAB_BINARY_FILE", "russian_korean_vocab_2000.bin")  # compile_vocab.py로 생성 (있으면 mmap으로 사용)
+SEEN_WORDS_SAMPLE_ATTEMPTS = 4   # 안 본 단어 샘플링 시 단어당 무작위 시도 횟수 (모자라면 안 본 단어만 모아서 뽑음)
+
+# --- 사용자 저장소 설정 ---
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "sqlite")  # sqlite | json
+USER_DB_FILE = os.getenv("USER_DB_FILE", "user_data.db")
+USER_FLUSH_INTERVAL = 5.0      # 쓰기 지연 버퍼 플러시 주기 (초)
+USER_FLUSH_MAX_PENDING = 500   # 대기 건수가 이 값을 넘으면 즉시 플러시
+SUBSCRIBER_CHUNK_SIZE = 1000   # 구독자 인덱스를 한 번에 읽는 단위
+
+# --- 리더보드 설정 ---
+GAME_LEADERBOARD_WINDOWS = ('daily', 'weekly', 'season')  # season = 분기
+GAME_ARCHIVE_TOP = 10          # 지난 기간은 상위 N명만 압축 보관
+GAME_ROLLOVER_INTERVAL = 60.0  # 기간 마감 확인 주기 (초)
+
+# --- 업데이트 동시 처리 ---
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "16"))  # 동시에 처리할 업데이트 수 (같은 채팅은 잠금으로 순차 처리)
+
+# --- Gemini 응답 캐시 ---
+GEMINI_CACHE_FILE = os.getenv("GEMINI_CACHE_FILE", "gemini_cache.db")
+GEMINI_CACHE_MEMORY_BYTES = 8 * 1024 * 1024    # 메모리 계층 최대 크기 (8MB)
+GEMINI_CACHE_DISK_BYTES = 200 * 1024 * 1024    # 디스크 계층 최대 크기 (200MB)
+GEMINI_CACHE_TTL = {                           # 작업별 캐시 유지 시간 (초, 0이면 캐시 안 함)
+    'translate': 7 * 24 * 3600,
+    'correct': 3 * 24 * 3600,
+    'quiz': 1800,
+    'lesson': 0,
+    'chat': 0,
+    'default': 1800
+}
+
+# --- 스트리밍 응답 ---
+STREAM_EDIT_INTERVAL = 1.0     # 생성 중 메시지 수정 최소 간격 (초, 채팅별 수정 한도 대비)
+
+# --- 브로드캐스트 (일일 학습 전송) ---
+BROADCAST_GLOBAL_RATE = 30     # 봇 전체 초당 메시지 수 (Telegram 한도 약 30/s)
+BROADCAST_PER_CHAT_RATE = 1    # 채팅별 초당 메시지 수
+BROADCAST_CONCURRENCY = 50     # 동시에 전송하는 채팅 수 (전체 한도를 채울 만큼)
+BROADCAST_MAX_RETRIES = 3      # RetryAfter/네트워크 오류 시 메시지당 재시도 횟수
+BROADCAST_PROGRESS_INTERVAL = 30.0  # 진행 상황 로그 간격 (초)
+BROADCAST_JOB_KEEP_DAYS = 7     # 완료된 브로드캐스트 작업 기록 보관 기간 (일)
+
+# --- 일일 학습 팩 (전송 시각마다 한 번만 만들어 모든 구독자가 공유) ---
+DAILY_LEARNING_SLOTS = ((7, 0), (12, 0))   # 모스크바 시간 전송 시각
+DAILY_PACK_DIR = "daily_packs"
+DAILY_PACK_PREPARE_MINUTES = 10    # 전송 몇 분 전에 미리 만들지 (음성 합성 포함)
+DAILY_PACK_KEEP = 14               # 디스크에 남겨 둘 최근 팩 수
+# 일일 학습 음성 전송 방식: 'album' (최대 10개씩 앨범), 'track' (한 트랙 + 시간 목차), 'full' (단어마다 개별 메시지)
+DAILY_DELIVERY_MODE = os.getenv("DAILY_DELIVERY_MODE", "album")
+DAILY_ALBUM_SIZE = 10              # 앨범 하나에 넣을 음성 수 (Telegram 최대 10)
+# 사용자별 전송 시각 (기본은 DAILY_LEARNING_SLOTS 모스크바 시각, /daily_time으로 변경)
+DELIVERY_DEFAULT_TZ = 'Europe/Moscow'
+DELIVERY_WINDOW_MINUTES = 30       # 선택한 시각부터 이 시간 안에서 사용자별로 고르게 분산
+DELIVERY_TZ_ALIASES = {'MSK': 'Europe/Moscow', 'KST': 'Asia/Seoul', 'UTC': 'UTC'}
+
+# --- TTS 음성 캐시 ---
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MAX_BYTES = 500 * 1024 * 1024   # 디스크 사용 한도 (500MB), 넘으면 오래 안 쓴 음성부터 삭제
+
+# --- TTS 작업 풀 ---
+TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", "4"))   # 동시에 합성하는 gTTS 요청 수
+TTS_DEADLINE = 20.0            # 요청당 제한 시간 (대기 + 합성, 초)
+TTS_CHUNK_CHARS = 100          # 긴 글은 문장 단위로 이만큼씩 나눠 병렬 합성 (gTTS 한 요청 한도 100자)
+TTS_MAX_CHARS = 5000           # 한 번에 읽어 줄 최대 글자 수
+TTS_REQUEST_CONCURRENCY = 2    # 긴 글 하나가 동시에 합성하는 덩어리 수 (다른 사용자의 TTS가 뒤로 밀리지 않도록)
+TTS_LONG_TEXT_DEADLINE = 180.0  # 여러 덩어리로 나뉘는 긴 글 한 요청 전체의 제한 시간 (초)
+
+# --- 사전 생성 발음 번들 (build_audio_bundle.py로 생성) ---
+AUDIO_BUNDLE_DATA_FILE = os.getenv("AUDIO_BUNDLE_DATA_FILE", "pronunciation_bundle.dat")
+AUDIO_BUNDLE_INDEX_FILE = os.getenv("AUDIO_BUNDLE_INDEX_FILE", "pronunciation_bundle.idx")
+AUDIO_BUNDLE_BUILD_DIR = "pronunciation_build"   # 빌드 중간 결과 (중단 후 이어서 빌드)
+AUDIO_BUNDLE_CONCURRENCY = 4                     # 빌드 시 동시 합성 수
+AUDIO_BUNDLE_SOURCES = [                         # (JSON 파일, 문장 목록 키)
+    ('russian_korean_vocab_2000.json', 'vocabulary'),
+    ('russian_learning_database.json', 'vocabulary'),
+    ('russian_learning_database.json', 'conversations'),
+    ('russian_conversations_database.json', 'conversations'),
+]
+
 # --- 모델 설정 ---
-MODEL_CONFIG = [
-    {'name': 'gemini-2.5-pro', 'display_name': 'Gemini 2.5 Pro'},
-    {'name': 'gemini-1.5-pro-latest', 'display_name': 'Gemini 1.5 Pro'},
-    {'name': 'gemini-1.5-flash', 'display_name': 'Gemini 1.5 Flash'}
+MODEL_CONFIG = [  # rpm/rpd: 모델별 분당/일일 요청 한도
+    {'name': 'gemini-2.5-pro', 'display_name': 'Gemini 2.5 Pro', 'rpm': 5, 'rpd': 100},
+    {'name': 'gemini-1.5-pro-latest', 'display_name': 'Gemini 1.5 Pro', 'rpm': 2, 'rpd': 50},
+    {'name': 'gemini-1.5-flash', 'display_name': 'Gemini 1.5 Flash', 'rpm': 15, 'rpd': 1500}
 ]
 
+# --- 모델 서킷 브레이커 ---
+MODEL_CIRCUIT_FAILURE_THRESHOLD = 3      # 연속 실패 시 차단 (할당량/404 오류는 즉시 차단)
+MODEL_CIRCUIT_OPEN_SECONDS = 60          # 첫 차단 시간 (초), 시험 호출 실패 시 두 배씩
+MODEL_CIRCUIT_MAX_OPEN_SECONDS = 900     # 최대 차단 시간 (초)
+MODEL_CIRCUIT_PROBE_TIMEOUT = 60.0       # 시험 호출이 결과 없이 끝나면(취소 등) 이 시간 뒤 다시 시험 허용 (초)
+MODEL_RPM_MAX_WAIT = 5.0                 # 분당 한도에만 걸렸을 때 기다릴 최대 시간 (초), 넘으면 잠시 후 다시 시도 안내
+MODEL_STATUS_CHECKPOINT_INTERVAL = 30.0  # 모델 상태 파일 저장 주기 (초)
+
 # --- 명령어 설명 및 기능 ---
 COMMAND_DESCRIPTIONS = {
     'start': {
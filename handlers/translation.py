@@ -4,7 +4,8 @@ from telegram.ext import ContextTypes
 
 from config.settings import LANGUAGE_MAPPING
 from services.gemini_service import call_gemini
-from services.tts_service import convert_text_to_speech
+from services.tts_service import send_speech
+from utils.script_segmenter import describe_languages
 from utils.message_utils import split_long_message
 
 logger = logging.getLogger(__name__)
@@ -173,30 +174,19 @@ async def listening_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # "변환 중..." 메시지 표시
         processing_message = await update.message.reply_text("🎵 음성 변환 중...")
         
-        # 자동 언어 감지로 음성 변환
-        audio_data = await convert_text_to_speech(input_text, "auto")
+        # 언어 감지 (한글/키릴/라틴 구간을 한 번에 나누고, 같은 결과를 TTS에서도 재사용)
+        lang_flag, lang_name = describe_languages(input_text)
         
-        if audio_data:
+        # 자동 언어 감지로 음성 변환 후 전송 (이미 올린 음성은 file_id 재사용)
+        sent = await send_speech(
+            update.message.reply_audio, input_text, "auto",
+            title=f"{lang_name} 음성: {input_text[:50]}...",
+            caption=f"{lang_flag} {lang_name} 음성\n📝 텍스트: {input_text}\n🎤 엔진: Google TTS"
+        )
+        
+        if sent:
             # "변환 중..." 메시지 삭제
             await processing_message.delete()
-            
-            # 언어 감지
-            if any('\u3131' <= char <= '\u3163' or '\uac00' <= char <= '\ud7a3' for char in input_text):
-                lang_flag = "🇰🇷"
-                lang_name = "한국어"
-            elif any('\u0400' <= char <= '\u04ff' for char in input_text):
-                lang_flag = "🇷🇺"
-                lang_name = "러시아어"
-            else:
-                lang_flag = "🇰🇷"
-                lang_name = "한국어 (기본값)"
-            
-            # 음성 파일 전송
-            await update.message.reply_audio(
-                audio=audio_data,
-                title=f"{lang_name} 음성: {input_text[:50]}...",
-                caption=f"{lang_flag} {lang_name} 음성\n📝 텍스트: {input_text}\n🎤 엔진: Google TTS"
-            )
         else:
             await processing_message.edit_text("음성 변환 실패. 다시 시도해주세요. 😅")
             
@@ -269,19 +259,16 @@ async def translate_listen_command(update: Update, context: ContextTypes.DEFAULT
             # 음성 변환 메시지 표시
             tts_message = await update.message.reply_text("🎵 음성 변환 중...")
             
-            # 정리된 번역 텍스트를 음성으로 변환
-            audio_data = await convert_text_to_speech(clean_translation, tts_lang)
+            # 정리된 번역 텍스트를 음성으로 변환해 전송
+            sent = await send_speech(
+                update.message.reply_audio, clean_translation, tts_lang,
+                title=f"{lang_name} 음성: {clean_translation[:50]}...",
+                caption=f"{lang_flag} {lang_name} 음성 (간단 번역+TTS)\n📝 텍스트: {clean_translation}\n🎤 엔진: Google TTS"
+            )
             
-            if audio_data:
+            if sent:
                 # 음성 변환 메시지 삭제
                 await tts_message.delete()
-                
-                # 음성 파일 전송
-                await update.message.reply_audio(
-                    audio=audio_data,
-                    title=f"{lang_name} 음성: {clean_translation[:50]}...",
-                    caption=f"{lang_flag} {lang_name} 음성 (간단 번역+TTS)\n📝 텍스트: {clean_translation}\n🎤 엔진: Google TTS"
-                )
             else:
                 await tts_message.edit_text("음성 변환 실패. 번역만 완료되었습니다. 😅")
         else:
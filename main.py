@@ -2,8 +2,15 @@ import os
 import asyncio
 import logging
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
-from config.settings import BOT_TOKEN, MSK
+from config.settings import BOT_TOKEN, MSK, CONCURRENT_UPDATES
 from utils.data_utils import UserManager
+from utils.write_behind import user_buffer
+from utils.user_session import install_user_sessions
+from utils.leaderboard import leaderboard
+from services.model_guard import model_guard
+from services.tts_pool import tts_pool
+from services.scheduler_service import create_scheduler
+from services.daily_pack import resume_daily_packs
 import pytz
 
 # --- 로깅 설정 (러시아 모스크바 시간대) ---
@@ -23,6 +30,36 @@ for handler in logging.root.handlers:
 
 # 콜백 핸들러 제거됨 - 이제 명령어만 사용
 
+async def on_startup(application: Application) -> None:
+    """봇 시작 시 백그라운드 작업 실행"""
+    # 사용자 데이터 쓰기 지연 버퍼 주기적 플러시
+    application.bot_data['user_flush_task'] = asyncio.create_task(user_buffer.run_periodic_flush())
+    logger.info("💾 사용자 데이터 주기적 플러시 시작")
+    # 게임 리더보드 기간(일/주/시즌) 마감
+    application.bot_data['leaderboard_rollover_task'] = asyncio.create_task(leaderboard.run_periodic_rollover())
+    # 모델 한도/서킷 상태는 매 요청이 아니라 주기적으로 저장
+    application.bot_data['model_checkpoint_task'] = asyncio.create_task(model_guard.run_periodic_checkpoint())
+    # 일일 학습 (07:00/12:00 모스크바) - 팩은 전송 전에 미리 생성
+    scheduler = create_scheduler(application.bot)
+    scheduler.start()
+    application.bot_data['scheduler'] = scheduler
+    # 재시작 전에 중단된 일일 학습 전송은 남은 구독자에게만 이어서 전송
+    application.bot_data['broadcast_resume_task'] = asyncio.create_task(resume_daily_packs(application.bot))
+
+async def on_shutdown(application: Application) -> None:
+    """봇 종료 시 남은 데이터 저장"""
+    for task_name in ('user_flush_task', 'leaderboard_rollover_task', 'model_checkpoint_task', 'broadcast_resume_task'):
+        task = application.bot_data.pop(task_name, None)
+        if task:
+            task.cancel()
+    scheduler = application.bot_data.pop('scheduler', None)
+    if scheduler:
+        scheduler.shutdown(wait=False)
+    flushed = user_buffer.flush()
+    model_guard.checkpoint()
+    tts_pool.shutdown()
+    logger.info(f"💾 종료 전 사용자 데이터 플러시: {flushed}명")
+
 def main():
     """메인 실행 함수 - 강력한 충돌 방지"""
     
@@ -48,7 +85,14 @@ def main():
     import SimpleBot
     
     # 애플리케이션 생성
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(CONCURRENT_UPDATES)   # 같은 채팅은 채팅별 잠금으로 순서 보장
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # === 기본 명령어 핸들러들 ===
     application.add_handler(CommandHandler("start", SimpleBot.start_command))
@@ -90,6 +134,7 @@ def main():
     # === 구독 관련 핸들러들 ===
     application.add_handler(CommandHandler("subscribe_daily", SimpleBot.subscribe_daily_command))
     application.add_handler(CommandHandler("unsubscribe_daily", SimpleBot.unsubscribe_daily_command))
+    application.add_handler(CommandHandler("daily_time", SimpleBot.daily_time_command))
     
     # === 번역 관련 핸들러들 ===
     application.add_handler(CommandHandler("trs", SimpleBot.translate_simple_command))
@@ -107,6 +152,10 @@ def main():
     # === AI 대화 핸들러 (명령어가 아닌 일반 메시지) ===
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, SimpleBot.handle_message))
     
+    # === 업데이트당 사용자 1회 로드 / 1회 커밋 ===
+    wrapped = install_user_sessions(application)
+    logger.info(f"💾 사용자 세션 적용 핸들러: {wrapped}개")
+    
     logger.info("🤖 🌟 **지구 최고의 러시아어 학습 봇 '루샤(Rusya)' 업그레이드 완료!** 🌟")
     logger.info("🚀 모든 혁신적인 기능이 무제한으로 제공됩니다!")
     logger.info("━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from telegram import Bot
+from telegram.error import Forbidden, BadRequest, NetworkError, RetryAfter
+
+from config.settings import (
+    BROADCAST_GLOBAL_RATE, BROADCAST_PER_CHAT_RATE, BROADCAST_CONCURRENCY,
+    BROADCAST_MAX_RETRIES, BROADCAST_PROGRESS_INTERVAL
+)
+from services.model_guard import TokenBucket
+from utils.broadcast_jobs import BroadcastJobStore, broadcast_jobs
+
+logger = logging.getLogger(__name__)
+
+# 한도 적용 대상 (채팅에 메시지를 만드는 호출)
+RATE_LIMITED_METHODS = {
+    'send_message', 'send_audio', 'send_voice', 'send_photo', 'send_document',
+    'send_media_group', 'copy_message', 'forward_message'
+}
+
+
+class BroadcastRateLimiter:
+    """전체 초당 한도 + 채팅별 한도 토큰 버킷, RetryAfter를 받으면 전체 전송을 잠시 멈춤"""
+
+    def __init__(self, global_rate: float = BROADCAST_GLOBAL_RATE, per_chat_rate: float = BROADCAST_PER_CHAT_RATE):
+        self.per_chat_rate = per_chat_rate
+        self.global_bucket = TokenBucket(global_rate * 60, capacity=1)  # 몰아 보내지 않고 고르게 분산
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self.paused_until = 0.0
+
+    async def acquire(self, chat_id: Any) -> None:
+        """두 버킷 모두 토큰이 있을 때까지 대기 후 사용 (확인과 사용 사이에 await가 없어 경쟁 없음)"""
+        chat_bucket = self.chat_buckets.get(str(chat_id))
+        if chat_bucket is None:
+            chat_bucket = self.chat_buckets[str(chat_id)] = TokenBucket(self.per_chat_rate * 60, capacity=1)
+        while True:
+            wait = max(self.paused_until - time.monotonic(), self.global_bucket.wait_time(), chat_bucket.wait_time())
+            if wait <= 0:
+                self.global_bucket.consume()
+                chat_bucket.consume()
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def release_chat(self, chat_id: Any) -> None:
+        self.chat_buckets.pop(str(chat_id), None)
+
+
+class RateLimitedBot:
+    """Bot 대신 넘겨 주는 래퍼 - 전송 메서드만 한도/재시도를 거치고 나머지는 그대로"""
+
+    def __init__(self, bot: Bot, engine: 'BroadcastEngine'):
+        self._bot = bot
+        self._engine = engine
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._bot, name)
+        if name not in RATE_LIMITED_METHODS:
+            return attr
+
+        async def limited(*args: Any, **kwargs: Any) -> Any:
+            chat_id = kwargs.get('chat_id', args[0] if args else None)
+            return await self._engine.call(chat_id, attr, *args, **kwargs)
+        return limited
+
+
+class BroadcastEngine:
+    """여러 채팅에 동시에 전송 - 한도 안에서 채팅 단위로 병렬 처리하고 진행률/예상 종료 시간 기록"""
+
+    def __init__(self, concurrency: int = BROADCAST_CONCURRENCY, max_retries: int = BROADCAST_MAX_RETRIES,
+                 limiter: Optional[BroadcastRateLimiter] = None, jobs: BroadcastJobStore = broadcast_jobs):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.limiter = limiter or BroadcastRateLimiter()
+        self.jobs = jobs
+        self.progress: Dict[str, Dict[str, Any]] = {}  # 작업 이름별 진행 상황 (동시에 여러 버킷이 전송될 수 있음)
+        self._metrics = {
+            'messages': 0,
+            'retry_after': 0,
+            'retries': 0
+        }
+
+    async def call(self, target_chat: Any, method: Callable[..., Awaitable[Any]], /, *args: Any, **kwargs: Any) -> Any:
+        """한도 대기 후 호출, RetryAfter는 지정 시간만큼 전체를 멈췄다가 재시도"""
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(target_chat)
+            try:
+                result = await method(*args, **kwargs)
+                self._metrics['messages'] += 1
+                return result
+            except RetryAfter as e:
+                self._metrics['retry_after'] += 1
+                logger.warning(f"⏳ 전송 한도 초과 - {e.retry_after}초 대기 (채팅 {target_chat})")
+                self.limiter.pause(e.retry_after)
+                if attempt == self.max_retries:
+                    raise
+            except (Forbidden, BadRequest):
+                # 차단/삭제된 채팅 등은 재시도해도 소용없음
+                raise
+            except NetworkError:
+                if attempt == self.max_retries:
+                    raise
+                self._metrics['retries'] += 1
+                await asyncio.sleep(2 ** attempt)
+
+    async def run(self, name: str, recipients: Iterable[Any],
+                  deliver: Callable[[RateLimitedBot, Any], Awaitable[Any]], bot: Bot,
+                  kind: Optional[str] = None, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """recipients 각각에 deliver(한도 적용 bot, chat_id)를 동시에 실행하고 결과 요약 반환
+
+        kind를 주면 name을 작업 ID로 기록해 받는 사람별로 체크포인트 (중단되면 같은 name으로 다시 실행해 재개)
+        """
+        if kind is not None and self.jobs.is_active(name):
+            logger.warning(f"📣 이미 전송 중인 브로드캐스트라 건너뜀: {name}")
+            return dict(self.progress.get(name) or {'name': name})
+
+        done = failed = 0
+        if kind is not None:
+            job, recipients = self.jobs.start(name, kind, payload or {}, recipients)
+            total, done, failed = job['total'], job['done'], job['failed']
+        else:
+            recipients = list(recipients)
+            total = len(recipients)
+        limited_bot = RateLimitedBot(bot, self)
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_id in recipients:
+            queue.put_nowait(chat_id)
+
+        self._prune_progress()
+        progress = self.progress[name] = {
+            'name': name,
+            'total': total,
+            'done': done,
+            'failed': failed,
+            'started_at': time.time(),
+            'finished_at': None,
+            'eta_seconds': None
+        }
+        remaining = len(recipients)
+        logger.info(f"📣 브로드캐스트 시작: {name} - {remaining}/{total}명 (동시 {self.concurrency}개 채팅)")
+
+        async def worker() -> None:
+            while True:
+                try:
+                    chat_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                delivered = False
+                try:
+                    await deliver(limited_bot, chat_id)
+                    delivered = True
+                    progress['done'] += 1
+                except Exception as e:
+                    progress['failed'] += 1
+                    logger.error(f"브로드캐스트 전송 실패 - {name}, 사용자 {chat_id}: {e}")
+                finally:
+                    if kind is not None:
+                        self.jobs.checkpoint(name, chat_id, delivered)
+                    self.limiter.release_chat(chat_id)
+                    self._update_eta(progress, remaining, done + failed)
+
+        reporter = asyncio.create_task(self._report(progress))
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, remaining) or 1)))
+            if kind is not None:
+                self.jobs.finish(name)
+        finally:
+            reporter.cancel()
+            if kind is not None:
+                self.jobs.release(name)
+        progress['finished_at'] = time.time()
+        progress['eta_seconds'] = 0
+        elapsed = progress['finished_at'] - progress['started_at']
+        logger.info(f"📣 브로드캐스트 완료: {name} - 성공 {progress['done']} / 실패 {progress['failed']}, {elapsed:.0f}초")
+        return dict(progress)
+
+    @staticmethod
+    def _update_eta(progress: Dict[str, Any], remaining: int, already_finished: int = 0) -> None:
+        # 재개한 작업은 이번 실행에서 처리한 수로만 속도 계산
+        finished = progress['done'] + progress['failed'] - already_finished
+        elapsed = time.time() - progress['started_at']
+        if finished:
+            progress['eta_seconds'] = elapsed / finished * (remaining - finished)
+
+    @staticmethod
+    async def _report(progress: Dict[str, Any], interval: float = BROADCAST_PROGRESS_INTERVAL) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            finished = progress['done'] + progress['failed']
+            eta = progress['eta_seconds']
+            eta_text = f"{eta / 60:.1f}분" if eta is not None else "계산 중"
+            logger.info(f"📣 {progress['name']} 진행: {finished}/{progress['total']} (실패 {progress['failed']}), 남은 시간 약 {eta_text}")
+
+    def _prune_progress(self, keep_seconds: float = 86400) -> None:
+        """하루 넘게 지난 완료 작업의 진행 기록 삭제 (버킷마다 작업이 생기므로)"""
+        cutoff = time.time() - keep_seconds
+        for name, progress in list(self.progress.items()):
+            if progress['finished_at'] and progress['finished_at'] < cutoff:
+                del self.progress[name]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        # 진행 중인 작업 먼저, 그다음 최근에 시작한 순서
+        metrics['progress'] = sorted(
+            (dict(progress) for progress in self.progress.values()),
+            key=lambda progress: (progress['finished_at'] is not None, -progress['started_at'])
+        )
+        metrics['jobs'] = self.jobs.get_metrics()
+        return metrics
+
+
+# 전역 인스턴스 (모든 브로드캐스트가 같은 전송 한도를 공유)
+broadcast_engine = BroadcastEngine()
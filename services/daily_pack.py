@@ -0,0 +1,626 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
+
+import pytz
+from telegram import Bot
+
+from config.settings import (
+    MSK, DAILY_LEARNING_SLOTS, DAILY_PACK_DIR, DAILY_PACK_KEEP,
+    DAILY_DELIVERY_MODE, DAILY_ALBUM_SIZE, DELIVERY_DEFAULT_TZ
+)
+from services.broadcast_service import RateLimitedBot, broadcast_engine
+from services.tts_service import (
+    convert_text_to_speech, render_speech_track, send_speech, send_speech_album, send_speech_track, speech_key
+)
+from utils.broadcast_jobs import broadcast_jobs
+from utils.single_flight import SingleFlight
+from utils.subscriber_index import DEFAULT_TIMES, Bucket, parse_hhmm, subscriber_index
+from utils.seen_words import SeenWords, mark_words_seen
+from utils.vocabulary_index import vocabulary_index
+from utils.user_session import increment_user_record_stats
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+
+
+# --- 전송 시각 (슬롯) ---
+def slot_time(now: Optional[datetime] = None) -> datetime:
+    """now 기준 가장 최근 전송 시각 (오늘 첫 시각 전이면 전날 마지막 시각)"""
+    now = now or datetime.now(MSK)
+    for hour, minute in sorted(DAILY_LEARNING_SLOTS, reverse=True):
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= now:
+            return candidate
+    hour, minute = max(DAILY_LEARNING_SLOTS)
+    return (now - timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def next_slot_time(now: Optional[datetime] = None) -> datetime:
+    """now 이후 첫 전송 시각"""
+    now = now or datetime.now(MSK)
+    for hour, minute in sorted(DAILY_LEARNING_SLOTS):
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate > now:
+            return candidate
+    hour, minute = min(DAILY_LEARNING_SLOTS)
+    return (now + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+SLOT_FORMAT = '%Y-%m-%d_%H%M'
+
+
+def slot_id(when: datetime) -> str:
+    return when.strftime(SLOT_FORMAT)
+
+
+# --- 콘텐츠 선택 / 메시지 렌더링 ---
+def select_daily_content(seen: Optional[SeenWords] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """오늘의 단어 15개 + 회화 10개 무작위 선택 (seen이 있으면 이전 팩에 안 나온 단어부터, seen에 표시)"""
+    # 15개 단어와 10개 회화로 조정 (개별 음성 때문에)
+    words = seen.sample(15) if seen is not None else vocabulary_index.sample(15)
+    vocabulary = [entry.to_dict() for entry in words]
+
+    # 회화 문장은 기존 데이터베이스에서 로드
+    try:
+        with open('russian_learning_database.json', 'r', encoding='utf-8') as f:
+            old_database = json.load(f)
+        conversations = random.sample(old_database['conversations'], min(10, len(old_database['conversations'])))
+    except FileNotFoundError:
+        # 기존 파일이 없으면 단어로 대체
+        conversations = [entry.to_dict() for entry in vocabulary_index.sample(10)]
+
+    return {'vocabulary': vocabulary, 'conversations': conversations}
+
+
+def _audio_message(text: str, **kwargs: Any) -> Dict[str, Any]:
+    return {'kind': 'audio', 'text': text, 'lang': 'ru', 'audio_key': speech_key(text, 'ru'),
+            'performer': "루샤 봇", **kwargs}
+
+
+def _conversation_category(i: int) -> str:
+    """회화 번호별 카테고리"""
+    if i <= 3:
+        return "🏠 일상 대화"
+    elif i <= 6:
+        return "🛍️ 쇼핑 & 서비스"
+    elif i <= 8:
+        return "🚇 교통 & 여행"
+    return "💼 비즈니스 & 격식"
+
+
+def render_daily_messages(vocabulary: List[Dict[str, Any]], conversations: List[Dict[str, Any]],
+                          current_date: datetime, mode: str = DAILY_DELIVERY_MODE) -> List[Dict[str, Any]]:
+    """전송 방식에 맞는 메시지 순서 ('album'/'track'은 음성을 묶어 구독자당 호출 수를 줄임)"""
+    if mode in ('album', 'track'):
+        return render_compact_messages(vocabulary, conversations, current_date, mode)
+    return render_full_messages(vocabulary, conversations, current_date)
+
+
+def render_full_messages(vocabulary: List[Dict[str, Any]], conversations: List[Dict[str, Any]],
+                         current_date: datetime) -> List[Dict[str, Any]]:
+    """구독자 한 명에게 보낼 메시지 순서 (모든 구독자가 같은 내용을 받으므로 슬롯마다 한 번만 렌더링)"""
+    date_str = current_date.strftime('%Y년 %m월 %d일')
+    weekday = WEEKDAYS[current_date.weekday()]
+    messages: List[Dict[str, Any]] = []
+
+    # 🎨 새로운 헤더 메시지 (인라인 키보드 없음)
+    header = f"""
+🌟 **러시아어 마스터 일일 학습** 🌟
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+📅 **{date_str} ({weekday}요일)**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+✨ **오늘도 함께 러시아어 정복하러 가요!** ✨
+
+🎯 **학습 목표**: 단어 15개 + 회화 10개 마스터
+🚀 **예상 학습 시간**: 15-20분
+🏆 **완료 시 보상**: +50 EXP + 성취 배지!
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+📱 **학습 옵션**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+`/1` - 🎮 게임으로 학습하기
+`/2` - 📊 학습 진도 확인하기  
+`/3` - 🏆 성취 배지 보기
+`/4` - 🤖 AI 튜터 분석받기
+
+💡 **팁**: 각 단어와 회화마다 개별 음성이 전송됩니다!
+    """
+    
+    messages.append({'kind': 'text', 'text': header})
+    
+    # 📚 단어 섹션 - 개별 음성과 함께
+    words_header = """
+📚 **오늘의 핵심 단어 컬렉션** (15개) 📚
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+🎯 **학습법**: 음성을 들으며 3번씩 따라 읽어보세요!
+━━━━━━━━━━━━━━━━━━━━━━━━
+    """
+    
+    messages.append({'kind': 'text', 'text': words_header})
+    
+    # 각 단어마다 개별 처리
+    for i, word in enumerate(vocabulary, 1):
+        # 단어 정보 메시지
+        word_message = f"""
+{i}️⃣ **{word['russian']}** `[{word['pronunciation']}]`
+💡 **뜻**: {word['korean']}
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+        """
+        
+        messages.append({'kind': 'text', 'text': word_message})
+        
+        # 개별 음성 (같은 단어는 모든 구독자에게 한 번만 업로드하고 이후엔 file_id로 전송)
+        messages.append(_audio_message(
+            word['russian'],
+            filename=f"word_{i}_{word['russian']}.mp3",
+            title=f"🎵 {word['russian']} 발음",
+            caption=f"🔊 **{word['russian']}** 발음\n💡 따라 읽어보세요: `{word['pronunciation']}`"
+        ))
+        
+    # 단어 섹션 완료 메시지
+    words_complete = """
+✅ **단어 학습 완료!** 📚
+
+🎉 15개 단어와 발음을 모두 익혔습니다!
+이제 실전 회화로 넘어가볼까요? 💬
+    """
+    messages.append({'kind': 'text', 'text': words_complete})
+    
+    # 💬 회화 섹션 - 개별 음성과 함께
+    conversations_header = """
+💬 **실전 회화 마스터 클래스** (10개) 💬
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+🎭 **연습법**: 음성을 들으며 상황을 상상해보세요!
+━━━━━━━━━━━━━━━━━━━━━━━━
+    """
+    
+    messages.append({'kind': 'text', 'text': conversations_header})
+    
+    # 각 회화마다 개별 처리
+    for i, conv in enumerate(conversations, 1):
+        # 회화 카테고리 결정
+        category = _conversation_category(i)
+        
+        # 회화 정보 메시지
+        conv_message = f"""
+{i}️⃣ **{category}**
+
+🗣️ **{conv['russian']}**
+🔤 `[{conv['pronunciation']}]`
+🇰🇷 **{conv['korean']}**
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+        """
+        
+        messages.append({'kind': 'text', 'text': conv_message})
+        
+        # 개별 음성
+        messages.append(_audio_message(
+            conv['russian'],
+            filename=f"conversation_{i}_{current_date.strftime('%Y%m%d')}.mp3",
+            title=f"🎭 회화 {i}번 발음",
+            caption=f"🗣️ **{category}**\n💬 {conv['korean']}\n\n🎯 상황을 상상하며 따라 해보세요!"
+        ))
+        
+    # 🏆 최종 완료 메시지
+    completion_message = """
+🎉 **오늘의 학습 완료!** 🎉
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+✅ **완벽한 성과!**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+📚 **새로운 단어**: 15개 + 개별 발음 ✓
+💬 **실전 회화**: 10개 + 개별 발음 ✓  
+🎵 **음성 연습**: 25개 파일 완료 ✓
+⭐ **획득 경험치**: +50 EXP 
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+🚀 **다음 단계 추천**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+`/1` - 🎮 오늘 배운 단어로 게임하기
+`/2` - ✍️ 새로운 문장 만들어보기
+`/3` - 🏆 학습 진도 확인하기
+`/4` - 🎯 AI 튜터 개인 분석받기
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+💡 **오늘의 격려**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+꾸준함이 실력을 만듭니다! 매일 조금씩이라도
+러시아어와 친해지는 당신이 정말 대단해요! 🌟
+
+각 단어와 회화의 개별 발음을 들으며
+더 정확한 발음을 익힐 수 있었을 거예요! 
+
+🔥 **내일도 함께 러시아어 마스터하러 가요!** 🔥
+    """
+    
+    messages.append({'kind': 'text', 'text': completion_message})
+
+    return messages
+
+
+def _album_chunks(items: List[Dict[str, Any]], size: int = DAILY_ALBUM_SIZE) -> List[List[Dict[str, Any]]]:
+    """앨범 크기 이하로 고르게 나누기 (15개 → 8 + 7, 1개짜리 앨범이 생기지 않도록)"""
+    count = -(-len(items) // size)
+    return [items[i * len(items) // count:(i + 1) * len(items) // count] for i in range(count)]
+
+
+def _audio_group(mode: str, items: List[Dict[str, Any]], **track: Any) -> List[Dict[str, Any]]:
+    """음성 묶음 메시지 - 앨범 여러 개 또는 한 트랙 (트랙 캡션 목차는 팩을 만들 때 채움)"""
+    if mode == 'track':
+        return [{'kind': 'track', 'texts': [item['text'] for item in items], 'lang': 'ru',
+                 'labels': [item['label'] for item in items], 'performer': "루샤 봇", **track}]
+    return [{'kind': 'album', 'items': chunk} for chunk in _album_chunks(items)]
+
+
+def render_compact_messages(vocabulary: List[Dict[str, Any]], conversations: List[Dict[str, Any]],
+                            current_date: datetime, mode: str) -> List[Dict[str, Any]]:
+    """묶음 전송용 메시지 - 단어/회화는 목록 메시지 하나 + 음성 앨범(또는 트랙) 하나씩"""
+    date_str = current_date.strftime('%Y년 %m월 %d일')
+    weekday = WEEKDAYS[current_date.weekday()]
+    audio_tip = "단어와 회화 음성은 앨범으로 모아서" if mode == 'album' else "단어와 회화 음성은 각각 한 트랙으로 (캡션의 시간을 눌러 이동)"
+    messages: List[Dict[str, Any]] = []
+
+    header = f"""
+🌟 **러시아어 마스터 일일 학습** 🌟
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+📅 **{date_str} ({weekday}요일)**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+✨ **오늘도 함께 러시아어 정복하러 가요!** ✨
+
+🎯 **학습 목표**: 단어 {len(vocabulary)}개 + 회화 {len(conversations)}개 마스터
+🚀 **예상 학습 시간**: 15-20분
+🏆 **완료 시 보상**: +50 EXP + 성취 배지!
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+📱 **학습 옵션**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+`/1` - 🎮 게임으로 학습하기
+`/2` - 📊 학습 진도 확인하기  
+`/3` - 🏆 성취 배지 보기
+`/4` - 🤖 AI 튜터 분석받기
+
+💡 **팁**: {audio_tip} 전송됩니다!
+    """
+    messages.append({'kind': 'text', 'text': header})
+
+    # 📚 단어 - 목록 한 번 + 음성 묶음
+    words = "\n".join(
+        f"{i}️⃣ **{word['russian']}** `[{word['pronunciation']}]` - {word['korean']}"
+        for i, word in enumerate(vocabulary, 1)
+    )
+    messages.append({'kind': 'text', 'text': f"""
+📚 **오늘의 핵심 단어 컬렉션** ({len(vocabulary)}개) 📚
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+🎯 **학습법**: 음성을 들으며 3번씩 따라 읽어보세요!
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+{words}
+    """})
+    messages.extend(_audio_group(mode, [
+        {'text': word['russian'], 'lang': 'ru', 'label': f"{word['russian']} - {word['korean']}",
+         'filename': f"word_{i}_{word['russian']}.mp3", 'title': f"🎵 {word['russian']} 발음",
+         'performer': "루샤 봇", 'caption': f"🔊 {word['russian']} [{word['pronunciation']}] - {word['korean']}"}
+        for i, word in enumerate(vocabulary, 1)
+    ], filename=f"words_{current_date.strftime('%Y%m%d')}.mp3", title="📚 오늘의 단어 발음",
+        caption_header="📚 오늘의 단어 발음 (시간을 눌러 이동)"))
+
+    # 💬 회화 - 목록 한 번 + 음성 묶음
+    lines = "\n\n".join(
+        f"{i}️⃣ **{_conversation_category(i)}**\n🗣️ **{conv['russian']}**\n🔤 `[{conv['pronunciation']}]`\n🇰🇷 **{conv['korean']}**"
+        for i, conv in enumerate(conversations, 1)
+    )
+    messages.append({'kind': 'text', 'text': f"""
+💬 **실전 회화 마스터 클래스** ({len(conversations)}개) 💬
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+🎭 **연습법**: 음성을 들으며 상황을 상상해보세요!
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+{lines}
+    """})
+    messages.extend(_audio_group(mode, [
+        {'text': conv['russian'], 'lang': 'ru', 'label': conv['korean'],
+         'filename': f"conversation_{i}_{current_date.strftime('%Y%m%d')}.mp3", 'title': f"🎭 회화 {i}번 발음",
+         'performer': "루샤 봇", 'caption': f"🗣️ {_conversation_category(i)}\n💬 {conv['korean']}"}
+        for i, conv in enumerate(conversations, 1)
+    ], filename=f"conversations_{current_date.strftime('%Y%m%d')}.mp3", title="💬 오늘의 회화 발음",
+        caption_header="💬 오늘의 회화 발음 (시간을 눌러 이동)"))
+
+    completion_message = f"""
+🎉 **오늘의 학습 완료!** 🎉
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+✅ **완벽한 성과!**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+📚 **새로운 단어**: {len(vocabulary)}개 + 발음 ✓
+💬 **실전 회화**: {len(conversations)}개 + 발음 ✓
+⭐ **획득 경험치**: +50 EXP 
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+🚀 **다음 단계 추천**
+━━━━━━━━━━━━━━━━━━━━━━━━
+
+`/1` - 🎮 오늘 배운 단어로 게임하기
+`/2` - ✍️ 새로운 문장 만들어보기
+`/3` - 🏆 학습 진도 확인하기
+`/4` - 🎯 AI 튜터 개인 분석받기
+
+🔥 **내일도 함께 러시아어 마스터하러 가요!** 🔥
+    """
+    messages.append({'kind': 'text', 'text': completion_message})
+
+    return messages
+
+
+def format_track_caption(header: str, labels: List[str], offsets: List[float]) -> str:
+    """트랙 캡션 목차 (m:ss 제목) - Telegram 캡션 한도 1024자 안에서 자름"""
+    caption = header
+    for label, offset in zip(labels, offsets):
+        line = f"\n{int(offset) // 60}:{int(offset) % 60:02d} {label}"
+        if len(caption) + len(line) > 1024:
+            break
+        caption += line
+    return caption
+
+
+class DailyPackStore:
+    """슬롯별 일일 학습 팩 - 메시지 텍스트, 음성 키, 선택 내용을 디스크에 저장해 재시작 후에도 재사용"""
+
+    def __init__(self, directory: str = DAILY_PACK_DIR, keep: int = DAILY_PACK_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self._packs: Dict[str, Dict[str, Any]] = {}
+        self._flight = SingleFlight()  # 같은 슬롯을 동시에 두 번 만들지 않음
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, slot: str) -> str:
+        return os.path.join(self.directory, f"daily_pack_{slot}.json")
+
+    def _load(self, slot: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(slot), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"일일 학습 팩 로드 오류 ({slot}): {e}")
+            return None
+
+    def _save(self, pack: Dict[str, Any]) -> None:
+        # 임시 파일에 쓴 뒤 교체 (중간에 죽어도 깨진 팩이 남지 않음)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(pack, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._path(pack['slot']))
+        self._prune()
+
+    def _prune(self) -> None:
+        files = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith('daily_pack_') and name.endswith('.json'))
+        for name in files[:-self.keep]:
+            os.remove(os.path.join(self.directory, name))
+            self._packs.pop(name[len('daily_pack_'):-len('.json')], None)
+
+    def _previous_seen(self, slot: str) -> SeenWords:
+        """이 슬롯 이전 팩까지 나온 단어 (팩마다 누적 비트맵을 함께 저장)"""
+        slots = sorted(
+            name[len('daily_pack_'):-len('.json')] for name in os.listdir(self.directory)
+            if name.startswith('daily_pack_') and name.endswith('.json')
+        )
+        for previous in reversed([previous for previous in slots if previous < slot]):
+            pack = self._packs.get(previous) or self._load(previous)
+            if pack is not None:
+                return SeenWords.from_value(pack.get('seen_words'))
+        return SeenWords()
+
+    async def _build(self, slot: str, when: datetime) -> Dict[str, Any]:
+        # 단어장을 한 바퀴 돌 때까지 이전 팩에 나온 단어는 다시 고르지 않음
+        seen = self._previous_seen(slot)
+        selection = select_daily_content(seen)
+        messages = render_daily_messages(selection['vocabulary'], selection['conversations'], when)
+        # 음성은 미리 합성해 캐시에 넣어 둠 (전송 중에는 캐시/file_id만 사용)
+        audio = [message for message in messages if message['kind'] == 'audio']
+        audio += [item for message in messages if message['kind'] == 'album' for item in message['items']]
+        results = await asyncio.gather(*(convert_text_to_speech(m['text'], m['lang']) for m in audio))
+        missing = sum(1 for result in results if not result)
+        # 트랙은 이어 붙인 음성을 캐시에 넣고 문장별 시작 시각으로 캡션 목차 작성
+        for message in messages:
+            if message['kind'] == 'track':
+                _, offsets = await render_speech_track(message['texts'], message['lang'])
+                message['caption'] = format_track_caption(message.pop('caption_header'), message['labels'], offsets)
+        pack = {
+            'slot': slot,
+            'created_at': datetime.now(MSK).isoformat(),
+            'selection': selection,
+            'seen_words': seen.to_value(),
+            'messages': messages
+        }
+        self._save(pack)
+        logger.info(f"📦 일일 학습 팩 생성: {slot} - 메시지 {len(messages)}개, 음성 {len(audio) - missing}/{len(audio)}개 준비")
+        return pack
+
+    def saved(self, slot: str) -> Optional[Dict[str, Any]]:
+        """이미 만든 슬롯 팩 (메모리 → 디스크, 없으면 None - 새로 만들지 않음)"""
+        pack = self._packs.get(slot) or self._load(slot)
+        if pack is not None:
+            self._packs[slot] = pack
+        return pack
+
+    async def get(self, when: Optional[datetime] = None) -> Dict[str, Any]:
+        """슬롯 팩 (메모리 → 디스크 → 새로 생성 순서)"""
+        when = when or slot_time()
+        slot = slot_id(when)
+        pack = self.saved(slot)
+        if pack is None:
+            pack = await self._flight.do(slot, lambda: self._build(slot, when))
+            self._packs[slot] = pack
+        return pack
+
+    async def prepare_next(self) -> None:
+        """다음 전송 시각의 팩을 미리 생성 (전송 전 스케줄 작업)"""
+        await self.get(next_slot_time())
+
+
+async def deliver_daily_pack(bot: Bot, user_id: Any, pack: Dict[str, Any]) -> None:
+    """한 사용자에게 팩 전송 (bot은 전송 한도가 적용된 래퍼라 고정 지연 없이 보냄)"""
+    for message in pack['messages']:
+        if message['kind'] == 'text':
+            await bot.send_message(chat_id=user_id, text=message['text'])
+            continue
+        try:
+            if message['kind'] == 'album':
+                if len(message['items']) > 1:
+                    await send_speech_album(partial(bot.send_media_group, chat_id=user_id), message['items'])
+                    continue
+                # 앨범은 2개 이상만 가능 - 하나면 개별 음성으로
+                message = {**message['items'][0], 'kind': 'audio'}
+            if message['kind'] == 'track':
+                await send_speech_track(
+                    partial(bot.send_audio, chat_id=user_id), message['texts'], message['lang'],
+                    filename=message['filename'],
+                    title=message['title'],
+                    performer=message['performer'],
+                    caption=message['caption']
+                )
+                continue
+            await send_speech(
+                partial(bot.send_audio, chat_id=user_id), message['text'], message['lang'],
+                filename=message['filename'],
+                title=message['title'],
+                performer=message['performer'],
+                caption=message['caption']
+            )
+        except Exception as e:
+            logger.error(f"일일 학습 음성 전송 실패: {message.get('text') or message.get('title')} - 사용자: {user_id}: {e}")
+
+    # 사용자 데이터 업데이트 (일일 학습 완료 보상)
+    increment_user_record_stats(str(user_id), {'daily_words_received': 1, 'total_exp': 50})
+    # 받은 단어는 게임/퀴즈에서 안 본 단어를 고를 때 제외
+    mark_words_seen(str(user_id), [word['russian'] for word in pack['selection']['vocabulary']])
+    logger.info(f"일일 학습 전송 완료 - 사용자: {user_id}")
+
+
+async def _broadcast_pack(bot: Bot, pack: Dict[str, Any], bucket: Optional[Bucket] = None) -> Dict[str, Any]:
+    name = f"daily_learning {pack['slot']}"
+    recipients: Iterable[str] = subscriber_index
+    if bucket is not None:
+        tz, minute, edition = bucket
+        name += f" {tz} {minute // 60:02d}:{minute % 60:02d}"
+        recipients = subscriber_index.bucket_members(bucket)
+    return await broadcast_engine.run(
+        name, recipients,
+        lambda limited_bot, user_id: deliver_daily_pack(limited_bot, user_id, pack), bot,
+        kind='daily_learning', payload={'slot': pack['slot'], 'bucket': list(bucket) if bucket else None}
+    )
+
+
+async def send_daily_pack(bot: Bot, when: Optional[datetime] = None,
+                          bucket: Optional[Bucket] = None) -> Dict[str, Any]:
+    """슬롯 팩을 구독자에게 전송 (bucket이 있으면 그 전송 시각의 구독자만, 중단된 전송은 남은 사람만)"""
+    return await _broadcast_pack(bot, await daily_packs.get(when), bucket)
+
+
+def bucket_slot_time(bucket: Bucket, now: Optional[datetime] = None) -> datetime:
+    """버킷 사용자의 현지 날짜 기준 회차 팩 시각 (같은 날짜/회차면 시간대가 달라도 같은 팩)"""
+    tz, _, edition = bucket
+    local_date = (now or datetime.now(pytz.timezone(tz))).date()
+    hour, minute = sorted(DAILY_LEARNING_SLOTS)[edition]
+    return MSK.localize(datetime(local_date.year, local_date.month, local_date.day, hour, minute))
+
+
+async def send_daily_bucket(bot: Bot, bucket: Bucket) -> Dict[str, Any]:
+    """전송 시각 버킷 하나 전송 (스케줄러가 비어 있지 않은 버킷마다 호출)"""
+    return await send_daily_pack(bot, bucket_slot_time(bucket), bucket)
+
+
+def user_slot_time(user_id: str, now: Optional[datetime] = None) -> datetime:
+    """사용자의 시간대/전송 시각 기준 가장 최근 회차 팩 시각 (구독하지 않았으면 기본 시각)"""
+    tz, times = subscriber_index.settings(user_id) or (DELIVERY_DEFAULT_TZ, DEFAULT_TIMES)
+    now = now or datetime.now(pytz.timezone(tz))
+    starts = sorted(parse_hhmm(time_text) for time_text in times)
+    current = now.hour * 60 + now.minute
+    started = [edition for edition, start in enumerate(starts) if start <= current]
+    local_date = now.date()
+    if started:
+        edition = started[-1]
+    else:
+        # 오늘 첫 시각 전이면 전날 마지막 회차
+        edition = len(starts) - 1
+        local_date -= timedelta(days=1)
+    hour, minute = sorted(DAILY_LEARNING_SLOTS)[edition]
+    return MSK.localize(datetime(local_date.year, local_date.month, local_date.day, hour, minute))
+
+
+async def send_daily_now(bot: Bot, chat_id: Any) -> None:
+    """요청한 사용자 한 명에게만 지금 회차 팩 전송 (작업 기록 없음 - 정기 전송과 겹치지 않음)"""
+    pack = await daily_packs.get(user_slot_time(str(chat_id)))
+    # 정기 전송과 같은 전송 한도를 공유
+    await deliver_daily_pack(RateLimitedBot(bot, broadcast_engine), chat_id, pack)
+
+
+def resume_deadline(job: Dict[str, Any]) -> datetime:
+    """중단된 전송을 이어 보낼 수 있는 시각 - 작업을 시작한 뒤 같은 작업의 다음 전송 시각까지
+
+    버킷 작업은 그 버킷의 현지 전송 시각(다음날 같은 시각)까지, 버킷 없는 작업은 다음 모스크바 회차까지
+    """
+    bucket = job['payload'].get('bucket')
+    if not bucket:
+        return next_slot_time(datetime.fromtimestamp(job['created_at'], MSK))
+    tz, minute, _ = bucket
+    started = datetime.fromtimestamp(job['created_at'], pytz.timezone(tz))
+    deadline = started.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+    if deadline <= started:
+        deadline += timedelta(days=1)
+    return deadline
+
+
+async def resume_daily_packs(bot: Bot) -> None:
+    """재시작 전에 끝나지 않은 일일 학습 전송 이어서 보내기 (봇 시작 시 실행)
+
+    다음 전송 시각이 지난 작업은 이어 보내지 않고 포기로 표시 (지난 회차가 새 회차 뒤에 도착하지 않도록),
+    팩은 저장된 것만 사용 - 정리되어 없으면 새로 만들지 않고 포기 (다른 내용을 남은 사람에게만 보내지 않도록)
+    """
+    now = datetime.now(MSK)
+    for job in broadcast_jobs.unfinished('daily_learning'):
+        slot = job['payload']['slot']
+        if now >= resume_deadline(job):
+            logger.warning(f"⏭️ 오래된 일일 학습 전송은 재개하지 않음: {job['job_id']} (남은 {job['total'] - job['done'] - job['failed']}명)")
+            broadcast_jobs.abandon(job['job_id'])
+            continue
+        pack = daily_packs.saved(slot)
+        if pack is None:
+            logger.warning(f"⏭️ 일일 학습 팩이 없어 전송을 재개하지 않음: {job['job_id']}")
+            broadcast_jobs.abandon(job['job_id'])
+            continue
+        bucket = job['payload'].get('bucket')
+        try:
+            await _broadcast_pack(bot, pack, tuple(bucket) if bucket else None)
+        except Exception as e:
+            logger.error(f"일일 학습 전송 재개 오류 ({job['job_id']}): {e}")
+
+
+# 전역 인스턴스
+daily_packs = DailyPackStore()
@@ -1,55 +1,26 @@
 import asyncio
 import logging
-import json
-import os
-from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 import google.generativeai as genai
 import pytz
 from functools import lru_cache
-from cachetools import TTLCache
 
 from config.settings import GEMINI_API_KEY, MODEL_CONFIG
+from utils.response_cache import gemini_cache, make_cache_key
+from utils.single_flight import gemini_flight
+from services.model_guard import model_guard
 
 logger = logging.getLogger(__name__)
 
-# 응답 캐시 (동일한 프롬프트에 대한 반복 요청 방지)
-response_cache = TTLCache(maxsize=500, ttl=1800)  # 30분 캐시
-
 class GeminiService:
     """향상된 Gemini AI 서비스"""
     
     def __init__(self):
-        self.model_status = self._load_model_status()
+        # 모델 상태는 model_guard와 공유 (한도/서킷 브레이커 포함, 주기적으로 저장)
+        self.model_status = model_guard.status
         self.current_model = None
         self._configure_api()
     
-    def _load_model_status(self) -> Dict[str, Any]:
-        """모델 상태 로드"""
-        try:
-            if os.path.exists('model_status.json'):
-                with open('model_status.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception:
-            pass
-        
-        return {
-            'current_index': 0,
-            'quota_exceeded_time': None,
-            'last_primary_attempt': None,
-            'failure_count': 0,
-            'daily_requests': 0,
-            'last_reset_date': datetime.now().date().isoformat()
-        }
-    
-    def _save_model_status(self) -> None:
-        """모델 상태 저장"""
-        try:
-            with open('model_status.json', 'w', encoding='utf-8') as f:
-                json.dump(self.model_status, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"모델 상태 저장 오류: {e}")
-    
     def _configure_api(self) -> None:
         """API 설정"""
         genai.configure(api_key=GEMINI_API_KEY)
@@ -71,44 +42,24 @@ class GeminiService:
             }
         )
     
-    def _reset_daily_limits(self) -> None:
-        """일일 제한 리셋"""
-        today = datetime.now().date().isoformat()
-        if self.model_status['last_reset_date'] != today:
-            self.model_status['daily_requests'] = 0
-            self.model_status['last_reset_date'] = today
-            self._save_model_status()
-    
-    def _should_fallback_to_primary(self) -> bool:
-        """기본 모델로 복귀할지 확인"""
-        if self.model_status['current_index'] == 0:
-            return False
-        
-        # 할당량 초과 후 24시간 경과 시 복귀 시도
-        if self.model_status.get('quota_exceeded_time'):
-            exceeded_time = datetime.fromisoformat(self.model_status['quota_exceeded_time'])
-            if datetime.now() - exceeded_time > timedelta(hours=24):
-                return True
-        
-        return False
-    
-    async def generate_content(self, prompt: str, use_cache: bool = True) -> str:
+    async def generate_content(self, prompt: str, use_cache: bool = True, task: str = 'default') -> str:
         """AI 콘텐츠 생성 (향상된 버전)"""
-        # 캐시 확인
-        if use_cache and prompt in response_cache:
-            logger.info("캐시된 응답 사용")
-            return response_cache[prompt]
+        # 캐시 확인 (메모리 → 디스크)
+        if use_cache:
+            cached = gemini_cache.get(task, prompt)
+            if cached is not None:
+                logger.info("캐시된 응답 사용")
+                return cached
         
-        self._reset_daily_limits()
-        
-        # 기본 모델 복귀 체크
-        if self._should_fallback_to_primary():
-            self.model_status['current_index'] = 0
-            self.model_status['failure_count'] = 0
-            self._save_model_status()
-        
-        # 모델별로 시도
-        for idx in range(self.model_status['current_index'], len(MODEL_CONFIG)):
+        # 동시에 들어온 같은 프롬프트는 한 번만 호출
+        return await gemini_flight.do(
+            make_cache_key(task, prompt),
+            lambda: self._generate_uncached(prompt, use_cache, task)
+        )
+    
+    async def _generate_uncached(self, prompt: str, use_cache: bool, task: str) -> str:
+        """모델 호출 (한도/서킷이 허용하는 모델만 기본 모델부터 차례로, 분당 한도에만 막혔으면 잠깐 기다림)"""
+        async for idx in model_guard.acquire():
             try:
                 model = self._get_model(idx)
                 
@@ -118,51 +69,23 @@ class GeminiService:
                 )
                 
                 if response and response.text:
-                    # 성공 시 통계 업데이트
-                    self.model_status['daily_requests'] += 1
-                    if idx != 0:
-                        # 폴백 모델 성공 시 다음에 기본 모델 시도
-                        self.model_status['current_index'] = 0
-                        self.model_status['failure_count'] = 0
-                    
-                    self._save_model_status()
+                    model_guard.record_success(idx)
                     
                     # 캐시 저장
                     if use_cache:
-                        response_cache[prompt] = response.text
+                        gemini_cache.put(task, prompt, response.text)
                     
-                    logger.info(f"✅ {MODEL_CONFIG[idx]['display_name']} 사용 성공")
                     return response.text
+                model_guard.record_failure(idx, ValueError("빈 응답"))
                 
+            except asyncio.CancelledError:
+                model_guard.release(idx)
+                raise
             except Exception as e:
-                error_str = str(e).lower()
-                logger.error(f"❌ {MODEL_CONFIG[idx]['display_name']} 에러: {e}")
-                
-                # 할당량/429/404 에러 시 다음 모델로
-                if any(keyword in error_str for keyword in 
-                       ['quota', '429', 'rate limit', 'resource_exhausted', 'not found', '404']):
-                    self.model_status['current_index'] = idx + 1
-                    self.model_status['quota_exceeded_time'] = datetime.now().isoformat()
-                    self.model_status['failure_count'] = 0
-                    self._save_model_status()
-                    continue
-                
-                # 기타 에러의 경우 재시도 카운트 증가
-                self.model_status['failure_count'] += 1
-                self._save_model_status()
-                
-                if self.model_status['failure_count'] >= 3 and idx < len(MODEL_CONFIG) - 1:
-                    self.model_status['current_index'] = idx + 1
-                    self.model_status['failure_count'] = 0
-                    self._save_model_status()
-                    continue
-                
-                # 재시도 로직
-                if self.model_status['failure_count'] < 3:
-                    await asyncio.sleep(2 ** self.model_status['failure_count'])  # 지수 백오프
-                    continue
+                # 할당량/404 오류는 해당 모델 서킷을 바로 열고 다음 모델로
+                model_guard.record_failure(idx, e)
         
-        # 모든 모델 실패
+        # 모든 모델 실패 또는 한도 초과
         return self._get_fallback_response()
     
     def _get_fallback_response(self) -> str:
@@ -184,7 +107,7 @@ class GeminiService:
         else:
             prompt = f"다음 텍스트를 {target_language}로 자연스럽게 번역해주세요: {text}"
         
-        return await self.generate_content(prompt)
+        return await self.generate_content(prompt, task='translate')
     
     async def correct_writing(self, text: str, language: str = "러시아어") -> str:
         """작문 교정 서비스"""
@@ -200,7 +123,7 @@ class GeminiService:
 💡 **설명**: 구체적인 교정 이유
 🎯 **팁**: 학습에 도움되는 조언
 """
-        return await self.generate_content(prompt)
+        return await self.generate_content(prompt, task='correct')
     
     async def generate_quiz_question(self, category: str, difficulty: str = "medium") -> str:
         """퀴즈 질문 생성"""
@@ -216,7 +139,7 @@ D) 선택지 4
 
 ✅ **정답**: 정답과 상세한 설명
 """
-        return await self.generate_content(prompt)
+        return await self.generate_content(prompt, task='quiz')
     
     async def chat_response(self, message: str, context: Optional[str] = None) -> str:
         """자연스러운 대화 응답"""
@@ -225,7 +148,7 @@ D) 선택지 4
         else:
             prompt = f"사용자 메시지: {message}\n\n친근하고 도움이 되는 응답을 해주세요."
         
-        return await self.generate_content(prompt, use_cache=False)
+        return await self.generate_content(prompt, use_cache=False, task='chat')
     
     def get_status(self) -> Dict[str, Any]:
         """서비스 상태 정보"""
@@ -236,7 +159,10 @@ D) 선택지 4
             'daily_requests': self.model_status['daily_requests'],
             'is_primary': self.model_status['current_index'] == 0,
             'failure_count': self.model_status['failure_count'],
-            'cache_size': len(response_cache),
+            'cache_size': len(gemini_cache),
+            'cache': gemini_cache.get_metrics(),
+            'single_flight': gemini_flight.get_metrics(),
+            'models': model_guard.get_model_states(),
             'last_reset': self.model_status['last_reset_date']
         }
 
@@ -0,0 +1,310 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+
+import pytz
+
+from config.settings import (
+    MODEL_CONFIG, MODEL_STATUS_FILE, MODEL_CIRCUIT_FAILURE_THRESHOLD, MODEL_CIRCUIT_OPEN_SECONDS,
+    MODEL_CIRCUIT_MAX_OPEN_SECONDS, MODEL_CIRCUIT_PROBE_TIMEOUT, MODEL_RPM_MAX_WAIT, MODEL_STATUS_CHECKPOINT_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Gemini 일일 할당량은 태평양 시간 0시에 초기화
+QUOTA_TIMEZONE = pytz.timezone('America/Los_Angeles')
+
+QUOTA_ERROR_KEYWORDS = ['quota', '429', 'rate limit', 'resource_exhausted']
+NOT_FOUND_KEYWORDS = ['not found', '404']
+
+
+def _quota_day() -> str:
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+
+class TokenBucket:
+    """분당 요청 수(RPM) 제한용 토큰 버킷"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.capacity = capacity or rate_per_minute
+        self.refill_per_second = rate_per_minute / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def available(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def consume(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def wait_time(self) -> float:
+        """다음 토큰까지 남은 시간 (초)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.refill_per_second
+
+
+class CircuitBreaker:
+    """연속 실패 시 모델 호출을 잠시 차단하고, 시간이 지나면 한 번씩 시험 호출 (half-open)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = MODEL_CIRCUIT_FAILURE_THRESHOLD,
+                 open_seconds: float = MODEL_CIRCUIT_OPEN_SECONDS,
+                 max_open_seconds: float = MODEL_CIRCUIT_MAX_OPEN_SECONDS,
+                 probe_timeout: float = MODEL_CIRCUIT_PROBE_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_seconds = open_seconds
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+
+    def wait_time(self) -> float:
+        """allow()가 참이 될 때까지 남은 시간 (초, 상태는 바꾸지 않음)"""
+        now = time.time()
+        if self.state == self.OPEN:
+            return max(0.0, self.opened_at + self.open_seconds - now)
+        if self.state == self.HALF_OPEN and self.probe_in_flight:
+            return max(0.0, self.probe_started + self.probe_timeout - now)
+        return 0.0
+
+    def allow(self) -> bool:
+        """지금 호출해도 되는지 (half-open이면 시험 호출 하나만 허용)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.wait_time() > 0:
+            return False
+        # 차단 시간이 끝났거나, 시험 호출이 결과 없이 probe_timeout을 넘김 (호출한 쪽이 취소됨 등)
+        self.state = self.HALF_OPEN
+        self.probe_in_flight = True
+        self.probe_started = time.time()
+        return True
+
+    def release_probe(self) -> None:
+        """결과 없이 끝난 호출 (취소) - 시험 호출이었다면 다음 호출이 바로 다시 시험"""
+        self.probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_seconds = self.base_open_seconds
+        self.probe_in_flight = False
+
+    def record_failure(self, immediate: bool = False) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # 시험 호출 실패 - 차단 시간을 두 배로
+            self._open(min(self.open_seconds * 2, self.max_open_seconds))
+        elif immediate or self.failures >= self.failure_threshold:
+            self._open(self.open_seconds)
+
+    def _open(self, seconds: float) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.open_seconds = seconds
+        self.probe_in_flight = False
+
+    def retry_at(self) -> Optional[float]:
+        if self.state != self.OPEN:
+            return None
+        return self.opened_at + self.open_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = self.OPEN if self.state == self.HALF_OPEN else self.state
+        return {'state': state, 'failures': self.failures,
+                'opened_at': self.opened_at, 'open_seconds': self.open_seconds}
+
+    def load(self, data: Dict[str, Any]) -> None:
+        self.state = data.get('state', self.CLOSED)
+        self.failures = data.get('failures', 0)
+        self.opened_at = data.get('opened_at', 0.0)
+        self.open_seconds = data.get('open_seconds', self.base_open_seconds)
+
+
+class ModelGuard:
+    """모델별 RPM 토큰 버킷 + 일일 요청 한도(RPD) + 서킷 브레이커 (상태는 주기적으로만 저장)"""
+
+    def __init__(self, models: List[Dict[str, Any]] = MODEL_CONFIG, status_file: str = MODEL_STATUS_FILE):
+        self.models = models
+        self.status_file = status_file
+        self.buckets = [TokenBucket(model.get('rpm', 60)) for model in models]
+        self.breakers = [CircuitBreaker() for _ in models]
+        self.status = self._load()
+        self._dirty = False
+
+    # --- 상태 저장/로드 ---
+    def _load(self) -> Dict[str, Any]:
+        status = {
+            'current_index': 0,
+            'quota_exceeded_time': None,
+            'failure_count': 0,
+            'daily_requests': 0,
+            'last_reset_date': _quota_day(),
+            'models': {}
+        }
+        try:
+            if os.path.exists(self.status_file):
+                with open(self.status_file, 'r', encoding='utf-8') as f:
+                    status.update(json.load(f))
+        except Exception as e:
+            logger.error(f"모델 상태 로드 오류: {e}")
+        status.setdefault('models', {})
+        for model, breaker in zip(self.models, self.breakers):
+            saved = status['models'].get(model['name'], {})
+            breaker.load(saved.get('breaker', {}))
+        return status
+
+    def _model_state(self, idx: int) -> Dict[str, Any]:
+        """모델별 일일 사용량 (태평양 시간 0시 기준 초기화)"""
+        state = self.status['models'].setdefault(self.models[idx]['name'], {})
+        today = _quota_day()
+        if state.get('day') != today:
+            state['day'] = today
+            state['requests'] = 0
+        if self.status.get('last_reset_date') != today:
+            self.status['last_reset_date'] = today
+            self.status['daily_requests'] = 0
+        return state
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def checkpoint(self) -> bool:
+        """변경이 있을 때만 상태 파일 기록"""
+        if not self._dirty:
+            return False
+        for idx, breaker in enumerate(self.breakers):
+            self._model_state(idx)['breaker'] = breaker.to_dict()
+        try:
+            with open(self.status_file, 'w', encoding='utf-8') as f:
+                json.dump(self.status, f, ensure_ascii=False, indent=2)
+            self._dirty = False
+            return True
+        except Exception as e:
+            logger.error(f"모델 상태 저장 오류: {e}")
+            return False
+
+    async def run_periodic_checkpoint(self, interval: float = MODEL_STATUS_CHECKPOINT_INTERVAL) -> None:
+        """interval초마다 상태 저장 (봇 시작 시 태스크로 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.checkpoint()
+
+    # --- 호출 허가 ---
+    def try_acquire(self, idx: int) -> bool:
+        """일일 한도, 분당 한도, 서킷 상태를 모두 통과하면 토큰 사용"""
+        model = self.models[idx]
+        if self._model_state(idx)['requests'] >= model.get('rpd', float('inf')):
+            return False
+        if not self.buckets[idx].available():
+            return False
+        if not self.breakers[idx].allow():
+            return False
+        self.buckets[idx].consume()
+        return True
+
+    def candidates(self) -> Iterator[int]:
+        """기본 모델부터 지금 호출 가능한 모델 인덱스를 차례로 (시도할 때만 토큰 사용)"""
+        for idx in range(len(self.models)):
+            if self.try_acquire(idx):
+                yield idx
+
+    def _rpd_left(self, idx: int) -> bool:
+        return self._model_state(idx)['requests'] < self.models[idx].get('rpd', float('inf'))
+
+    def rpm_wait(self) -> Optional[float]:
+        """분당 한도에만 막힌 모델 중 가장 빨리 토큰이 생기는 시간 (그런 모델이 없으면 None)"""
+        waits = [self.buckets[idx].wait_time() for idx in range(len(self.models))
+                 if self._rpd_left(idx) and self.breakers[idx].wait_time() == 0]
+        return min(waits) if waits else None
+
+    def retry_after(self) -> Optional[float]:
+        """다시 호출할 수 있을 때까지 남은 시간 - 모든 모델의 일일 한도가 소진됐으면 None (내일 초기화)"""
+        waits = [max(self.buckets[idx].wait_time(), self.breakers[idx].wait_time())
+                 for idx in range(len(self.models)) if self._rpd_left(idx)]
+        return min(waits) if waits else None
+
+    async def acquire(self, max_wait: float = MODEL_RPM_MAX_WAIT) -> AsyncIterator[int]:
+        """candidates()와 같되, 모든 모델이 분당 한도에만 막혔으면 max_wait초 안에서 기다렸다가 한 번 더"""
+        attempted = False
+        for idx in self.candidates():
+            attempted = True
+            yield idx
+        if attempted:
+            return
+        wait = self.rpm_wait()
+        if wait is None or wait > max_wait:
+            return
+        await asyncio.sleep(wait)
+        for idx in self.candidates():
+            yield idx
+
+    def release(self, idx: int) -> None:
+        """호출이 결과 없이 끝났을 때 (취소) - 시험 호출 자리 반환"""
+        self.breakers[idx].release_probe()
+
+    # --- 결과 기록 ---
+    def record_success(self, idx: int) -> None:
+        self.breakers[idx].record_success()
+        self._model_state(idx)['requests'] += 1
+        self.status['daily_requests'] = self.status.get('daily_requests', 0) + 1
+        self.status['current_index'] = idx
+        self.status['failure_count'] = 0
+        self.mark_dirty()
+        logger.info(f"✅ {self.models[idx]['display_name']} 사용 성공")
+
+    def record_failure(self, idx: int, error: Exception) -> None:
+        error_str = str(error).lower()
+        logger.error(f"❌ {self.models[idx]['display_name']} 에러: {error}")
+        quota = any(keyword in error_str for keyword in QUOTA_ERROR_KEYWORDS)
+        not_found = any(keyword in error_str for keyword in NOT_FOUND_KEYWORDS)
+        # 요청이 실제로 나갔으므로 일일 사용량에 포함
+        self._model_state(idx)['requests'] += 1
+        self.breakers[idx].record_failure(immediate=quota or not_found)
+        if quota:
+            self.status['quota_exceeded_time'] = datetime.now(QUOTA_TIMEZONE).isoformat()
+        self.status['failure_count'] = self.status.get('failure_count', 0) + 1
+        self.mark_dirty()
+
+    # --- 상태 조회 ---
+    def get_model_states(self) -> List[Dict[str, Any]]:
+        states = []
+        for idx, model in enumerate(self.models):
+            breaker = self.breakers[idx]
+            states.append({
+                'display_name': model['display_name'],
+                'state': breaker.state,
+                'retry_at': breaker.retry_at(),
+                'requests_today': self._model_state(idx)['requests'],
+                'rpd': model.get('rpd'),
+                'rpm': model.get('rpm'),
+                'rpm_wait': self.buckets[idx].wait_time()
+            })
+        return states
+
+
+# 전역 인스턴스 (SimpleBot과 GeminiService가 같은 API 키의 할당량을 공유)
+model_guard = ModelGuard()
+
+# 프로세스 종료 시 마지막 상태 저장
+atexit.register(model_guard.checkpoint)
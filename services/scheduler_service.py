@@ -1,80 +1,40 @@
 import logging
-import json
-import random
-from datetime import datetime
+import pytz
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from telegram import Bot
 
-from config.settings import MSK
-from utils.data_utils import load_user_data, save_user_data
+from config.settings import MSK, DAILY_LEARNING_SLOTS, DAILY_PACK_PREPARE_MINUTES
+from services.daily_pack import daily_packs, send_daily_bucket
+from utils.subscriber_index import Bucket, subscriber_index
 
 logger = logging.getLogger(__name__)
 
-def load_learning_database():
-    """러시아어 학습 데이터베이스 로드"""
-    try:
-        with open('russian_learning_database.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.error("russian_learning_database.json 파일을 찾을 수 없습니다!")
-        return {"vocabulary": [], "conversations": []}
+def _bucket_job_id(bucket: Bucket) -> str:
+    tz, minute, edition = bucket
+    return f"daily_learning:{tz}:{minute}:{edition}"
 
-async def send_daily_learning(bot: Bot):
-    """매일 학습 콘텐츠를 구독자들에게 전송"""
-    users = load_user_data()
-    database = load_learning_database()
-    
-    # 데이터베이스에서 랜덤 선택
-    vocabulary = database.get("vocabulary", [])
-    conversations = database.get("conversations", [])
-    
-    if len(vocabulary) < 30 or len(conversations) < 20:
-        logger.warning("데이터베이스에 충분한 데이터가 없습니다!")
+def sync_bucket_job(scheduler: AsyncIOScheduler, bot: Bot, bucket: Bucket, active: bool) -> None:
+    """구독자가 있는 전송 버킷만 예약 (버킷이 비면 작업 삭제)"""
+    if not active:
+        try:
+            scheduler.remove_job(_bucket_job_id(bucket))
+        except JobLookupError:
+            pass
         return
-    
-    # 랜덤 선택 (중복 방지)
-    selected_words = random.sample(vocabulary, min(30, len(vocabulary)))
-    selected_conversations = random.sample(conversations, min(20, len(conversations)))
-    
-    # 메시지 형식 생성
-    words_text = "**📚 오늘의 단어 (30개):**\n"
-    for i, word in enumerate(selected_words, 1):
-        words_text += f"{i}. **{word['russian']}** 🔊`{word['pronunciation']}` - {word['korean']}\n"
-    
-    conversations_text = "\n**💬 오늘의 회화 (20개):**\n"
-    for i, conv in enumerate(selected_conversations, 1):
-        conversations_text += f"{i}. **{conv['russian']}** - {conv['korean']}\n"
-        conversations_text += f"   🔊 발음: `{conv['pronunciation']}`\n"
-    
-    learning_content = words_text + conversations_text
-    
-    for user_id, user_data in users.items():
-        if user_data.get('subscribed_daily', False):
-            try:
-                message = f"**☀️ 오늘의 러시아어 학습 (모스크바 기준 {datetime.now(MSK).strftime('%m월 %d일')})**\n\n{learning_content}"
-                
-                # 메시지가 너무 길면 분할 전송
-                if len(message) > 4000:
-                    # 단어 부분만 먼저 전송
-                    words_message = f"**☀️ 오늘의 러시아어 학습 (모스크바 기준 {datetime.now(MSK).strftime('%m월 %d일')})**\n\n{words_text}"
-                    await bot.send_message(chat_id=user_id, text=words_message)
-                    
-                    # 회화 부분을 따로 전송
-                    conversations_message = f"**💬 오늘의 회화 (계속)**\n{conversations_text}"
-                    await bot.send_message(chat_id=user_id, text=conversations_message)
-                else:
-                    await bot.send_message(chat_id=user_id, text=message)
-                
-                user_data['stats']['daily_words_received'] += 1
-                logger.info(f"Sent daily learning to {user_id}")
-            except Exception as e:
-                logger.error(f"Failed to send message to {user_id}: {e}")
-    
-    save_user_data(users)
+    tz, minute, _ = bucket
+    scheduler.add_job(
+        send_daily_bucket, 'cron', hour=minute // 60, minute=minute % 60, timezone=pytz.timezone(tz),
+        args=[bot, bucket], id=_bucket_job_id(bucket), replace_existing=True, misfire_grace_time=600
+    )
 
 def create_scheduler(bot: Bot) -> AsyncIOScheduler:
-    """스케줄러를 생성하고 설정"""
+    """스케줄러를 생성하고 설정 (회차별 팩 미리 생성 + 사용자별 전송 시각 버킷마다 전송)"""
     scheduler = AsyncIOScheduler(timezone=MSK)
-    scheduler.add_job(send_daily_learning, 'cron', hour=7, minute=0, args=[bot])
-    scheduler.add_job(send_daily_learning, 'cron', hour=12, minute=0, args=[bot])
-    return scheduler 
\ No newline at end of file
+    for hour, minute in DAILY_LEARNING_SLOTS:
+        prepare_at = (hour * 60 + minute - DAILY_PACK_PREPARE_MINUTES) % (24 * 60)
+        scheduler.add_job(daily_packs.prepare_next, 'cron', hour=prepare_at // 60, minute=prepare_at % 60)
+        logger.info(f"⏰ 일일 학습 팩 준비 예약: {prepare_at // 60:02d}:{prepare_at % 60:02d}")
+    subscriber_index.add_bucket_listener(lambda bucket, active: sync_bucket_job(scheduler, bot, bucket, active))
+    logger.info(f"⏰ 일일 학습 전송 예약: 구독자 {len(subscriber_index)}명, 전송 버킷 {len(subscriber_index.buckets)}개")
+    return scheduler
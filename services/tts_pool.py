@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import TTS_MAX_WORKERS, TTS_DEADLINE
+
+logger = logging.getLogger(__name__)
+
+
+class TTSWorkerPool:
+    """gTTS 합성 전용 스레드 풀 - 동시 합성 수 제한, 대기열 지표, 요청별 제한 시간"""
+
+    def __init__(self, max_workers: int = TTS_MAX_WORKERS, deadline: float = TTS_DEADLINE):
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts')
+        self._slots = asyncio.Semaphore(max_workers)
+        self._waiting = 0
+        self._running = 0
+        self._metrics = {
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'max_queue_depth': 0,
+            'wait_seconds': 0.0,
+            'run_seconds': 0.0
+        }
+
+    async def run(self, func: Callable[..., Any], *args: Any, deadline: Optional[float] = None) -> Any:
+        """풀에서 func(*args) 실행 (대기와 실행을 합쳐 deadline초를 넘기면 asyncio.TimeoutError)"""
+        deadline = self.deadline if deadline is None else deadline
+        enqueued = time.monotonic()
+
+        self._waiting += 1
+        self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], self._waiting)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            self._metrics['timeouts'] += 1
+            logger.warning(f"⏱️ TTS 대기 시간 초과 (대기열 {self._waiting})")
+            raise
+        finally:
+            self._waiting -= 1
+
+        started = time.monotonic()
+        self._metrics['started'] += 1
+        self._metrics['wait_seconds'] += started - enqueued
+        self._running += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        # 슬롯은 스레드 작업이 실제로 끝날 때 반납 (시간 초과로 먼저 돌아가도 동시 합성 수는 그대로 유지)
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - (started - enqueued)))
+        except asyncio.TimeoutError:
+            self._metrics['timeouts'] += 1
+            logger.warning(f"⏱️ TTS 합성 시간 초과 ({deadline:.1f}초)")
+            raise
+        except Exception:
+            self._metrics['failed'] += 1
+            raise
+        self._metrics['completed'] += 1
+        self._metrics['run_seconds'] += time.monotonic() - started
+        return result
+
+    def _release(self, future: asyncio.Future) -> None:
+        if not future.cancelled():
+            future.exception()  # 시간 초과로 버려진 작업의 예외도 회수된 것으로 표시
+        self._running -= 1
+        self._slots.release()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['max_workers'] = self.max_workers
+        metrics['queued'] = self._waiting
+        metrics['running'] = self._running
+        metrics['avg_wait_ms'] = metrics['wait_seconds'] / (metrics['started'] or 1) * 1000
+        metrics['avg_run_ms'] = metrics['run_seconds'] / (metrics['completed'] or 1) * 1000
+        return metrics
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 전역 인스턴스
+tts_pool = TTSWorkerPool()
@@ -1,52 +1,253 @@
+import asyncio
+import contextlib
 import io
 import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
 from gtts import gTTS
+from telegram import InputMediaAudio, Message
+from telegram.error import BadRequest
+
+from config.settings import (
+    TTS_DEADLINE, TTS_CHUNK_CHARS, TTS_REQUEST_CONCURRENCY, TTS_LONG_TEXT_DEADLINE
+)
+from services.tts_pool import tts_pool
+from utils.audio_bundle import audio_bundle
+from utils.audio_cache import audio_cache
+from utils.chat_locks import ChatLockManager
+from utils.file_registry import file_id_registry
+from utils.mp3_utils import split_sentences, concat_mp3, mp3_duration
+from utils.speech_keys import make_audio_key, speech_runs, speech_key
 
 logger = logging.getLogger(__name__)
 
-async def convert_text_to_speech(text: str, lang: str = "auto") -> bytes:
-    """무료 Google TTS로 텍스트를 음성으로 변환 (한국어, 러시아어 지원)"""
+# 음성 키별 업로드 잠금 (같은 음성의 첫 업로드를 한 번만)
+upload_locks = ChatLockManager()
+
+# file_id 자체가 문제인 BadRequest (이때만 무효화하고 다시 업로드 - 채팅 없음/캡션 길이 등은 그대로 오류)
+FILE_ID_ERROR_KEYWORDS = [
+    'wrong file identifier', 'wrong remote file', 'file reference expired', 'file_reference_expired',
+    'wrong file id', 'invalid file id', 'type of file mismatch', 'wrong padding'
+]
+
+def is_file_id_error(error: BadRequest) -> bool:
+    message = str(error).lower()
+    return any(keyword in message for keyword in FILE_ID_ERROR_KEYWORDS)
+
+def _synthesize(text: str, lang: str, slow: bool) -> bytes:
+    """gTTS 합성 (작업 풀 스레드에서 실행)"""
+    tts = gTTS(text=text, lang=lang, slow=slow, timeout=TTS_DEADLINE)
+    audio_buffer = io.BytesIO()
+    tts.write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+async def _speak_chunk(text: str, lang: str, slow: bool, limit: Optional[asyncio.Semaphore] = None,
+                       deadline_at: Optional[float] = None) -> bytes:
+    """한 덩어리 음성 - 사전 생성 번들 → 디스크 캐시 → gTTS 순서
+
+    limit은 요청 하나가 동시에 합성하는 덩어리 수, deadline_at은 요청 전체의 마감 시각 (이벤트 루프 시간)
+    """
+    cache_key = make_audio_key(text, lang, slow)
+    bundled = audio_bundle.get(cache_key)
+    if bundled is not None:
+        logger.info(f"발음 번들 사용 - 크기: {len(bundled)} bytes")
+        return bundled
+    cached = audio_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"TTS 캐시 사용 - 크기: {len(cached)} bytes")
+        return cached
+
+    # gTTS 호출은 블로킹 HTTP 요청이라 전용 작업 풀에서 실행 (이벤트 루프를 막지 않음)
+    async with limit or contextlib.nullcontext():
+        logger.info(f"음성 파일 생성 중... (TTS 대기열 {tts_pool.queue_depth})")
+        deadline = None if deadline_at is None else max(0.0, deadline_at - asyncio.get_running_loop().time())
+        audio_data = await tts_pool.run(_synthesize, text, lang, slow, deadline=deadline)
+    logger.info(f"음성 파일 생성 완료 - 크기: {len(audio_data)} bytes, 언어: {lang}")
+
+    audio_cache.put(cache_key, audio_data)
+    return audio_data
+
+async def _speak(text: str, lang: str, slow: bool, limit: Optional[asyncio.Semaphore] = None,
+                 deadline_at: Optional[float] = None) -> bytes:
+    """한 언어 구간 음성 - 긴 글은 문장 단위로 나눠 limit개씩 합성 (덩어리마다 캐시) 후 이어 붙임"""
+    if len(text) <= TTS_CHUNK_CHARS:
+        return await _speak_chunk(text, lang, slow, limit, deadline_at)
+
+    # 번들에 통째로 들어 있는 긴 문장은 그대로 사용
+    bundled = audio_bundle.get(make_audio_key(text, lang, slow))
+    if bundled is not None:
+        return bundled
+
+    chunks = split_sentences(text, TTS_CHUNK_CHARS)
+    logger.info(f"긴 글 TTS - {len(chunks)}개 덩어리로 병렬 합성 ({lang})")
+    parts = await asyncio.gather(*(_speak_chunk(chunk, lang, slow, limit, deadline_at) for chunk in chunks))
+    return concat_mp3(parts)
+
+async def convert_text_to_speech(text: str, lang: str = "auto", slow: bool = False) -> bytes:
+    """무료 Google TTS로 텍스트를 음성으로 변환 (한국어/러시아어/영어, 섞인 글은 구간별 목소리, 같은 음성은 캐시 재사용)"""
     try:
-        # 언어 자동 감지 또는 지정
-        if lang == "auto":
-            # 한글이 포함되어 있으면 한국어, 키릴 문자가 포함되어 있으면 러시아어
-            if any('\u3131' <= char <= '\u3163' or '\uac00' <= char <= '\ud7a3' for char in text):
-                detected_lang = "ko"
-                lang_name = "한국어"
-            elif any('\u0400' <= char <= '\u04ff' for char in text):
-                detected_lang = "ru"
-                lang_name = "러시아어"
-            else:
-                # 기본값을 한국어로 설정
-                detected_lang = "ko"
-                lang_name = "한국어 (기본값)"
-        else:
-            detected_lang = lang
-            lang_name = "러시아어" if lang == "ru" else "한국어" if lang == "ko" else lang
-            
-        logger.info(f"TTS 시작 - 텍스트: '{text}', 감지된 언어: {lang_name} ({detected_lang})")
-        
-        # 텍스트가 너무 길면 자르기 (gTTS 제한: 200자 정도)
-        if len(text) > 200:
-            text = text[:200] + "..."
-            logger.info(f"텍스트 자름 - 새 길이: {len(text)}")
-        
-        # gTTS 객체 생성
-        logger.info("gTTS 객체 생성 중...")
-        tts = gTTS(text=text, lang=detected_lang, slow=False)
-        
-        # 메모리에서 음성 파일 생성
-        logger.info("음성 파일 생성 중...")
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-        
-        audio_data = audio_buffer.getvalue()
-        logger.info(f"음성 파일 생성 완료 - 크기: {len(audio_data)} bytes, 언어: {lang_name}")
-        
-        return audio_data
+        runs = speech_runs(text, lang)
+        logger.info(f"TTS 시작 - 텍스트: '{text[:50]}', 길이: {len(text)}, 구간: {'+'.join(run_lang for run_lang, _ in runs)}")
+
+        # 제한 시간은 요청 전체에 하나 (덩어리마다 풀 대기 시간을 따로 재면 긴 글의 뒤쪽 덩어리가 시간 초과)
+        deadline = TTS_DEADLINE if len(text) <= TTS_CHUNK_CHARS else TTS_LONG_TEXT_DEADLINE
+        deadline_at = asyncio.get_running_loop().time() + deadline
+        # 긴 글도 동시에 TTS_REQUEST_CONCURRENCY개만 합성 (풀을 혼자 차지하지 않음)
+        limit = asyncio.Semaphore(TTS_REQUEST_CONCURRENCY)
+
+        async def speak() -> bytes:
+            if len(runs) == 1:
+                return await _speak(runs[0][1], runs[0][0], slow, limit, deadline_at)
+            # 언어가 섞여 있으면 구간마다 맞는 목소리로 합성해 한 트랙으로
+            parts = await asyncio.gather(*(_speak(run, run_lang, slow, limit, deadline_at) for run_lang, run in runs))
+            return concat_mp3(parts)
+
+        # 시간을 넘기면 남은 덩어리도 함께 취소
+        return await asyncio.wait_for(speak(), timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.error(f"TTS 시간 초과: '{text[:30]}'")
+        return None
     except Exception as e:
         logger.error(f"TTS 오류: {e}")
         import traceback
         logger.error(f"상세 오류: {traceback.format_exc()}")
-        return None 
\ No newline at end of file
+        return None
+
+async def send_speech(send: Callable[..., Awaitable[Message]], text: str, lang: str = "auto",
+                      slow: bool = False, filename: Optional[str] = None, **kwargs: Any) -> Optional[Message]:
+    """음성 전송 - 이미 올린 음성은 file_id로 보내고, 처음이면 업로드 후 file_id 기록
+
+    send는 reply_audio 또는 chat_id를 묶은 bot.send_audio (audio= 인자만 채워서 호출)
+    """
+    return await _send_registered(
+        send, speech_key(text, lang, slow), lambda: convert_text_to_speech(text, lang, slow), filename, **kwargs
+    )
+
+def track_key(texts: List[str], lang: str) -> str:
+    """여러 문장을 이어 붙인 트랙의 캐시 키 (같은 문장을 한 번에 합성한 음성과 구분)"""
+    return make_audio_key('\n'.join(texts), f"{lang}:track")
+
+async def render_speech_track(texts: List[str], lang: str) -> Tuple[Optional[bytes], List[float]]:
+    """문장마다 합성(캐시/번들 재사용)한 음성을 한 트랙으로 → (음성, 문장별 시작 시각 초)"""
+    parts = await asyncio.gather(*(convert_text_to_speech(text, lang) for text in texts))
+    if not all(parts):
+        return None, []
+    offsets = []
+    position = 0.0
+    for part in parts:
+        offsets.append(position)
+        position += mp3_duration(part)
+    audio_data = concat_mp3(list(parts))
+    audio_cache.put(track_key(texts, lang), audio_data)
+    return audio_data, offsets
+
+async def send_speech_track(send: Callable[..., Awaitable[Message]], texts: List[str], lang: str,
+                            filename: Optional[str] = None, **kwargs: Any) -> Optional[Message]:
+    """여러 문장을 한 트랙으로 전송 (트랙도 한 번만 업로드하고 이후엔 file_id)"""
+    key = track_key(texts, lang)
+
+    async def produce() -> Optional[bytes]:
+        return audio_cache.get(key) or (await render_speech_track(texts, lang))[0]
+    return await _send_registered(send, key, produce, filename, **kwargs)
+
+async def send_speech_album(send_group: Callable[..., Awaitable[List[Message]]],
+                            items: List[Dict[str, Any]]) -> List[Message]:
+    """음성 여러 개(2~10개)를 앨범 하나로 전송 (sendMediaGroup) - 올린 적 있는 음성은 file_id 사용
+
+    send_group은 chat_id를 묶은 bot.send_media_group, items는 text/lang과 InputMediaAudio 인자
+    (filename/title/performer/caption)
+    """
+    keys = [speech_key(item['text'], item.get('lang', 'auto')) for item in items]
+
+    def media(sources: List[Any]) -> List[InputMediaAudio]:
+        return [
+            InputMediaAudio(
+                source, filename=item.get('filename'), title=item.get('title'),
+                performer=item.get('performer'), caption=item.get('caption')
+            )
+            for item, source in zip(items, sources)
+        ]
+
+    file_ids = [file_id_registry.get(key) for key in keys]
+    if all(file_ids):
+        try:
+            messages = await send_group(media=media(file_ids))
+            for _ in keys:
+                file_id_registry.record_reuse()
+            return messages
+        except BadRequest as e:
+            if not is_file_id_error(e):
+                raise
+            # 어느 file_id가 문제인지 알 수 없으므로 앨범 전체를 다시 업로드
+            logger.warning(f"앨범 file_id 전송 실패, 재업로드: {e}")
+            for key in keys:
+                file_id_registry.invalidate(key)
+
+    # 같은 앨범을 여러 채팅에 동시에 보내면 첫 업로드만 하고 나머지는 그 file_id를 재사용
+    async with upload_locks.lock('album:' + ':'.join(keys)):
+        file_ids = [file_id_registry.get(key) for key in keys]
+        missing = [index for index, file_id in enumerate(file_ids) if not file_id]
+        audio = await asyncio.gather(*(
+            convert_text_to_speech(items[index]['text'], items[index].get('lang', 'auto')) for index in missing
+        ))
+        sources = list(file_ids)
+        for index, audio_data in zip(missing, audio):
+            if not audio_data:
+                logger.error(f"앨범 음성 합성 실패: {items[index]['text']}")
+                return []
+            sources[index] = audio_data
+
+        messages = await send_group(media=media(sources))
+        for index, (key, message) in enumerate(zip(keys, messages)):
+            if index in missing:
+                file_id_registry.record_upload()
+                if message.audio is not None:
+                    file_id_registry.set(key, message.audio.file_id)
+            else:
+                file_id_registry.record_reuse()
+        return messages
+
+async def _send_registered(send: Callable[..., Awaitable[Message]], key: str,
+                           produce: Callable[[], Awaitable[Optional[bytes]]],
+                           filename: Optional[str] = None, **kwargs: Any) -> Optional[Message]:
+    """file_id가 있으면 그것으로, 없으면 produce()로 만든 음성을 업로드하고 file_id 기록"""
+    file_id = file_id_registry.get(key)
+    if file_id:
+        message = await _send_file_id(send, key, file_id, **kwargs)
+        if message is not None:
+            return message
+
+    # 같은 음성을 여러 채팅에 동시에 보내면 첫 업로드만 하고 나머지는 그 file_id를 재사용
+    async with upload_locks.lock(key):
+        file_id = file_id_registry.get(key)
+        if file_id:
+            message = await _send_file_id(send, key, file_id, **kwargs)
+            if message is not None:
+                return message
+
+        audio_data = await produce()
+        if not audio_data:
+            return None
+
+        audio_buffer = io.BytesIO(audio_data)
+        audio_buffer.name = filename or f"speech_{key[:12]}.mp3"
+        message = await send(audio=audio_buffer, **kwargs)
+        file_id_registry.record_upload()
+        if message is not None and message.audio is not None:
+            file_id_registry.set(key, message.audio.file_id)
+        return message
+
+async def _send_file_id(send: Callable[..., Awaitable[Message]], key: str, file_id: str,
+                        **kwargs: Any) -> Optional[Message]:
+    """등록된 file_id로 전송 (file_id가 만료/잘못됐으면 무효화하고 None, 다른 오류는 그대로)"""
+    try:
+        message = await send(audio=file_id, **kwargs)
+        file_id_registry.record_reuse()
+        return message
+    except BadRequest as e:
+        if not is_file_id_error(e):
+            raise
+        # 만료되거나 잘못된 file_id - 지우고 다시 업로드
+        logger.warning(f"file_id 전송 실패, 재업로드: {e}")
+        file_id_registry.invalidate(key)
+        return None
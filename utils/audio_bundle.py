@@ -0,0 +1,129 @@
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from config.settings import AUDIO_BUNDLE_DATA_FILE, AUDIO_BUNDLE_INDEX_FILE
+
+logger = logging.getLogger(__name__)
+
+# 인덱스 파일: 헤더(매직, 버전, 개수) + 키 순으로 정렬된 고정 길이 레코드(sha256 키, 오프셋, 길이)
+INDEX_MAGIC = b'PBDX'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sII')
+INDEX_RECORD = struct.Struct('<32sQI')
+
+
+def write_bundle(clips: Iterable[Tuple[str, bytes]],
+                 data_path: str = AUDIO_BUNDLE_DATA_FILE,
+                 index_path: str = AUDIO_BUNDLE_INDEX_FILE) -> int:
+    """(오디오 캐시 키, mp3) 목록을 데이터 파일 하나 + 오프셋 인덱스로 기록, 기록한 개수 반환"""
+    records = []
+    data_dir = os.path.dirname(os.path.abspath(data_path))
+    fd, tmp_data = tempfile.mkstemp(dir=data_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        offset = 0
+        for key, data in clips:
+            f.write(data)
+            records.append((bytes.fromhex(key), offset, len(data)))
+            offset += len(data)
+    records.sort()
+
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    fd, tmp_index = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(records)))
+        for record in records:
+            f.write(INDEX_RECORD.pack(*record))
+
+    os.replace(tmp_data, data_path)
+    os.replace(tmp_index, index_path)
+    return len(records)
+
+
+class AudioBundle:
+    """사전 생성한 발음 번들 읽기 - 두 파일을 mmap하고 인덱스는 이진 탐색 (파일이 없으면 빈 번들)"""
+
+    def __init__(self, data_path: str = AUDIO_BUNDLE_DATA_FILE, index_path: str = AUDIO_BUNDLE_INDEX_FILE):
+        self.data_path = data_path
+        self.index_path = index_path
+        self._data: Optional[mmap.mmap] = None
+        self._index: Optional[mmap.mmap] = None
+        self._count = 0
+        self._metrics = {
+            'hits': 0,
+            'misses': 0
+        }
+        self.load()
+
+    def load(self) -> None:
+        self.close()
+        if not (os.path.exists(self.data_path) and os.path.exists(self.index_path)):
+            return
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count = INDEX_HEADER.unpack_from(index, 0)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                index.close()
+                logger.error(f"발음 번들 인덱스 형식 오류: {self.index_path}")
+                return
+            data = None
+            if os.path.getsize(self.data_path) > 0:
+                with open(self.data_path, 'rb') as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"발음 번들 로드 오류: {e}")
+            return
+        self._index, self._data, self._count = index, data, count
+        logger.info(f"🎧 발음 번들 로드: {count}개, {self.size / 1024 / 1024:.1f}MB")
+
+    def _record(self, position: int) -> Tuple[bytes, int, int]:
+        return INDEX_RECORD.unpack_from(self._index, INDEX_HEADER.size + position * INDEX_RECORD.size)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """오디오 캐시 키로 mp3 조회"""
+        if not self._count or self._data is None:
+            self._metrics['misses'] += 1
+            return None
+        target = bytes.fromhex(key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            digest, offset, length = self._record(low)
+            if digest == target:
+                self._metrics['hits'] += 1
+                return self._data[offset:offset + length]
+        self._metrics['misses'] += 1
+        return None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size(self) -> int:
+        return len(self._data) if self._data is not None else 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['entries'] = self._count
+        metrics['bytes'] = self.size
+        return metrics
+
+    def close(self) -> None:
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                mapped.close()
+        self._data = self._index = None
+        self._count = 0
+
+
+# 전역 인스턴스
+audio_bundle = AudioBundle()
@@ -0,0 +1,106 @@
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config.settings import TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """TTS 음성 디스크 캐시 - 키 앞 2글자로 나눈 디렉터리, 바이트 한도 초과 시 오래 안 쓴 파일부터 삭제"""
+
+    def __init__(self, root: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()  # key -> 바이트 수 (LRU 순서)
+        self._bytes = 0
+        self._metrics = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'writes': 0
+        }
+        os.makedirs(root, exist_ok=True)
+        self._scan()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.mp3")
+
+    def _scan(self) -> None:
+        """시작 시 기존 파일을 수정 시각 순서로 인덱싱"""
+        found = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith('.mp3'):
+                    continue
+                stat = os.stat(os.path.join(shard_dir, name))
+                found.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        if found:
+            logger.info(f"🔊 TTS 캐시 로드: {len(found)}개, {self._bytes / 1024 / 1024:.1f}MB")
+
+    def get(self, key: str) -> Optional[bytes]:
+        if key not in self._entries:
+            self._metrics['misses'] += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # 재시작 후에도 최근 사용 순서 유지
+        except OSError:
+            self._bytes -= self._entries.pop(key, 0)
+            self._metrics['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._metrics['hits'] += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 임시 파일에 쓴 뒤 교체 (중간에 죽어도 깨진 파일이 남지 않음)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"TTS 캐시 저장 오류: {e}")
+            return
+        self._bytes += len(data) - self._entries.pop(key, 0)
+        self._entries[key] = len(data)
+        self._metrics['writes'] += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._metrics['evictions'] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['entries'] = len(self._entries)
+        metrics['bytes'] = self._bytes
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = metrics['hits'] / lookups * 100 if lookups else 0.0
+        return metrics
+
+
+# 전역 인스턴스
+audio_cache = AudioCache()
@@ -0,0 +1,288 @@
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import BROADCAST_JOB_KEEP_DAYS
+from utils.user_store import UserStore, SQLiteUserStore, user_store
+from utils.write_behind import user_buffer
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastJobStore:
+    """브로드캐스트 작업 기록 - 받는 사람별 완료 체크포인트를 저장해 재시작 후 남은 사람부터 이어서 전송
+
+    체크포인트는 사용자 데이터 플러시와 같은 트랜잭션에 기록 (보상 카운터가 저장된 사람만 완료로 남고, 완료로 남은 사람은 보상도 저장됨)
+    """
+
+    def __init__(self, store: UserStore, keep_days: int = BROADCAST_JOB_KEEP_DAYS):
+        self.store = store
+        self.keep_days = keep_days
+        self._jobs: Dict[str, Dict[str, Any]] = {}             # 이 프로세스에서 시작/재개한 작업
+        self._active: set = set()                              # 지금 전송 중인 작업 ID
+        self._pending: List[Tuple[str, float, str, str]] = []  # (상태, 시각, 작업 ID, 채팅 ID)
+        self._metrics = {
+            'checkpoints': 0,
+            'resumed_jobs': 0,
+            'abandoned_jobs': 0,
+            'skipped_recipients': 0
+        }
+        self._create_schema()
+
+    # --- 영속화 ---
+    @property
+    def _persistent(self) -> bool:
+        return isinstance(self.store, SQLiteUserStore)
+
+    def _create_schema(self) -> None:
+        if not self._persistent:
+            return
+        with self.store.lock:
+            self.store.connection.execute("""
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.store.connection.execute("""
+                CREATE TABLE IF NOT EXISTS broadcast_recipients (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    chat_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    updated_at REAL,
+                    PRIMARY KEY (job_id, chat_id)
+                )
+            """)
+            self.store.connection.execute(
+                "CREATE INDEX IF NOT EXISTS broadcast_recipients_seq ON broadcast_recipients (job_id, status, seq)"
+            )
+
+    def _load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not self._persistent:
+            return None
+        with self.store.lock:
+            conn = self.store.connection
+            row = conn.execute(
+                "SELECT kind, payload, status, total, created_at FROM broadcast_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM broadcast_recipients WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        kind, payload, status, total, created_at = row
+        return {
+            'job_id': job_id, 'kind': kind, 'payload': json.loads(payload), 'status': status, 'total': total,
+            'done': counts.get('done', 0), 'failed': counts.get('failed', 0), 'created_at': created_at
+        }
+
+    def _pending_recipients(self, job_id: str) -> List[str]:
+        with self.store.lock:
+            rows = self.store.connection.execute(
+                "SELECT chat_id FROM broadcast_recipients WHERE job_id = ? AND status = 'pending' ORDER BY seq",
+                (job_id,)
+            ).fetchall()
+        return [chat_id for chat_id, in rows]
+
+    def _insert_job(self, job: Dict[str, Any], recipients: List[str]) -> None:
+        now = time.time()
+        with self.store.lock:
+            conn = self.store.connection
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    "INSERT INTO broadcast_jobs (job_id, kind, payload, status, total, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'running', ?, ?, ?)",
+                    (job['job_id'], job['kind'], json.dumps(job['payload'], ensure_ascii=False),
+                     job['total'], now, now)
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO broadcast_recipients (job_id, seq, chat_id, status) "
+                    "VALUES (?, ?, ?, 'pending')",
+                    [(job['job_id'], seq, chat_id) for seq, chat_id in enumerate(recipients)]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _set_status(self, job_id: str, status: str) -> None:
+        if not self._persistent:
+            return
+        with self.store.lock:
+            self.store.connection.execute(
+                "UPDATE broadcast_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, time.time(), job_id)
+            )
+
+    def prune(self) -> int:
+        """보관 기간이 지난 완료/포기 작업 삭제"""
+        if not self._persistent:
+            return 0
+        cutoff = time.time() - self.keep_days * 86400
+        with self.store.lock:
+            conn = self.store.connection
+            old = [job_id for job_id, in conn.execute(
+                "SELECT job_id FROM broadcast_jobs WHERE status IN ('finished', 'abandoned') AND updated_at < ?", (cutoff,)
+            ).fetchall()]
+            conn.executemany("DELETE FROM broadcast_recipients WHERE job_id = ?", [(job_id,) for job_id in old])
+            conn.executemany("DELETE FROM broadcast_jobs WHERE job_id = ?", [(job_id,) for job_id in old])
+        return len(old)
+
+    # --- 작업 ---
+    def start(self, job_id: str, kind: str, payload: Dict[str, Any],
+              recipients: Iterable[Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """작업 시작 또는 재개 → (작업 정보, 아직 보내지 않은 받는 사람 목록)
+
+        이미 기록된 작업이면 recipients는 무시하고 저장된 목록에서 남은 사람만 반환
+        """
+        job = self._jobs.get(job_id) or self._load_job(job_id)
+        if job is not None:
+            self._jobs[job_id] = job
+            if job['status'] != 'running':  # 완료/포기한 작업은 다시 보내지 않음
+                return job, []
+            if self._persistent:
+                pending = self._pending_recipients(job_id)
+            else:
+                pending = job['recipients']
+            # 아직 기록되지 않았지만 이미 처리한 사람은 제외
+            checkpointed = {chat_id for _, _, pending_job, chat_id in self._pending if pending_job == job_id}
+            checkpointed |= job.get('checkpointed', set())
+            pending = [chat_id for chat_id in pending if chat_id not in checkpointed]
+            self._active.add(job_id)
+            self._metrics['resumed_jobs'] += 1
+            self._metrics['skipped_recipients'] += job['total'] - len(pending)
+            logger.info(f"♻️ 브로드캐스트 재개: {job_id} - 남은 {len(pending)}/{job['total']}명")
+            return job, pending
+
+        recipients = list(dict.fromkeys(str(chat_id) for chat_id in recipients))
+        job = {
+            'job_id': job_id, 'kind': kind, 'payload': payload, 'status': 'running', 'total': len(recipients),
+            'done': 0, 'failed': 0, 'created_at': time.time()
+        }
+        if self._persistent:
+            self._insert_job(job, recipients)
+            self.prune()
+        else:
+            # 메모리 저장소는 재시작하면 사라지므로 같은 프로세스 안에서만 재개
+            job['recipients'] = recipients
+            job['checkpointed'] = set()
+        self._jobs[job_id] = job
+        self._active.add(job_id)
+        return job, recipients
+
+    def checkpoint(self, job_id: str, chat_id: Any, delivered: bool) -> None:
+        """받는 사람 한 명 처리 완료 (다음 사용자 데이터 플러시 때 함께 기록)"""
+        job = self._jobs[job_id]
+        job['done' if delivered else 'failed'] += 1
+        if not self._persistent:
+            job['checkpointed'].add(str(chat_id))
+        self._pending.append(('done' if delivered else 'failed', time.time(), job_id, str(chat_id)))
+
+    def finish(self, job_id: str) -> None:
+        """작업 종료 - 남은 보상/체크포인트를 먼저 저장한 뒤 완료로 표시"""
+        user_buffer.flush()
+        if self._pending:
+            # 사용자 데이터 플러시가 실패하면 완료로 표시하지 않음 (다음 시작 때 재개)
+            return
+        self._jobs[job_id]['status'] = 'finished'
+        self._set_status(job_id, 'finished')
+
+    def abandon(self, job_id: str) -> None:
+        """끝나지 않은 작업을 이어 보내지 않기로 표시 (너무 오래됐거나 팩이 없을 때 - 다시 재개되지 않음)"""
+        if job_id in self._jobs:
+            self._jobs[job_id]['status'] = 'abandoned'
+        self._set_status(job_id, 'abandoned')
+        self._metrics['abandoned_jobs'] += 1
+
+    def is_active(self, job_id: str) -> bool:
+        return job_id in self._active
+
+    def release(self, job_id: str) -> None:
+        """전송 종료/중단 후 호출 (끝나지 않은 작업은 다음 시작 때 이어서 전송)"""
+        self._active.discard(job_id)
+
+    def unfinished(self, kind: str) -> List[Dict[str, Any]]:
+        """재시작 전에 끝나지 않은 작업 (오래된 것부터)"""
+        if not self._persistent:
+            return []
+        with self.store.lock:
+            rows = self.store.connection.execute(
+                "SELECT job_id FROM broadcast_jobs WHERE kind = ? AND status = 'running' ORDER BY created_at",
+                (kind,)
+            ).fetchall()
+        return [job for job in (self._load_job(job_id) for job_id, in rows) if job is not None]
+
+    # --- 변경 통지 (WriteBehindUserBuffer 리스너) ---
+    def record_changed(self, user_id: str, record: Dict[str, Any]) -> None:
+        pass
+
+    def stats_incremented(self, user_id: str, deltas: Dict[str, int]) -> None:
+        pass
+
+    # --- 사용자 데이터와 같은 트랜잭션 (WriteBehindUserBuffer 배치 기록자) ---
+    def take_batch(self) -> List[Tuple[str, float, str, str]]:
+        """사용자 플러시에 함께 실을 체크포인트 (보상 카운터와 같이 저장되거나 같이 취소됨)"""
+        if not self._persistent:
+            return []
+        pending, self._pending = self._pending, []
+        return pending
+
+    def write_batch(self, pending: List[Tuple[str, float, str, str]], connection: Any) -> None:
+        connection.executemany(
+            "UPDATE broadcast_recipients SET status = ?, updated_at = ? WHERE job_id = ? AND chat_id = ?",
+            pending
+        )
+
+    def batch_done(self, pending: List[Tuple[str, float, str, str]], committed: bool) -> None:
+        if committed:
+            self._metrics['checkpoints'] += len(pending)
+        else:
+            self._pending = pending + self._pending
+
+    def flush(self) -> int:
+        """사용자 데이터 변경 없이 남은 체크포인트 기록 (대부분은 사용자 플러시 트랜잭션에 함께 기록됨)"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        if not self._persistent:
+            return len(pending)
+        try:
+            with self.store.lock:
+                conn = self.store.connection
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(
+                        "UPDATE broadcast_recipients SET status = ?, updated_at = ? WHERE job_id = ? AND chat_id = ?",
+                        pending
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            self._pending = pending + self._pending
+            logger.error(f"브로드캐스트 체크포인트 저장 오류: {e}")
+            return 0
+        self._metrics['checkpoints'] += len(pending)
+        return len(pending)
+
+    # --- 지표 ---
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['pending_checkpoints'] = len(self._pending)
+        metrics['active_jobs'] = len(self._active)
+        return metrics
+
+
+# 전역 인스턴스
+broadcast_jobs = BroadcastJobStore(user_store)
+user_buffer.add_listener(broadcast_jobs)
+user_buffer.add_batch_writer(broadcast_jobs)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class _LockEntry:
+    __slots__ = ('lock', 'holders')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.holders = 0  # 잠금을 가진 + 기다리는 작업 수
+
+
+class ChatLockManager:
+    """채팅 ID별 asyncio.Lock 관리 (사용이 끝난 잠금은 바로 제거되어 메모리 제한)"""
+
+    def __init__(self):
+        self._entries: Dict[str, _LockEntry] = {}
+        self._metrics = {
+            'acquired': 0,
+            'contended': 0,
+            'max_active': 0
+        }
+
+    @asynccontextmanager
+    async def lock(self, chat_id):
+        """같은 채팅의 사용자 변경을 순서대로 실행"""
+        key = str(chat_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _LockEntry()
+            self._metrics['max_active'] = max(self._metrics['max_active'], len(self._entries))
+        if entry.lock.locked():
+            self._metrics['contended'] += 1
+        entry.holders += 1
+        try:
+            async with entry.lock:
+                self._metrics['acquired'] += 1
+                yield
+        finally:
+            entry.holders -= 1
+            # 기다리는 작업이 없으면 제거 (유휴 채팅의 잠금은 남지 않음)
+            if entry.holders == 0 and self._entries.get(key) is entry:
+                del self._entries[key]
+
+    @property
+    def active_count(self) -> int:
+        return len(self._entries)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['active_locks'] = self.active_count
+        return metrics
+
+
+# 전역 인스턴스
+chat_locks = ChatLockManager()
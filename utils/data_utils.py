@@ -1,11 +1,14 @@
-import json
 import random
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from cachetools import TTLCache
 import asyncio
 import logging
-from config.settings import USER_DATA_FILE, MSK, CACHE_TTL, MAX_CACHE_SIZE
+from config.settings import MSK, CACHE_TTL, MAX_CACHE_SIZE
+from utils.write_behind import user_buffer
+from utils.user_session import get_user_record, save_user_records, increment_user_record_stats
+from utils.leaderboard import leaderboard
+from utils.vocabulary_index import vocabulary_index
 
 logger = logging.getLogger(__name__)
 
@@ -15,22 +18,18 @@ user_cache = TTLCache(maxsize=MAX_CACHE_SIZE, ttl=CACHE_TTL)
 class UserManager:
     @staticmethod
     def load_user_data() -> Dict:
-        """사용자 데이터 로드"""
+        """전체 사용자 데이터 로드"""
         try:
-            with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+            return user_buffer.load_all()
         except Exception as e:
             logger.error(f"사용자 데이터 로드 오류: {e}")
             return {}
 
     @staticmethod
     def save_user_data(data: Dict) -> None:
-        """사용자 데이터 저장"""
+        """주어진 사용자 데이터만 저장"""
         try:
-            with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            save_user_records(data)
             # 캐시도 업데이트
             for user_id, user_data in data.items():
                 user_cache[user_id] = user_data
@@ -48,10 +47,10 @@ class UserManager:
             user_data['stats']['last_active_date'] = datetime.now(MSK).isoformat()
             return user_data
         
-        users = UserManager.load_user_data()
+        user = get_user_record(user_id)
         
-        if user_id not in users:
-            users[user_id] = {
+        if user is None:
+            user = {
                 'subscribed_daily': False,
                 'quest_state': {'current_quest': None, 'stage': 0},
                 'stats': {
@@ -77,51 +76,45 @@ class UserManager:
                     'notifications': True
                 }
             }
-            UserManager.save_user_data(users)
         
         # 마지막 활동 시간 업데이트
-        users[user_id]['stats']['last_active_date'] = datetime.now(MSK).isoformat()
-        user_cache[user_id] = users[user_id]
-        UserManager.save_user_data(users)
+        user['stats']['last_active_date'] = datetime.now(MSK).isoformat()
+        UserManager.save_user_data({user_id: user})
         
-        return users[user_id]
+        return user
 
     @staticmethod
     def update_user_stats(chat_id: int, stat_type: str, increment: int = 1) -> None:
         """사용자 통계 업데이트"""
-        users = UserManager.load_user_data()
         user_id = str(chat_id)
         
-        if user_id in users:
-            if stat_type in users[user_id]['stats']:
-                users[user_id]['stats'][stat_type] += increment
-                
-                # 경험치 추가 시 레벨 계산
-                if stat_type == 'total_exp':
-                    exp = users[user_id]['stats']['total_exp']
-                    level = min(exp // 100 + 1, 100)  # 100레벨 최대
-                    users[user_id]['stats']['level'] = level
-                
-                UserManager.save_user_data(users)
+        # 있는 사용자의 기존 통계 항목만 증가 (모르는 항목/사용자는 새로 만들지 않음)
+        user = get_user_record(user_id)
+        if user is None or stat_type not in user.get('stats', {}):
+            return
+        
+        # 경험치 추가 시 레벨 계산이 필요하므로 레코드 단위로 처리
+        if stat_type == 'total_exp':
+            UserManager.add_exp(chat_id, increment)
+            return
+        
+        user_cache.pop(user_id, None)
+        increment_user_record_stats(user_id, {stat_type: increment})
 
     @staticmethod
     def add_exp(chat_id: int, exp_amount: int) -> Dict:
         """경험치 추가 및 레벨업 확인"""
-        users = UserManager.load_user_data()
         user_id = str(chat_id)
+        user = get_user_record(user_id) or UserManager.get_user(chat_id)
         
-        if user_id not in users:
-            UserManager.get_user(chat_id)
-            users = UserManager.load_user_data()
-        
-        old_level = users[user_id]['stats']['level']
-        users[user_id]['stats']['total_exp'] += exp_amount
+        old_level = user['stats']['level']
+        user['stats']['total_exp'] += exp_amount
         
-        new_exp = users[user_id]['stats']['total_exp']
+        new_exp = user['stats']['total_exp']
         new_level = min(new_exp // 100 + 1, 100)
-        users[user_id]['stats']['level'] = new_level
+        user['stats']['level'] = new_level
         
-        UserManager.save_user_data(users)
+        UserManager.save_user_data({user_id: user})
         
         return {
             'leveled_up': new_level > old_level,
@@ -133,13 +126,13 @@ class UserManager:
     @staticmethod
     def calculate_streak(chat_id: int) -> int:
         """연속 학습 일수 계산"""
-        users = UserManager.load_user_data()
         user_id = str(chat_id)
+        user = get_user_record(user_id)
         
-        if user_id not in users:
+        if user is None:
             return 0
         
-        last_active = users[user_id]['stats'].get('last_active_date')
+        last_active = user['stats'].get('last_active_date')
         if not last_active:
             return 0
         
@@ -147,16 +140,16 @@ class UserManager:
         today = datetime.now(MSK).date()
         
         if last_date == today:
-            return users[user_id]['stats'].get('streak_days', 0)
+            return user['stats'].get('streak_days', 0)
         elif last_date == today - timedelta(days=1):
             # 어제 활동했으면 연속
-            users[user_id]['stats']['streak_days'] = users[user_id]['stats'].get('streak_days', 0) + 1
-            UserManager.save_user_data(users)
-            return users[user_id]['stats']['streak_days']
+            user['stats']['streak_days'] = user['stats'].get('streak_days', 0) + 1
+            UserManager.save_user_data({user_id: user})
+            return user['stats']['streak_days']
         else:
             # 연속 끊김
-            users[user_id]['stats']['streak_days'] = 1
-            UserManager.save_user_data(users)
+            user['stats']['streak_days'] = 1
+            UserManager.save_user_data({user_id: user})
             return 1
 
 class ProgressTracker:
@@ -216,16 +209,7 @@ class QuizManager:
     @staticmethod
     def get_vocabulary_sample(count: int = 10) -> List[Dict]:
         """어휘 퀴즈용 단어 샘플 가져오기"""
-        try:
-            with open('russian_korean_vocab_2000.json', 'r', encoding='utf-8') as f:
-                vocab_db = json.load(f)
-            
-            if 'vocabulary' in vocab_db:
-                return random.sample(vocab_db['vocabulary'], min(count, len(vocab_db['vocabulary'])))
-            return []
-        except Exception as e:
-            logger.error(f"어휘 데이터 로드 오류: {e}")
-            return []
+        return [entry.to_dict() for entry in vocabulary_index.sample(count)]
 
     @staticmethod
     def generate_quiz_question(category: str) -> Dict:
@@ -255,12 +239,8 @@ class QuizManager:
     @staticmethod
     def record_quiz_result(chat_id: int, category: str, score: int, total_questions: int) -> None:
         """퀴즈 결과 기록"""
-        users = UserManager.load_user_data()
         user_id = str(chat_id)
-        
-        if user_id not in users:
-            UserManager.get_user(chat_id)
-            users = UserManager.load_user_data()
+        user = get_user_record(user_id) or UserManager.get_user(chat_id)
         
         # 퀴즈 기록 추가
         quiz_record = {
@@ -271,41 +251,32 @@ class QuizManager:
             'percentage': round((score / total_questions) * 100, 1)
         }
         
-        if 'quiz_history' not in users[user_id]:
-            users[user_id]['quiz_history'] = []
+        if 'quiz_history' not in user:
+            user['quiz_history'] = []
         
-        users[user_id]['quiz_history'].append(quiz_record)
+        user['quiz_history'].append(quiz_record)
         
         # 통계 업데이트
-        users[user_id]['stats']['quiz_attempts'] += 1
-        users[user_id]['stats']['quiz_score'] += score
-        users[user_id]['stats']['last_quiz_date'] = datetime.now(MSK).isoformat()
+        user['stats']['quiz_attempts'] += 1
+        user['stats']['quiz_score'] += score
+        user['stats']['last_quiz_date'] = datetime.now(MSK).isoformat()
         
         # 경험치 추가
         exp_gained = score * 2  # 맞은 문제당 2 EXP
-        users[user_id]['stats']['total_exp'] += exp_gained
+        user['stats']['total_exp'] += exp_gained
         
-        UserManager.save_user_data(users)
+        UserManager.save_user_data({user_id: user})
 
     @staticmethod
     def get_leaderboard(category: str = 'overall', limit: int = 10) -> List[Dict]:
-        """리더보드 조회"""
-        users = UserManager.load_user_data()
-        leaderboard = []
-        
-        for user_id, user_data in users.items():
-            stats = user_data.get('stats', {})
-            
-            if category == 'overall':
-                score = stats.get('total_exp', 0)
-            elif category == 'quiz':
-                score = stats.get('quiz_score', 0)
-            elif category == 'streak':
-                score = UserManager.calculate_streak(int(user_id))
-            else:
-                continue
-            
-            leaderboard.append({
+        """리더보드 조회 (순위 인덱스에서 상위 limit명만 읽음)"""
+        if category not in leaderboard.indexes:
+            return []
+
+        result = []
+        for user_id, score in leaderboard.top(category, limit):
+            stats = (get_user_record(user_id) or {}).get('stats', {})
+            result.append({
                 'user_id': user_id,
                 'score': score,
                 'level': stats.get('level', 1),
@@ -315,10 +286,7 @@ class QuizManager:
                     stats.get('quests_completed', 0)
                 )
             })
-        
-        # 점수순 정렬
-        leaderboard.sort(key=lambda x: x['score'], reverse=True)
-        return leaderboard[:limit]
+        return result
 
     @staticmethod
     def format_user_stats(chat_id: int) -> str:
@@ -0,0 +1,103 @@
+import logging
+import time
+from typing import Dict, Any, Optional
+
+from utils.user_store import UserStore, SQLiteUserStore, user_store
+
+logger = logging.getLogger(__name__)
+
+
+class FileIdRegistry:
+    """이미 업로드한 음성의 Telegram file_id 기록 (오디오 캐시 키 → file_id, 같은 파일은 다시 올리지 않음)"""
+
+    def __init__(self, store: UserStore = user_store):
+        self.store = store
+        self._file_ids: Dict[str, str] = {}
+        self._metrics = {
+            'reuses': 0,
+            'uploads': 0,
+            'invalidations': 0
+        }
+        self._create_schema()
+        self.load()
+
+    # --- 영속화 ---
+    @property
+    def _persistent(self) -> bool:
+        return isinstance(self.store, SQLiteUserStore)
+
+    def _create_schema(self) -> None:
+        if not self._persistent:
+            return
+        with self.store.lock:
+            self.store.connection.execute("""
+                CREATE TABLE IF NOT EXISTS telegram_files (
+                    key TEXT PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def load(self) -> None:
+        if not self._persistent:
+            return
+        with self.store.lock:
+            rows = self.store.connection.execute("SELECT key, file_id FROM telegram_files").fetchall()
+        self._file_ids = dict(rows)
+        if rows:
+            logger.info(f"📎 file_id 레지스트리 로드: {len(rows)}개")
+
+    # --- 조회/기록 ---
+    def get(self, key: str) -> Optional[str]:
+        return self._file_ids.get(key)
+
+    def set(self, key: str, file_id: str) -> None:
+        """업로드 직후 받은 file_id 저장 (업로드는 드물어서 바로 기록)"""
+        if self._file_ids.get(key) == file_id:
+            return
+        self._file_ids[key] = file_id
+        if not self._persistent:
+            return
+        try:
+            with self.store.lock:
+                self.store.connection.execute(
+                    "INSERT OR REPLACE INTO telegram_files (key, file_id, updated_at) VALUES (?, ?, ?)",
+                    (key, file_id, time.time())
+                )
+        except Exception as e:
+            logger.error(f"file_id 저장 오류: {e}")
+
+    def invalidate(self, key: str) -> None:
+        """전송에 실패한 file_id 삭제 (다음 전송은 다시 업로드)"""
+        if self._file_ids.pop(key, None) is None:
+            return
+        self._metrics['invalidations'] += 1
+        logger.warning(f"📎 file_id 무효화: {key[:8]}")
+        if not self._persistent:
+            return
+        try:
+            with self.store.lock:
+                self.store.connection.execute("DELETE FROM telegram_files WHERE key = ?", (key,))
+        except Exception as e:
+            logger.error(f"file_id 삭제 오류: {e}")
+
+    def record_reuse(self) -> None:
+        self._metrics['reuses'] += 1
+
+    def record_upload(self) -> None:
+        self._metrics['uploads'] += 1
+
+    # --- 지표 ---
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['entries'] = len(self._file_ids)
+        sends = metrics['reuses'] + metrics['uploads']
+        metrics['reuse_rate'] = metrics['reuses'] / sends * 100 if sends else 0.0
+        return metrics
+
+
+# 전역 인스턴스
+file_id_registry = FileIdRegistry()
@@ -0,0 +1,484 @@
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import MSK, GAME_LEADERBOARD_WINDOWS, GAME_ARCHIVE_TOP, GAME_ROLLOVER_INTERVAL
+from utils.user_store import UserStore, SQLiteUserStore, user_store
+from utils.write_behind import user_buffer
+
+logger = logging.getLogger(__name__)
+
+# 리더보드 카테고리 (이름 → 표시명)
+LEADERBOARD_CATEGORIES = {
+    'overall': '총 경험치',
+    'quiz': '퀴즈 점수',
+    'streak': '연속 학습일'
+}
+
+# stats 카운터 증가분 → 카테고리
+STAT_CATEGORIES = {
+    'total_exp': 'overall',
+    'quiz_score': 'quiz'
+}
+
+
+class SkipList:
+    """순위 조회용 skip list - 각 링크가 건너뛰는 원소 수(span)를 기록해 삽입/삭제/순위 계산이 평균 O(log N)"""
+
+    MAX_LEVEL = 32
+    P = 0.25
+
+    class _Node:
+        __slots__ = ('key', 'next', 'span')
+
+        def __init__(self, key: Any, level: int):
+            self.key = key
+            self.next: List[Optional['SkipList._Node']] = [None] * level
+            self.span: List[int] = [0] * level  # next[i]까지 건너뛰는 0단계 원소 수
+
+    def __init__(self):
+        self.head = self._Node(None, self.MAX_LEVEL)
+        self.level = 1
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+
+    def insert(self, key: Any) -> None:
+        update: List[Any] = [None] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            rank[i] = rank[i + 1] if i + 1 < self.level else 0
+            while node.next[i] is not None and node.next[i].key < key:
+                rank[i] += node.span[i]
+                node = node.next[i]
+            update[i] = node
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                self.head.span[i] = self.length
+            self.level = level
+        new = self._Node(key, level)
+        for i in range(level):
+            new.next[i] = update[i].next[i]
+            update[i].next[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+        self.length += 1
+
+    def remove(self, key: Any) -> bool:
+        update: List[Any] = [None] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+        node = node.next[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(self.level):
+            if update[i].next[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].next[i] = node.next[i]
+            else:
+                update[i].span[i] -= 1
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self.length -= 1
+        return True
+
+    def count_less(self, key: Any) -> int:
+        """key보다 작은 원소 수 (bisect_left와 같은 위치)"""
+        rank = 0
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                rank += node.span[i]
+                node = node.next[i]
+        return rank
+
+    def first(self, k: int) -> List[Any]:
+        keys = []
+        node = self.head.next[0]
+        while node is not None and len(keys) < k:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class RankIndex:
+    """점수 내림차순 순위 인덱스 - 점수 변경/순위 조회 O(log N), 상위 K 조회 O(log N + K) (skip list)"""
+
+    def __init__(self):
+        self._scores: Dict[str, int] = {}
+        self._sorted = SkipList()  # (-점수, user_id) 순서
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def update(self, user_id: str, score: int) -> bool:
+        """점수 갱신 (바뀐 경우 True)"""
+        old = self._scores.get(user_id)
+        if old == score:
+            return False
+        if old is not None:
+            self._sorted.remove((-old, user_id))
+        self._sorted.insert((-score, user_id))
+        self._scores[user_id] = score
+        return True
+
+    def add(self, user_id: str, delta: int) -> bool:
+        return self.update(user_id, self._scores.get(user_id, 0) + delta)
+
+    def remove(self, user_id: str) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._sorted.remove((-old, user_id))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1부터 시작하는 순위 (동점은 같은 순위)"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._sorted.count_less((-score, '')) + 1
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return [(user_id, -neg_score) for neg_score, user_id in self._sorted.first(k)]
+
+
+def _today() -> str:
+    return datetime.now(MSK).date().isoformat()
+
+
+def window_period(window: str, now: Optional[datetime] = None) -> str:
+    """기간 키 (daily: 2024-05-01, weekly: 2024-W18, season: 2024-S2 - 분기 단위)"""
+    date = (now or datetime.now(MSK)).date()
+    if window == 'daily':
+        return date.isoformat()
+    if window == 'weekly':
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{date.year}-S{(date.month - 1) // 3 + 1}"
+
+
+class GameWindow:
+    """게임 하나의 현재 기간 순위 (기간 최고 점수 기준)"""
+
+    __slots__ = ('period', 'index')
+
+    def __init__(self, period: str):
+        self.period = period
+        self.index = RankIndex()
+
+
+def extract_scores(record: Dict[str, Any]) -> Dict[str, int]:
+    """사용자 레코드에서 카테고리별 점수 추출"""
+    stats = record.get('stats', {})
+    learning = record.get('learning')
+    if learning is not None:
+        streak = learning.get('daily_streak', 0)
+    else:
+        streak = stats.get('streak_days', 0)
+    return {
+        'overall': stats.get('total_exp', 0),
+        'quiz': stats.get('quiz_score', 0),
+        'streak': streak
+    }
+
+
+def extract_study_date(record: Dict[str, Any]) -> Optional[str]:
+    """연속 학습일 만료 판단용 마지막 학습 날짜"""
+    last_study = (record.get('learning') or {}).get('last_study_date')
+    if last_study:
+        return last_study[:10]
+    last_active = record.get('stats', {}).get('last_active_date')
+    return last_active[:10] if last_active else None
+
+
+class LeaderboardService:
+    """사용자 변경 통지로 갱신되는 카테고리별 순위 인덱스 (저장소와 함께 영속화)"""
+
+    def __init__(self, store: UserStore):
+        self.store = store
+        self.indexes: Dict[str, RankIndex] = {category: RankIndex() for category in LEADERBOARD_CATEGORIES}
+        self._study_dates: Dict[str, str] = {}
+        self._dirty: set = set()  # (category, user_id)
+        self._expired_on: Optional[str] = None
+        # 게임별/기간별 순위 - 현재 기간만 인덱스로 유지하고 지난 기간은 압축 보관
+        self.game_windows: Dict[Tuple[str, str], GameWindow] = {}
+        self.game_archive: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._game_dirty: set = set()       # (game, window, user_id)
+        self._archive_pending: List[Tuple[str, str, str]] = []
+        self._create_schema()
+        self.load()
+
+    # --- 영속화 ---
+    @property
+    def _persistent(self) -> bool:
+        return isinstance(self.store, SQLiteUserStore)
+
+    def _create_schema(self) -> None:
+        if not self._persistent:
+            return
+        with self.store.lock:
+            self.store.connection.execute("""
+                CREATE TABLE IF NOT EXISTS leaderboard (
+                    category TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    study_date TEXT,
+                    PRIMARY KEY (category, user_id)
+                )
+            """)
+            self.store.connection.execute("""
+                CREATE TABLE IF NOT EXISTS game_scores (
+                    game TEXT NOT NULL,
+                    time_window TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    PRIMARY KEY (game, time_window, period, user_id)
+                )
+            """)
+            self.store.connection.execute("""
+                CREATE TABLE IF NOT EXISTS game_archive (
+                    game TEXT NOT NULL,
+                    time_window TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (game, time_window, period)
+                )
+            """)
+
+    def load(self) -> None:
+        """저장된 인덱스 로드 (처음이면 전체 사용자에서 한 번 구축)"""
+        self._load_games()
+        if self._persistent and self.store.get_meta('leaderboard_built'):
+            with self.store.lock:
+                rows = self.store.connection.execute(
+                    "SELECT category, user_id, score, study_date FROM leaderboard"
+                ).fetchall()
+            for category, user_id, score, study_date in rows:
+                if category in self.indexes:
+                    self.indexes[category].update(user_id, score)
+                if category == 'streak' and study_date:
+                    self._study_dates[user_id] = study_date
+            logger.info(f"🏆 리더보드 인덱스 로드: {len(self.indexes['overall'])}명")
+            return
+
+        for user_id, record in self.store.load_all().items():
+            self.record_changed(user_id, record)
+        self.flush()
+        if self._persistent:
+            self.store.set_meta('leaderboard_built', _today())
+        logger.info(f"🏆 리더보드 인덱스 구축: {len(self.indexes['overall'])}명")
+
+    def _load_games(self) -> None:
+        """현재 기간 게임 점수와 압축 보관본 로드 (지난 기간은 바로 보관 처리)"""
+        if not self._persistent:
+            return
+        with self.store.lock:
+            conn = self.store.connection
+            score_rows = conn.execute(
+                "SELECT game, time_window, period, user_id, score FROM game_scores"
+            ).fetchall()
+            archive_rows = conn.execute(
+                "SELECT game, time_window, period, data FROM game_archive"
+            ).fetchall()
+        for game, window, period, data in archive_rows:
+            self.game_archive[(game, window, period)] = json.loads(data)
+
+        stale: Dict[Tuple[str, str, str], GameWindow] = {}
+        for game, window, period, user_id, score in score_rows:
+            if period == window_period(window):
+                board = self.game_windows.setdefault((game, window), GameWindow(period))
+            else:
+                board = stale.setdefault((game, window, period), GameWindow(period))
+            board.index.update(user_id, score)
+        for (game, window, _), board in stale.items():
+            self._archive_game_window(game, window, board)
+
+    def flush(self) -> int:
+        """바뀐 순위 항목만 저장"""
+        if not self._dirty and not self._game_dirty and not self._archive_pending:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        game_dirty, self._game_dirty = self._game_dirty, set()
+        archive_pending, self._archive_pending = self._archive_pending, []
+        if not self._persistent:
+            return len(dirty) + len(game_dirty)
+
+        rows = []
+        for category, user_id in dirty:
+            score = self.indexes[category].score(user_id)
+            if score is not None:
+                study_date = self._study_dates.get(user_id) if category == 'streak' else None
+                rows.append((category, user_id, score, study_date))
+        game_rows = []
+        for game, window, user_id in game_dirty:
+            board = self.game_windows.get((game, window))
+            score = board.index.score(user_id) if board else None
+            if score is not None:
+                game_rows.append((game, window, board.period, user_id, score))
+        archive_rows = [
+            (game, window, period, json.dumps(self.game_archive[(game, window, period)], ensure_ascii=False))
+            for game, window, period in archive_pending
+        ]
+        try:
+            with self.store.lock:
+                conn = self.store.connection
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany("""
+                        INSERT INTO leaderboard (category, user_id, score, study_date)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(category, user_id) DO UPDATE SET
+                            score = excluded.score,
+                            study_date = excluded.study_date
+                    """, rows)
+                    conn.executemany("""
+                        INSERT INTO game_scores (game, time_window, period, user_id, score)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(game, time_window, period, user_id) DO UPDATE SET
+                            score = excluded.score
+                    """, game_rows)
+                    # 보관된 기간은 개별 점수 행을 지우고 압축본 한 행만 남김
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO game_archive (game, time_window, period, data)
+                        VALUES (?, ?, ?, ?)
+                    """, archive_rows)
+                    conn.executemany(
+                        "DELETE FROM game_scores WHERE game = ? AND time_window = ? AND period = ?",
+                        [row[:3] for row in archive_rows]
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            self._dirty |= dirty
+            self._game_dirty |= game_dirty
+            self._archive_pending.extend(archive_pending)
+            logger.error(f"리더보드 저장 오류: {e}")
+            return 0
+        return len(rows) + len(game_rows) + len(archive_rows)
+
+    # --- 변경 통지 (WriteBehindUserBuffer 리스너) ---
+    def record_changed(self, user_id: str, record: Dict[str, Any]) -> None:
+        for category, score in extract_scores(record).items():
+            if self.indexes[category].update(user_id, score):
+                self._dirty.add((category, user_id))
+        study_date = extract_study_date(record)
+        if study_date and self._study_dates.get(user_id) != study_date:
+            self._study_dates[user_id] = study_date
+            self._dirty.add(('streak', user_id))
+
+    def stats_incremented(self, user_id: str, deltas: Dict[str, int]) -> None:
+        for stat, amount in deltas.items():
+            category = STAT_CATEGORIES.get(stat)
+            if category and self.indexes[category].add(user_id, amount):
+                self._dirty.add((category, user_id))
+
+    # --- 조회 ---
+    def _expire_streaks(self) -> None:
+        """하루에 한 번, 어제 이후 학습하지 않은 사용자의 연속 학습일을 0으로"""
+        today = _today()
+        if self._expired_on == today:
+            return
+        self._expired_on = today
+        yesterday = (datetime.now(MSK).date() - timedelta(days=1)).isoformat()
+        index = self.indexes['streak']
+        for user_id, study_date in self._study_dates.items():
+            if study_date < yesterday and index.score(user_id):
+                index.update(user_id, 0)
+                self._dirty.add(('streak', user_id))
+
+    def top(self, category: str = 'overall', limit: int = 10) -> List[Tuple[str, int]]:
+        if category == 'streak':
+            self._expire_streaks()
+        return self.indexes[category].top(limit)
+
+    def rank(self, category: str, user_id: str) -> Tuple[Optional[int], int, int]:
+        """(순위, 점수, 전체 인원)"""
+        if category == 'streak':
+            self._expire_streaks()
+        index = self.indexes[category]
+        return index.rank(user_id), index.score(user_id) or 0, len(index)
+
+    # --- 게임별 기간 순위 ---
+    def _archive_game_window(self, game: str, window: str, board: GameWindow) -> None:
+        """지난 기간을 상위 기록 + 참가자 수로 압축 보관"""
+        self.game_archive[(game, window, board.period)] = {
+            'top': board.index.top(GAME_ARCHIVE_TOP),
+            'participants': len(board.index)
+        }
+        self._archive_pending.append((game, window, board.period))
+        self._game_dirty = {key for key in self._game_dirty if key[:2] != (game, window)}
+
+    def _game_window(self, game: str, window: str) -> GameWindow:
+        """현재 기간 순위 (기간이 바뀌었으면 이전 기간을 보관하고 새로 시작)"""
+        period = window_period(window)
+        board = self.game_windows.get((game, window))
+        if board is None or board.period != period:
+            if board is not None:
+                self._archive_game_window(game, window, board)
+            board = self.game_windows[(game, window)] = GameWindow(period)
+        return board
+
+    def record_game_score(self, user_id: str, game: str, score: int) -> None:
+        """게임 결과 기록 (기간마다 최고 점수만 유지)"""
+        user_id = str(user_id)
+        for window in GAME_LEADERBOARD_WINDOWS:
+            index = self._game_window(game, window).index
+            if score > (index.score(user_id) or 0) and index.update(user_id, score):
+                self._game_dirty.add((game, window, user_id))
+
+    def game_top(self, game: str, window: str = 'weekly', limit: int = 10) -> List[Tuple[str, int]]:
+        return self._game_window(game, window).index.top(limit)
+
+    def game_rank(self, game: str, window: str, user_id: str) -> Tuple[Optional[int], int, int]:
+        """(순위, 기간 최고 점수, 참가자 수)"""
+        index = self._game_window(game, window).index
+        return index.rank(user_id), index.score(user_id) or 0, len(index)
+
+    def game_history(self, game: str, window: str, period: str) -> Optional[Dict[str, Any]]:
+        """보관된 지난 기간 결과"""
+        return self.game_archive.get((game, window, period))
+
+    def rollover(self) -> int:
+        """기간이 끝난 게임 순위를 모두 보관 처리"""
+        before = len(self._archive_pending)
+        for game, window in list(self.game_windows):
+            self._game_window(game, window)
+        rolled = len(self._archive_pending) - before
+        if rolled:
+            logger.info(f"🏆 게임 리더보드 기간 마감: {rolled}개")
+        return rolled
+
+    async def run_periodic_rollover(self, interval: float = GAME_ROLLOVER_INTERVAL) -> None:
+        """interval초마다 기간 마감 확인 (봇 시작 시 태스크로 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.rollover()
+
+
+# 전역 인스턴스
+leaderboard = LeaderboardService(user_store)
+user_buffer.add_listener(leaderboard)
@@ -1,3 +1,18 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterable
+
+from telegram.error import BadRequest, RetryAfter
+
+from config.settings import STREAM_EDIT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+STREAM_CURSOR = " ▌"
+CONTINUATION_RESERVE = 32  # "📄 (계속 n/m)" 머리말 자리
+
 async def split_long_message(text: str, max_length: int = 4096) -> list:
     """긴 메시지를 여러 부분으로 나누기"""
     if len(text) <= max_length:
@@ -13,15 +28,15 @@ async def split_long_message(text: str, max_length: int = 4096) -> list:
     for line in lines:
         # 현재 부분 + 새 줄이 최대 길이를 초과하는지 확인
         if len(current_part) + len(line) + 1 > max_length:
-            if current_part:
+            if len(line) > max_length:
+                # 한 줄이 너무 긴 경우 현재 부분에 이어 붙인 뒤 강제로 자르기
+                line = f"{current_part}\n{line}" if current_part else line
+            elif current_part:
                 parts.append(current_part.strip())
-                current_part = line
-            else:
-                # 한 줄이 너무 긴 경우 강제로 자르기
-                while len(line) > max_length:
-                    parts.append(line[:max_length])
-                    line = line[max_length:]
-                current_part = line
+            while len(line) > max_length:
+                parts.append(line[:max_length])
+                line = line[max_length:]
+            current_part = line
         else:
             if current_part:
                 current_part += "\n" + line
@@ -32,4 +47,50 @@ async def split_long_message(text: str, max_length: int = 4096) -> list:
     if current_part:
         parts.append(current_part.strip())
     
-    return parts 
\ No newline at end of file
+    return parts
+
+async def _edit_text(message, text: str) -> None:
+    """메시지 수정 (내용이 같아서 생기는 오류는 무시)"""
+    try:
+        await message.edit_text(text)
+    except BadRequest as e:
+        if 'not modified' not in str(e).lower():
+            raise
+
+async def finish_reply(message, text: str) -> None:
+    """자리표시 메시지를 최종 텍스트로 바꾸고, 넘치는 부분은 이어서 전송"""
+    parts = await split_long_message(text or "...", TELEGRAM_MESSAGE_LIMIT - CONTINUATION_RESERVE)
+    for _ in range(2):
+        try:
+            await _edit_text(message, parts[0])
+            break
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+    else:
+        # 수정 한도가 계속 걸리면 자리표시는 두고 답변을 새 메시지로 전송 (답변이 사라지지 않도록)
+        logger.warning("최종 답변 수정 실패 (수정 한도) - 새 메시지로 전송")
+        await message.chat.send_message(parts[0])
+    for i, part in enumerate(parts[1:], 2):
+        await message.chat.send_message(f"📄 (계속 {i}/{len(parts)})\n\n{part}")
+
+async def stream_reply(message, chunks: AsyncIterable[str], header: str = "",
+                       interval: float = STREAM_EDIT_INTERVAL) -> str:
+    """생성 중인 텍스트로 자리표시 메시지를 주기적으로 수정 (채팅별 수정 한도 준수)"""
+    text = ""
+    next_edit = 0.0
+    async for chunk in chunks:
+        text += chunk
+        now = time.monotonic()
+        if now < next_edit or len(header) + len(text) > TELEGRAM_MESSAGE_LIMIT - len(STREAM_CURSOR):
+            continue
+        next_edit = now + interval
+        try:
+            await _edit_text(message, header + text + STREAM_CURSOR)
+        except RetryAfter as e:
+            # 한도에 걸리면 미리보기 수정만 잠시 건너뜀
+            next_edit = now + e.retry_after
+        except Exception as e:
+            logger.warning(f"스트리밍 미리보기 수정 실패: {e}")
+
+    await finish_reply(message, header + text)
+    return text
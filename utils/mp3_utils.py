@@ -0,0 +1,106 @@
+import re
+from typing import Iterable, List
+
+# 문장 끝(. ! ? … 。) 뒤의 공백이나 줄바꿈에서 나눔
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…。])\s+|\n+')
+# 긴 문장은 쉼표/세미콜론/콜론 뒤에서 한 번 더 나눔
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:])\s+')
+
+
+def _pack(pieces: Iterable[str], max_chars: int, separator: str = ' ') -> List[str]:
+    """조각을 max_chars 이하 덩어리로 이어 붙이기"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if not current:
+            current = piece
+        elif len(current) + len(separator) + len(piece) <= max_chars:
+            current += separator + piece
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_oversized(sentence: str, max_chars: int) -> List[str]:
+    """한 문장이 너무 길면 구 → 단어 → 글자 순서로 자르기"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces = []
+    for clause in CLAUSE_BOUNDARY.split(sentence):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+            continue
+        for word in clause.split():
+            while len(word) > max_chars:
+                pieces.append(word[:max_chars])
+                word = word[max_chars:]
+            if word:
+                pieces.append(word)
+    return _pack(pieces, max_chars)
+
+
+def split_sentences(text: str, max_chars: int) -> List[str]:
+    """문장 경계에서 나눈 뒤 max_chars 이하 덩어리로 묶기 (음성이 문장 중간에서 끊기지 않도록)"""
+    sentences = [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+    pieces = []
+    for sentence in sentences:
+        pieces.extend(_split_oversized(sentence, max_chars))
+    return _pack(pieces, max_chars)
+
+
+def strip_id3(data: bytes) -> bytes:
+    """앞쪽 ID3v2 태그와 끝의 ID3v1 태그 제거 (이어 붙일 때 중간에 태그가 끼지 않도록)"""
+    if len(data) >= 10 and data[:3] == b'ID3':
+        # 태그 크기는 7비트씩 나눠 저장 (syncsafe integer), 바닥글 플래그가 있으면 10바이트 추가
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b'TAG':
+        data = data[:-128]
+    return data
+
+
+# 프레임 헤더 표 (MPEG 버전별 Layer III 비트레이트 kbps / 샘플레이트 Hz)
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def mp3_duration(data: bytes) -> float:
+    """MP3 재생 시간(초) - Layer III 프레임 헤더를 따라가며 샘플 수를 합산 (gTTS 출력용)"""
+    data = strip_id3(data)
+    position = 0
+    seconds = 0.0
+    while position + 4 <= len(data):
+        header = int.from_bytes(data[position:position + 4], 'big')
+        version = (header >> 19) & 0x3    # 3: MPEG1, 2: MPEG2, 0: MPEG2.5
+        layer = (header >> 17) & 0x3      # 1: Layer III
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 0x3
+        if (header >> 21) != 0x7FF or version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            # 프레임 동기가 아니면 한 바이트씩 건너뛰며 다음 프레임 찾기
+            position += 1
+            continue
+        bitrate = _BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        padding = (header >> 9) & 0x1
+        position += samples // 8 * bitrate // sample_rate + padding
+        seconds += samples / sample_rate
+    return seconds
+
+
+def concat_mp3(parts: List[bytes]) -> bytes:
+    """MP3 조각을 한 트랙으로 (MP3는 프레임 단위라 태그만 떼면 그대로 이어 붙일 수 있음)"""
+    if len(parts) == 1:
+        return parts[0]
+    # 첫 조각의 ID3v2 태그는 트랙 태그로 남기고, 끝의 ID3v1 태그만 제거
+    head = parts[0]
+    if len(head) >= 128 and head[-128:-125] == b'TAG':
+        head = head[:-128]
+    return head + b''.join(strip_id3(part) for part in parts[1:])
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import (
+    GEMINI_CACHE_FILE, GEMINI_CACHE_MEMORY_BYTES, GEMINI_CACHE_DISK_BYTES, GEMINI_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """공백 차이만 있는 프롬프트를 같은 것으로 취급"""
+    return ' '.join(prompt.split())
+
+
+def make_cache_key(task: str, prompt: str) -> str:
+    """작업 종류 + 정규화된 프롬프트의 해시"""
+    return hashlib.sha256(f"{task}\0{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+
+class TwoTierResponseCache:
+    """Gemini 응답 캐시 - 바이트 제한 메모리 LRU + 재시작 후에도 남는 SQLite 디스크 계층"""
+
+    def __init__(self, path: str = GEMINI_CACHE_FILE,
+                 memory_bytes: int = GEMINI_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = GEMINI_CACHE_DISK_BYTES,
+                 ttls: Dict[str, int] = GEMINI_CACHE_TTL):
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self.ttls = ttls
+        # key -> (응답, 만료 시각, 바이트 수)
+        self._memory: 'OrderedDict[str, Tuple[str, float, int]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._metrics = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'expired': 0
+        }
+
+    def ttl_for(self, task: str) -> int:
+        return self.ttls.get(task, self.ttls.get('default', 0))
+
+    # --- 조회/저장 ---
+    def get(self, task: str, prompt: str) -> Optional[str]:
+        """캐시 조회 (메모리 → 디스크 순서, 디스크 적중 시 메모리로 승격)"""
+        if self.ttl_for(task) <= 0:
+            return None
+        key = make_cache_key(task, prompt)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at, size = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._metrics['memory_hits'] += 1
+                return value
+            self._drop_memory(key)
+            self._metrics['expired'] += 1
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                self._delete_disk(key)
+                self._metrics['expired'] += 1
+                row = None
+            if row is not None:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        if row is None:
+            self._metrics['misses'] += 1
+            return None
+
+        value, expires_at = row
+        self._put_memory(key, value, expires_at)
+        self._metrics['disk_hits'] += 1
+        return value
+
+    def put(self, task: str, prompt: str, value: str) -> None:
+        """응답 저장 (TTL이 0인 작업은 저장하지 않음)"""
+        ttl = self.ttl_for(task)
+        if ttl <= 0 or not value:
+            return
+        key = make_cache_key(task, prompt)
+        now = time.time()
+        expires_at = now + ttl
+        size = len(value.encode('utf-8'))
+
+        self._put_memory(key, value, expires_at)
+        try:
+            with self._lock:
+                old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute("""
+                    INSERT OR REPLACE INTO responses (key, task, value, size, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (key, task, value, size, expires_at, now))
+                self._disk_bytes += size - (old[0] if old else 0)
+                if self._disk_bytes > self.disk_limit:
+                    self._evict_disk()
+        except Exception as e:
+            logger.error(f"응답 캐시 디스크 저장 오류: {e}")
+
+    # --- 메모리 계층 ---
+    def _put_memory(self, key: str, value: str, expires_at: float) -> None:
+        size = len(value.encode('utf-8'))
+        if size > self.memory_limit:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (value, expires_at, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit:
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._metrics['memory_evictions'] += 1
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    # --- 디스크 계층 (호출 측에서 self._lock 보유) ---
+    def _delete_disk(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._disk_bytes -= row[0]
+
+    def _evict_disk(self) -> None:
+        """만료된 항목을 먼저 지우고, 그래도 넘치면 오래 안 쓴 항목부터 90%까지 정리"""
+        now = time.time()
+        freed, count = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses WHERE expires_at <= ?", (now,)
+        ).fetchone()
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._disk_bytes -= freed
+        self._metrics['expired'] += count
+
+        target = int(self.disk_limit * 0.9)
+        while self._disk_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if self._disk_bytes <= target:
+                    break
+                victims.append((key,))
+                self._disk_bytes -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self._metrics['disk_evictions'] += len(victims)
+
+    # --- 지표 ---
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        with self._lock:
+            metrics['disk_entries'] = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        metrics['memory_entries'] = len(self._memory)
+        metrics['memory_bytes'] = self._memory_bytes
+        metrics['disk_bytes'] = self._disk_bytes
+        lookups = metrics['memory_hits'] + metrics['disk_hits'] + metrics['misses']
+        metrics['hit_rate'] = (metrics['memory_hits'] + metrics['disk_hits']) / lookups * 100 if lookups else 0.0
+        return metrics
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# 전역 인스턴스
+gemini_cache = TwoTierResponseCache()
@@ -0,0 +1,58 @@
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+# 문자 종류별 연속 구간 (한 번의 정규식 스캔으로 세 종류를 함께 찾음)
+_SCRIPT_RUN = re.compile(
+    r'([\u1100-\u11ff\u3131-\u318e\uac00-\ud7a3]+)'   # 한글
+    r'|([\u0400-\u04ff]+)'                           # 키릴 문자
+    r'|([A-Za-z\u00c0-\u024f]+)'                     # 라틴 문자
+)
+_RUN_LANGS = (None, 'ko', 'ru', 'en')
+
+DEFAULT_LANG = 'ko'
+LANG_NAMES = {'ko': '한국어', 'ru': '러시아어', 'en': '영어'}
+LANG_FLAGS = {'ko': '🇰🇷', 'ru': '🇷🇺', 'en': '🇺🇸'}
+
+
+@lru_cache(maxsize=512)
+def segment_scripts(text: str) -> Tuple[Tuple[str, str], ...]:
+    """텍스트를 (언어 코드, 구간) 목록으로 나누기 - 공백/숫자/기호는 앞 구간에 붙이고 같은 언어 구간은 합침
+
+    핸들러와 TTS가 같은 텍스트를 다시 나눌 때는 캐시된 결과를 사용
+    """
+    runs: List[List] = []  # [언어, 조각 목록]
+    last_end = 0
+    for match in _SCRIPT_RUN.finditer(text):
+        lang = _RUN_LANGS[match.lastindex]
+        start, end = match.span()
+        if runs and runs[-1][0] == lang:
+            runs[-1][1].append(text[last_end:end])
+        elif runs:
+            runs[-1][1].append(text[last_end:start])
+            runs.append([lang, [text[start:end]]])
+        else:
+            runs.append([lang, [text[:end]]])
+        last_end = end
+    if not runs:
+        return ()
+    runs[-1][1].append(text[last_end:])
+    return tuple((lang, ''.join(pieces)) for lang, pieces in runs)
+
+
+def detect_language(text: str) -> str:
+    """글자 수가 가장 많은 언어 (문자가 없으면 한국어)"""
+    totals = {}
+    for lang, run in segment_scripts(text):
+        totals[lang] = totals.get(lang, 0) + len(run)
+    return max(totals, key=totals.get) if totals else DEFAULT_LANG
+
+
+def describe_languages(text: str) -> Tuple[str, str]:
+    """표시용 (국기, 언어 이름) - 여러 언어가 섞여 있으면 모두 표시"""
+    langs = list(dict.fromkeys(lang for lang, _ in segment_scripts(text)))
+    if not langs:
+        return LANG_FLAGS[DEFAULT_LANG], f"{LANG_NAMES[DEFAULT_LANG]} (기본값)"
+    if len(langs) == 1:
+        return LANG_FLAGS[langs[0]], LANG_NAMES[langs[0]]
+    return '🌐', f"혼합 ({'+'.join(LANG_NAMES[lang] for lang in langs)})"
@@ -0,0 +1,145 @@
+import base64
+import logging
+import random
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from config.settings import SEEN_WORDS_SAMPLE_ATTEMPTS
+from utils.vocabulary_index import VocabEntry, VocabularyIndex, vocabulary_index
+from utils.write_behind import user_buffer
+
+logger = logging.getLogger(__name__)
+
+SEEN_WORDS_FIELD = 'seen_words'
+
+
+class SeenWords:
+    """단어 노출 비트맵 - 단어 번호당 1비트 (2000단어 ≈ 250바이트)
+
+    저장할 때 단어장 지문(앞에서 몇 개 단어까지의 러시아어)을 함께 기록. 단어를 뒤에 추가하면 그대로 쓰고,
+    중간 삽입/삭제로 번호가 밀렸으면 다른 단어를 가리키므로 버리고 새로 시작
+    """
+
+    __slots__ = ('bits',)
+
+    def __init__(self, bits: bytes = b''):
+        self.bits = bytearray(bits)
+
+    @classmethod
+    def from_value(cls, value: Any, index: VocabularyIndex = vocabulary_index) -> 'SeenWords':
+        """저장된 값 {'vocab': 지문, 'words': 단어 수, 'bits': base64} → 비트맵 (지문이 다르면 빈 비트맵)"""
+        if not isinstance(value, dict):
+            return cls()
+        words = value.get('words')
+        if not isinstance(words, int) or words > len(index) or index.version(words) != value.get('vocab'):
+            return cls()
+        try:
+            return cls(base64.b64decode(value.get('bits') or ''))
+        except (ValueError, TypeError):
+            return cls()
+
+    def to_value(self, index: VocabularyIndex = vocabulary_index) -> Dict[str, Any]:
+        words = len(index)
+        return {'vocab': index.version(words), 'words': words, 'bits': base64.b64encode(bytes(self.bits)).decode('ascii')}
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], index: VocabularyIndex = vocabulary_index) -> 'SeenWords':
+        return cls.from_value(record.get(SEEN_WORDS_FIELD), index)
+
+    def to_record(self, record: Dict[str, Any], index: VocabularyIndex = vocabulary_index) -> None:
+        record[SEEN_WORDS_FIELD] = self.to_value(index)
+
+    def __contains__(self, entry_id: int) -> bool:
+        byte = entry_id >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] >> (entry_id & 7) & 1)
+
+    def __len__(self) -> int:
+        """본 단어 수"""
+        return sum(bin(byte).count('1') for byte in self.bits)
+
+    def add(self, entry_id: int) -> None:
+        byte = entry_id >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (entry_id & 7)
+
+    def update(self, entry_ids: Iterable[int]) -> None:
+        for entry_id in entry_ids:
+            self.add(entry_id)
+
+    def discard_all(self, entry_ids: Iterable[int]) -> None:
+        for entry_id in entry_ids:
+            byte = entry_id >> 3
+            if byte < len(self.bits):
+                self.bits[byte] &= ~(1 << (entry_id & 7)) & 0xFF
+
+    # --- 샘플링 ---
+    def sample_ids(self, ids: Sequence[int], k: int) -> List[int]:
+        """ids 중 아직 안 본 단어 k개를 뽑아 본 것으로 표시
+
+        무작위 위치를 몇 번 찍어 보고 (대부분 안 본 단어면 k번 남짓으로 끝남), 모자라면 안 본 단어만 모아서 뽑음.
+        범위의 단어를 모두 봤으면 그 범위만 비우고 새 회차 시작
+        """
+        k = min(k, len(ids))
+        picked: List[int] = []
+        chosen = set()
+        for _ in range(SEEN_WORDS_SAMPLE_ATTEMPTS * k):
+            if len(picked) == k:
+                break
+            entry_id = ids[random.randrange(len(ids))]
+            if entry_id not in chosen and entry_id not in self:
+                picked.append(entry_id)
+                chosen.add(entry_id)
+
+        if len(picked) < k:
+            unseen = [entry_id for entry_id in ids if entry_id not in chosen and entry_id not in self]
+            if len(unseen) >= k - len(picked):
+                picked += random.sample(unseen, k - len(picked))
+            else:
+                picked += unseen
+                chosen.update(unseen)
+                self.discard_all(ids)
+                rest = [entry_id for entry_id in ids if entry_id not in chosen]
+                picked += random.sample(rest, k - len(picked))
+
+        self.update(picked)
+        return picked
+
+    def sample(self, k: int, level: Optional[str] = None, category: Optional[str] = None,
+               index: VocabularyIndex = vocabulary_index) -> List[VocabEntry]:
+        """레벨/카테고리에서 안 본 단어 k개"""
+        ids = index.bucket_ids(level, category)
+        return [index.entry(entry_id) for entry_id in self.sample_ids(ids, k)]
+
+
+# --- 사용자 레코드 ---
+def sample_unseen_words(record: Dict[str, Any], k: int, level: Optional[str] = None,
+                        category: Optional[str] = None) -> List[VocabEntry]:
+    """사용자가 아직 안 본 단어 k개를 뽑고 레코드에 표시 (레코드 저장은 호출한 쪽에서)"""
+    seen = SeenWords.from_record(record)
+    words = seen.sample(k, level, category)
+    seen.to_record(record)
+    return words
+
+
+def mark_words_seen(user_id: str, russian_words: Iterable[str]) -> None:
+    """일일 학습 등으로 받은 단어(러시아어)를 사용자 비트맵에 표시 (게임에서 다시 나오지 않도록)
+
+    레코드를 읽어 통째로 저장하지 않고 버퍼에 병합 변경으로 예약 - 같은 사용자의 핸들러가 먼저 읽어 둔
+    레코드를 나중에 저장해도 표시와 일일 보상 카운터가 사라지지 않음 (비트 OR라 여러 번 적용해도 같음)
+    """
+    entries = (vocabulary_index.get(russian) for russian in russian_words)
+    entry_ids = [entry.id for entry in entries if entry is not None]
+    if not entry_ids:
+        return
+    # 적용 전에 단어장이 바뀌어 번호가 밀렸으면 표시하지 않음
+    words = len(vocabulary_index)
+    version = vocabulary_index.version(words)
+
+    def mark(record: Dict[str, Any]) -> None:
+        if vocabulary_index.version(words) != version:
+            return
+        seen = SeenWords.from_record(record)
+        seen.update(entry_ids)
+        seen.to_record(record)
+
+    user_buffer.merge(user_id, mark)
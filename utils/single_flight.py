@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청을 하나의 업스트림 호출로 합치기"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._joined: Dict[str, int] = {}  # 키별로 합류해 기다리는 호출 수
+        self._metrics = {
+            'upstream_calls': 0,
+            'coalesced': 0
+        }
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """진행 중인 같은 요청이 있으면 그 결과를 함께 기다림"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._metrics['coalesced'] += 1
+            self._joined[key] = self._joined.get(key, 0) + 1
+            logger.debug(f"🔗 진행 중인 동일 요청에 합류 (대기 {key[:8]})")
+        else:
+            # 업스트림 호출은 별도 태스크로 - 먼저 온 호출자가 취소돼도 나머지는 결과를 받음
+            task = asyncio.ensure_future(factory())
+            self._register(key, task)
+        return await asyncio.shield(task)
+
+    def _register(self, key: str, future: asyncio.Future) -> None:
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._done(key, future))
+        self._metrics['upstream_calls'] += 1
+
+    def _done(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+            self._joined.pop(key, None)
+
+    def lead(self, key: str) -> Optional[asyncio.Future]:
+        """진행 중인 같은 요청이 없으면 호출자가 직접 결과를 채울 Future를 등록해 반환 (스트리밍처럼 조각으로 만드는 호출용)
+
+        같은 요청이 진행 중이면 None - do()로 합류
+        """
+        if key in self._in_flight:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._register(key, future)
+        return future
+
+    def abandon(self, key: str, future: asyncio.Future, factory: Callable[[], Awaitable[Any]]) -> None:
+        """lead()로 받은 결과를 채우지 못하고 끝났을 때 - 합류한 호출이 있으면 새 업스트림 호출 결과를 넘겨줌"""
+        if future.done():
+            return
+        if not self._joined.get(key):
+            future.cancel()
+            return
+        task = asyncio.ensure_future(factory())
+        self._metrics['upstream_calls'] += 1
+
+        def relay(_: asyncio.Future) -> None:
+            if future.done():
+                return
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        task.add_done_callback(relay)
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        metrics['in_flight'] = self.in_flight_count
+        return metrics
+
+
+# 전역 인스턴스 (GeminiService와 SimpleBot.call_gemini가 공유)
+gemini_flight = SingleFlight()
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Tuple
+
+from config.settings import TTS_MAX_CHARS
+from utils.script_segmenter import segment_scripts, DEFAULT_LANG
+
+# 음성 캐시 키 계산 (파일/DB를 열지 않음 - 봇과 발음 번들 빌더가 함께 사용)
+
+
+def make_audio_key(text: str, lang: str, slow: bool = False) -> str:
+    """(정규화된 텍스트, 언어, 속도)로 만든 콘텐츠 주소"""
+    normalized = ' '.join(text.split())
+    speed = 'slow' if slow else 'normal'
+    return hashlib.sha256(f"{lang}\0{speed}\0{normalized}".encode('utf-8')).hexdigest()
+
+
+def speech_runs(text: str, lang: str = "auto") -> Tuple[Tuple[str, str], ...]:
+    """실제로 합성할 (언어 코드, 텍스트) 구간 - 자동 감지면 한글/키릴/라틴 구간마다 맞는 목소리로"""
+    # 아주 긴 글만 자르기 (gTTS 한도보다 긴 글은 문장 단위로 나눠 합성)
+    if len(text) > TTS_MAX_CHARS:
+        text = text[:TTS_MAX_CHARS]
+    if lang != "auto":
+        return ((lang, text),)
+    return segment_scripts(text) or ((DEFAULT_LANG, text),)
+
+
+def speech_key(text: str, lang: str = "auto", slow: bool = False) -> str:
+    """합성하지 않고 음성 캐시 키만 계산 (한 언어면 덩어리 캐시/번들과 같은 키)"""
+    runs = speech_runs(text, lang)
+    if len(runs) == 1:
+        return make_audio_key(runs[0][1], runs[0][0], slow)
+    return make_audio_key(''.join(run for _, run in runs), '+'.join(run_lang for run_lang, _ in runs), slow)
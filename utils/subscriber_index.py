@@ -0,0 +1,221 @@
+import logging
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import (
+    SUBSCRIBER_CHUNK_SIZE, DAILY_LEARNING_SLOTS, DELIVERY_DEFAULT_TZ, DELIVERY_WINDOW_MINUTES
+)
+from utils.user_store import UserStore, SQLiteUserStore, user_store
+from utils.write_behind import user_buffer
+
+logger = logging.getLogger(__name__)
+
+# (시간대, 하루 중 분, 회차) - 회차는 그날 몇 번째 전송인지 (DAILY_LEARNING_SLOTS 순서의 팩)
+Bucket = Tuple[str, int, int]
+
+DEFAULT_TIMES = tuple(f"{hour:02d}:{minute:02d}" for hour, minute in sorted(DAILY_LEARNING_SLOTS))
+
+
+def parse_hhmm(text: str) -> Optional[int]:
+    """'07:30' → 450 (형식이 틀리면 None)"""
+    try:
+        hour, minute = (int(part) for part in text.strip().split(':'))
+    except ValueError:
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour * 60 + minute
+    return None
+
+
+def delivery_settings(record: Dict[str, Any]) -> Tuple[str, Tuple[str, ...]]:
+    """레코드의 전송 설정 → (시간대, 시작 시각 목록) - 없으면 모스크바 기본 시각"""
+    delivery = record.get('delivery') or {}
+    times = tuple(time_text for time_text in delivery.get('times') or () if parse_hhmm(time_text) is not None)
+    return delivery.get('tz') or DELIVERY_DEFAULT_TZ, times[:len(DAILY_LEARNING_SLOTS)] or DEFAULT_TIMES
+
+
+def delivery_buckets(user_id: str, tz: str, times: Tuple[str, ...],
+                     window: int = DELIVERY_WINDOW_MINUTES) -> Tuple[Bucket, ...]:
+    """사용자가 실제로 받을 분 단위 버킷 - 시작 시각부터 window분 안에서 사용자마다 고정된 위치로 분산"""
+    offset = zlib.crc32(user_id.encode('utf-8')) % window if window > 0 else 0
+    starts = sorted(parse_hhmm(time_text) for time_text in times)
+    return tuple((tz, (start + offset) % (24 * 60), edition) for edition, start in enumerate(starts))
+
+
+class SubscriberIndex:
+    """일일 학습 구독자와 전송 시각 버킷 - 구독/설정 변경 때만 바뀌고 저장소와 함께 영속화 (전송 준비에 전체 사용자를 읽지 않음)"""
+
+    def __init__(self, store: UserStore):
+        self.store = store
+        self._subscribers: Dict[str, Tuple[str, Tuple[str, ...]]] = {}  # user_id → (시간대, 시작 시각)
+        self.buckets: Dict[Bucket, set] = {}
+        self._bucket_listeners: List[Callable[[Bucket, bool], None]] = []
+        self._dirty: Dict[str, Optional[Tuple[str, Tuple[str, ...]]]] = {}  # 해제는 None (다음 플러시 때 기록)
+        self._create_schema()
+        self.load()
+
+    # --- 영속화 ---
+    @property
+    def _persistent(self) -> bool:
+        return isinstance(self.store, SQLiteUserStore)
+
+    def _create_schema(self) -> None:
+        if not self._persistent:
+            return
+        with self.store.lock:
+            conn = self.store.connection
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_subscribers (
+                    user_id TEXT PRIMARY KEY,
+                    subscribed_at REAL NOT NULL
+                )
+            """)
+            # 전송 시각 설정 컬럼 (이전 버전 테이블에는 없음)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(daily_subscribers)")}
+            if 'tz' not in columns:
+                conn.execute("ALTER TABLE daily_subscribers ADD COLUMN tz TEXT")
+            if 'times' not in columns:
+                conn.execute("ALTER TABLE daily_subscribers ADD COLUMN times TEXT")
+
+    def load(self) -> None:
+        """저장된 구독자 로드 (처음이면 users 테이블의 구독 컬럼에서 한 번 구축)"""
+        if not self._persistent:
+            # JSON 저장소는 인덱스를 따로 저장하지 않으므로 시작할 때마다 구축
+            for user_id, record in self.store.load_all().items():
+                if record.get('subscribed_daily', False):
+                    self._add(user_id, delivery_settings(record))
+            return
+
+        if not self.store.get_meta('subscribers_built'):
+            # JSON을 파싱하지 않고 구독 컬럼만 읽어 구축
+            now = time.time()
+            with self.store.lock:
+                self.store.connection.execute(
+                    "INSERT OR IGNORE INTO daily_subscribers (user_id, subscribed_at) "
+                    "SELECT user_id, ? FROM users WHERE subscribed_daily = 1", (now,)
+                )
+            self.store.set_meta('subscribers_built', str(now))
+            logger.info("📅 구독자 인덱스 구축")
+
+        with self.store.lock:
+            rows = self.store.connection.execute("SELECT user_id, tz, times FROM daily_subscribers").fetchall()
+        for user_id, tz, times in rows:
+            self._add(user_id, delivery_settings({'delivery': {'tz': tz, 'times': (times or '').split(',')}}))
+        logger.info(f"📅 구독자 인덱스 로드: {len(self._subscribers)}명, 전송 버킷 {len(self.buckets)}개")
+
+    def flush(self) -> int:
+        """바뀐 구독 상태만 저장 (사용자 데이터 플러시 직후)"""
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        if not self._persistent:
+            return len(dirty)
+
+        now = time.time()
+        upserts = [
+            (user_id, now, settings[0], ','.join(settings[1]))
+            for user_id, settings in dirty.items() if settings is not None
+        ]
+        removed = [(user_id,) for user_id, settings in dirty.items() if settings is None]
+        try:
+            with self.store.lock:
+                conn = self.store.connection
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany("""
+                        INSERT INTO daily_subscribers (user_id, subscribed_at, tz, times) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET tz = excluded.tz, times = excluded.times
+                    """, upserts)
+                    conn.executemany("DELETE FROM daily_subscribers WHERE user_id = ?", removed)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            for user_id, settings in dirty.items():
+                self._dirty.setdefault(user_id, settings)
+            logger.error(f"구독자 인덱스 저장 오류: {e}")
+            return 0
+        return len(dirty)
+
+    # --- 구독 변경 ---
+    def _add(self, user_id: str, settings: Tuple[str, Tuple[str, ...]]) -> None:
+        self._subscribers[user_id] = settings
+        for bucket in delivery_buckets(user_id, *settings):
+            members = self.buckets.setdefault(bucket, set())
+            members.add(user_id)
+            if len(members) == 1:
+                self._notify_bucket(bucket, True)
+
+    def _remove(self, user_id: str) -> None:
+        settings = self._subscribers.pop(user_id, None)
+        if settings is None:
+            return
+        for bucket in delivery_buckets(user_id, *settings):
+            members = self.buckets.get(bucket)
+            if members is None:
+                continue
+            members.discard(user_id)
+            if not members:
+                del self.buckets[bucket]
+                self._notify_bucket(bucket, False)
+
+    def update(self, user_id: str, record: Dict[str, Any]) -> None:
+        """구독 여부/전송 시각 반영 (바뀔 때만 기록)"""
+        settings = delivery_settings(record) if record.get('subscribed_daily', False) else None
+        if self._subscribers.get(user_id) == settings:
+            return
+        self._remove(user_id)
+        if settings is not None:
+            self._add(user_id, settings)
+        self._dirty[user_id] = settings
+
+    # --- 버킷 변경 통지 (스케줄러가 비어 있지 않은 버킷에만 작업 등록) ---
+    def add_bucket_listener(self, listener: Callable[[Bucket, bool], None]) -> None:
+        """listener(버킷, 활성 여부) - 등록 즉시 현재 버킷을 모두 활성으로 통지"""
+        self._bucket_listeners.append(listener)
+        for bucket in list(self.buckets):
+            listener(bucket, True)
+
+    def _notify_bucket(self, bucket: Bucket, active: bool) -> None:
+        for listener in self._bucket_listeners:
+            try:
+                listener(bucket, active)
+            except Exception as e:
+                logger.error(f"전송 버킷 변경 통지 오류 ({bucket}): {e}")
+
+    # --- 변경 통지 (WriteBehindUserBuffer 리스너) ---
+    def record_changed(self, user_id: str, record: Dict[str, Any]) -> None:
+        self.update(user_id, record)
+
+    def stats_incremented(self, user_id: str, deltas: Dict[str, int]) -> None:
+        pass
+
+    # --- 조회 ---
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._subscribers
+
+    def settings(self, user_id: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        return self._subscribers.get(user_id)
+
+    def bucket_members(self, bucket: Bucket) -> List[str]:
+        return sorted(self.buckets.get(bucket, ()))
+
+    def iter_chunks(self, size: int = SUBSCRIBER_CHUNK_SIZE) -> Iterator[List[str]]:
+        """구독자를 size명씩 (시작 시점 스냅샷, 순서 고정)"""
+        snapshot = sorted(self._subscribers)
+        for start in range(0, len(snapshot), size):
+            yield snapshot[start:start + size]
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+
+# 전역 인스턴스
+subscriber_index = SubscriberIndex(user_store)
+user_buffer.add_listener(subscriber_index)
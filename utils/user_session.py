@@ -0,0 +1,149 @@
+import functools
+import logging
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+
+from utils.chat_locks import chat_locks
+from utils.write_behind import user_buffer
+
+logger = logging.getLogger(__name__)
+
+# 현재 처리 중인 업데이트의 사용자 세션
+_current_session: ContextVar[Optional['UserSession']] = ContextVar('user_session', default=None)
+
+
+class UserSession:
+    """텔레그램 업데이트 하나 동안 유지되는 사용자 작업 단위 (한 번 읽고, 최대 한 번 쓰기)"""
+
+    def __init__(self, user_id: str, repository=user_buffer):
+        self.user_id = user_id
+        self.repository = repository
+        self._record: Optional[Dict[str, Any]] = None
+        self._loaded = False
+        self._dirty = False
+        self._increments: Dict[str, int] = {}
+        self.reads = 0
+        self.writes = 0
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """레코드 지연 로드 (업데이트당 최대 1회)"""
+        if not self._loaded:
+            self._record = self.repository.get(self.user_id)
+            self._loaded = True
+            self.reads += 1
+            if self._record is not None and self._increments:
+                self._apply_increments(self._record, self._increments)
+                self._increments = {}
+                self._dirty = True
+        return self._record
+
+    def mark_dirty(self, record: Optional[Dict[str, Any]] = None) -> None:
+        """레코드 변경 표시 (새 레코드면 교체)"""
+        if record is not None and record is not self._record:
+            if self._increments:
+                self._apply_increments(record, self._increments)
+                self._increments = {}
+            self._record = record
+            self._loaded = True
+        self._dirty = True
+
+    def increment_stats(self, deltas: Dict[str, int]) -> None:
+        """stats 카운터 증가 (로드 전이면 증가분만 모아둠)"""
+        if self._loaded and self._record is not None:
+            self._apply_increments(self._record, deltas)
+            self._dirty = True
+        else:
+            for stat, amount in deltas.items():
+                self._increments[stat] = self._increments.get(stat, 0) + amount
+
+    def commit(self) -> None:
+        """변경분을 한 번에 반영"""
+        if self._dirty and self._record is not None:
+            self.repository.put(self.user_id, self._record)
+            self.writes += 1
+        elif self._increments:
+            self.repository.increment_stats(self.user_id, self._increments)
+            self.writes += 1
+        self._dirty = False
+        self._increments = {}
+
+    @staticmethod
+    def _apply_increments(record: Dict[str, Any], deltas: Dict[str, int]) -> None:
+        stats = record.setdefault('stats', {})
+        for stat, amount in deltas.items():
+            stats[stat] = stats.get(stat, 0) + amount
+
+
+def current_session(user_id: Optional[str] = None) -> Optional[UserSession]:
+    """현재 세션 반환 (user_id가 주어지면 같은 사용자일 때만)"""
+    session = _current_session.get()
+    if session is None or (user_id is not None and session.user_id != user_id):
+        return None
+    return session
+
+
+# --- 세션을 인식하는 사용자 데이터 접근 함수 ---
+def get_user_record(user_id: str) -> Optional[Dict[str, Any]]:
+    """세션이 있으면 세션에서, 없으면 버퍼에서 조회"""
+    session = current_session(user_id)
+    if session is not None:
+        return session.get()
+    return user_buffer.get(user_id)
+
+
+def save_user_records(records: Dict[str, Dict[str, Any]]) -> None:
+    """세션 사용자는 커밋 시점까지 미루고 나머지는 버퍼로"""
+    others = {}
+    for user_id, record in records.items():
+        session = current_session(user_id)
+        if session is not None:
+            session.mark_dirty(record)
+        else:
+            others[user_id] = record
+    if others:
+        user_buffer.put_many(others)
+
+
+def increment_user_record_stats(user_id: str, deltas: Dict[str, int]) -> None:
+    """stats 카운터 증가 (세션 우선)"""
+    session = current_session(user_id)
+    if session is not None:
+        session.increment_stats(deltas)
+    else:
+        user_buffer.increment_stats(user_id, deltas)
+
+
+def with_user_session(handler):
+    """핸들러 실행 동안 사용자 세션을 열고 끝에서 한 번 커밋하는 데코레이터"""
+    @functools.wraps(handler)
+    async def wrapper(update, context, *args, **kwargs):
+        chat = getattr(update, 'effective_chat', None)
+        # 중첩 호출(다른 핸들러 안에서 호출)이거나 채팅 정보가 없으면 그대로 실행
+        if chat is None or _current_session.get() is not None:
+            return await handler(update, context, *args, **kwargs)
+
+        session = UserSession(str(chat.id))
+        # 같은 채팅의 업데이트는 읽기-수정-쓰기 전체를 잠금 안에서 처리 (동시 처리 시 갱신 손실 방지)
+        async with chat_locks.lock(session.user_id):
+            token = _current_session.set(session)
+            try:
+                result = await handler(update, context, *args, **kwargs)
+                # 핸들러가 오류로 끝나면 커밋하지 않음 - 되돌리기는 아님 (get()이 버퍼에 대기 중인 레코드 객체를
+                # 그대로 돌려주므로 그 레코드를 고친 변경분은 이미 버퍼에 반영되어 다음 플러시 때 저장됨)
+                session.commit()
+                return result
+            finally:
+                _current_session.reset(token)
+    return wrapper
+
+
+def install_user_sessions(application) -> int:
+    """등록된 모든 핸들러 콜백을 사용자 세션으로 감싸기"""
+    wrapped = 0
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if not getattr(handler.callback, '_user_session', False):
+                handler.callback = with_user_session(handler.callback)
+                handler.callback._user_session = True
+                wrapped += 1
+    return wrapped
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Any, Iterable, Optional
+
+from config.settings import USER_DATA_FILE, USER_DB_FILE, USER_STORE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+
+class UserStore:
+    """사용자 저장소 인터페이스 (백엔드 교체 가능)"""
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 한 명의 레코드 조회 (없으면 None)"""
+        raise NotImplementedError
+
+    def put(self, user_id: str, record: Dict[str, Any]) -> None:
+        """사용자 한 명의 레코드 저장"""
+        self.put_many({user_id: record})
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """여러 사용자 레코드 일괄 저장 (주어진 사용자만 갱신)"""
+        raise NotImplementedError
+
+    def increment_stats(self, user_id: str, deltas: Dict[str, int]) -> None:
+        """stats 카운터 부분 증가"""
+        raise NotImplementedError
+
+    def write_batch(self, records: Dict[str, Dict[str, Any]], increments: Dict[str, Dict[str, int]],
+                    extra: Iterable[Callable[[sqlite3.Connection], None]] = ()) -> None:
+        """레코드 저장 + 카운터 증가를 한 번에 (extra는 같은 트랜잭션에서 실행할 추가 쓰기 - SQLite 전용이라 기본 구현은 무시)"""
+        self.put_many(records)
+        for user_id, deltas in increments.items():
+            self.increment_stats(user_id, deltas)
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """전체 사용자 로드 (브로드캐스트/관리용)"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """전체 사용자 수"""
+        return len(self.load_all())
+
+    def close(self) -> None:
+        """저장소 종료"""
+
+
+class JsonUserStore(UserStore):
+    """기존 user_data.json 파일 백엔드 (하위 호환용)"""
+
+    def __init__(self, path: str = USER_DATA_FILE):
+        self.path = path
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.load_all().get(user_id)
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        users = self.load_all()
+        users.update(records)
+        self._save_all(users)
+
+    def increment_stats(self, user_id: str, deltas: Dict[str, int]) -> None:
+        users = self.load_all()
+        if user_id not in users:
+            return
+        stats = users[user_id].setdefault('stats', {})
+        for stat, amount in deltas.items():
+            stats[stat] = stats.get(stat, 0) + amount
+        self._save_all(users)
+
+
+class SQLiteUserStore(UserStore):
+    """SQLite(WAL) 사용자 저장소 - 사용자 단위 행 읽기/쓰기"""
+
+    def __init__(self, path: str = USER_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """테이블 생성"""
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    subscribed_daily INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """같은 DB 파일을 쓰는 다른 서비스용 연결"""
+        return self._conn
+
+    @property
+    def lock(self) -> threading.Lock:
+        """연결 공유 시 사용하는 잠금"""
+        return self._lock
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _upsert(self, records: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [
+            (user_id, int(bool(record.get('subscribed_daily', False))),
+             json.dumps(record, ensure_ascii=False), now)
+            for user_id, record in records.items()
+        ]
+        self._conn.executemany("""
+            INSERT INTO users (user_id, subscribed_daily, data, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                subscribed_daily = excluded.subscribed_daily,
+                data = excluded.data,
+                updated_at = excluded.updated_at
+        """, rows)
+
+    def _increment(self, user_id: str, deltas: Dict[str, int]) -> None:
+        """JSON 전체를 파싱하지 않고 stats 카운터만 SQL로 증가"""
+        assignments = []
+        params = []
+        for stat, amount in deltas.items():
+            path = f'$.stats.{stat}'
+            assignments.append("?, COALESCE(json_extract(data, ?), 0) + ?")
+            params.extend([path, path, amount])
+        sql = f"UPDATE users SET data = json_set(data, {', '.join(assignments)}), updated_at = ? WHERE user_id = ?"
+        params.extend([time.time(), user_id])
+        self._conn.execute(sql, params)
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        if not records:
+            return
+        self.write_batch(records, {})
+
+    def increment_stats(self, user_id: str, deltas: Dict[str, int]) -> None:
+        if not deltas:
+            return
+        with self._lock:
+            self._increment(user_id, deltas)
+
+    def write_batch(self, records: Dict[str, Dict[str, Any]], increments: Dict[str, Dict[str, int]],
+                    extra: Iterable[Callable[[sqlite3.Connection], None]] = ()) -> None:
+        """레코드/카운터/추가 쓰기를 한 트랜잭션으로 (중간에 죽으면 모두 반영되지 않음)"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if records:
+                    self._upsert(records)
+                for user_id, deltas in increments.items():
+                    if deltas:
+                        self._increment(user_id, deltas)
+                for write in extra:
+                    write(self._conn)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, data FROM users").fetchall()
+        return {user_id: json.loads(data) for user_id, data in rows}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def migrate_from_json(self, json_path: str = USER_DATA_FILE) -> int:
+        """기존 user_data.json을 한 번만 가져오기 (원본 파일은 그대로 둠)"""
+        if self.get_meta('json_migrated'):
+            return 0
+        if not os.path.exists(json_path):
+            self.set_meta('json_migrated', 'no_source')
+            return 0
+
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                users = json.load(f)
+        except Exception as e:
+            logger.error(f"사용자 JSON 마이그레이션 로드 오류: {e}")
+            return 0
+
+        # 이미 DB에 있는 사용자는 덮어쓰지 않음
+        with self._lock:
+            existing = {row[0] for row in self._conn.execute("SELECT user_id FROM users")}
+        pending = {user_id: data for user_id, data in users.items() if user_id not in existing}
+        self.put_many(pending)
+        self.set_meta('json_migrated', json_path)
+        logger.info(f"📦 user_data.json → SQLite 마이그레이션 완료: {len(pending)}명")
+        return len(pending)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_user_store(backend: str = USER_STORE_BACKEND) -> UserStore:
+    """설정에 맞는 사용자 저장소 생성"""
+    if backend == 'json':
+        return JsonUserStore(USER_DATA_FILE)
+
+    store = SQLiteUserStore(USER_DB_FILE)
+    store.migrate_from_json(USER_DATA_FILE)
+    return store
+
+
+# 전역 인스턴스
+user_store = create_user_store()
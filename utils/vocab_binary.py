@@ -0,0 +1,215 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 파일 구조: 헤더(매직, 버전, 단어 수, 문자열 수, 레벨 수, 카테고리 수) + 구역 오프셋 표 + 구역들
+#   문자열 표   : 중복 없는 문자열(UTF-8)을 이어 붙인 영역 + 시작 오프셋 배열 (같은 뜻/레벨/카테고리는 한 번만 저장)
+#   열(column)  : 단어별 러시아어/한국어/발음 문자열 번호, 레벨/카테고리 코드
+#   조회용 배열 : 러시아어 정렬 순서, 레벨별/카테고리별 단어 번호 목록 (시작 위치 배열 + 번호 배열)
+VOCAB_MAGIC = b'RVCB'
+VOCAB_VERSION = 1
+VOCAB_HEADER = struct.Struct('<4sIIIII')
+SECTIONS = (
+    'string_offsets', 'string_data', 'russian', 'korean', 'pronunciation', 'level', 'category',
+    'level_names', 'category_names', 'russian_order', 'level_starts', 'level_ids',
+    'category_starts', 'category_ids'
+)
+SECTION_TABLE = struct.Struct(f'<{len(SECTIONS)}I')
+
+
+class _StringTable:
+    """문자열 인터닝 - 같은 문자열은 같은 번호"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[bytes] = []
+
+    def intern(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.values)
+            self.values.append(text.encode('utf-8'))
+        return string_id
+
+
+def _postings(codes: Sequence[int], count: int) -> Dict[str, bytes]:
+    """코드별 단어 번호 목록 → (시작 위치 배열, 번호 배열) - 코드 안에서는 단어 번호 순서"""
+    groups: List[List[int]] = [[] for _ in range(count)]
+    for entry_id, code in enumerate(codes):
+        groups[code].append(entry_id)
+    starts = [0]
+    for group in groups:
+        starts.append(starts[-1] + len(group))
+    return {
+        'starts': struct.pack(f'<{len(starts)}I', *starts),
+        'ids': struct.pack(f'<{starts[-1]}I', *(entry_id for group in groups for entry_id in group))
+    }
+
+
+def write_vocab_binary(vocabulary: Iterable[Dict[str, Any]], metadata: Dict[str, Any], path: str) -> int:
+    """단어 목록(원본 JSON의 vocabulary)을 열 단위 바이너리로 기록, 기록한 단어 수 반환"""
+    strings = _StringTable()
+    strings.intern(json.dumps(metadata, ensure_ascii=False))  # 문자열 0번은 메타데이터
+    russian, korean, pronunciation, level_codes, category_codes = [], [], [], [], []
+    levels: Dict[str, int] = {}
+    categories: Dict[str, int] = {}
+    for item in vocabulary:
+        if not item.get('russian') or not item.get('korean'):
+            continue
+        russian.append(strings.intern(item['russian']))
+        korean.append(strings.intern(item['korean']))
+        pronunciation.append(strings.intern(item.get('pronunciation', '')))
+        level_codes.append(levels.setdefault(item.get('level', ''), len(levels)))
+        category_codes.append(categories.setdefault(item.get('category', ''), len(categories)))
+    count = len(russian)
+    level_names = [strings.intern(name) for name in levels]
+    category_names = [strings.intern(name) for name in categories]
+
+    string_offsets = [0]
+    for value in strings.values:
+        string_offsets.append(string_offsets[-1] + len(value))
+    russian_order = sorted(range(count), key=lambda entry_id: (strings.values[russian[entry_id]], entry_id))
+    level_postings = _postings(level_codes, len(levels))
+    category_postings = _postings(category_codes, len(categories))
+
+    sections = {
+        'string_offsets': struct.pack(f'<{len(string_offsets)}I', *string_offsets),
+        'string_data': b''.join(strings.values),
+        'russian': struct.pack(f'<{count}I', *russian),
+        'korean': struct.pack(f'<{count}I', *korean),
+        'pronunciation': struct.pack(f'<{count}I', *pronunciation),
+        'level': struct.pack(f'<{count}B', *level_codes),
+        'category': struct.pack(f'<{count}H', *category_codes),
+        'level_names': struct.pack(f'<{len(levels)}I', *level_names),
+        'category_names': struct.pack(f'<{len(categories)}I', *category_names),
+        'russian_order': struct.pack(f'<{count}I', *russian_order),
+        'level_starts': level_postings['starts'],
+        'level_ids': level_postings['ids'],
+        'category_starts': category_postings['starts'],
+        'category_ids': category_postings['ids']
+    }
+    # 모든 구역은 4바이트 경계에서 시작 (mmap 위에서 바로 정수 배열로 읽기 위해)
+    offsets = []
+    position = VOCAB_HEADER.size + SECTION_TABLE.size
+    for name in SECTIONS:
+        position += -position % 4
+        offsets.append(position)
+        position += len(sections[name])
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(VOCAB_HEADER.pack(VOCAB_MAGIC, VOCAB_VERSION, count, len(strings.values), len(levels), len(categories)))
+        f.write(SECTION_TABLE.pack(*offsets))
+        for name, offset in zip(SECTIONS, offsets):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(sections[name])
+    # 임시 파일에 쓴 뒤 교체 (이미 mmap한 프로세스는 이전 파일을 계속 읽음)
+    os.replace(tmp_path, path)
+    return count
+
+
+class VocabBinary:
+    """컴파일된 단어장 읽기 - 파일을 mmap하고 열/목록을 복사 없이 정수 배열로 사용 (여러 프로세스가 페이지 공유)"""
+
+    def __init__(self, path: str):
+        if sys.byteorder != 'little':
+            raise ValueError("리틀 엔디언 환경에서만 mmap 단어장을 읽을 수 있습니다")
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, string_count, level_count, category_count = VOCAB_HEADER.unpack_from(self._mm, 0)
+        if magic != VOCAB_MAGIC or version != VOCAB_VERSION:
+            self._mm.close()
+            raise ValueError(f"단어장 바이너리 형식 오류: {path}")
+        self._count = count
+        offsets = dict(zip(SECTIONS, SECTION_TABLE.unpack_from(self._mm, VOCAB_HEADER.size)))
+        self._view = memoryview(self._mm)
+        lengths = {
+            'string_offsets': string_count + 1, 'russian': count, 'korean': count, 'pronunciation': count,
+            'level_names': level_count, 'category_names': category_count, 'russian_order': count,
+            'level_starts': level_count + 1, 'level_ids': count,
+            'category_starts': category_count + 1, 'category_ids': count
+        }
+        arrays = {name: self._array(offsets[name], 'I', length) for name, length in lengths.items()}
+        self._string_offsets = arrays['string_offsets']
+        self._string_data = offsets['string_data']
+        self._russian, self._korean, self._pronunciation = arrays['russian'], arrays['korean'], arrays['pronunciation']
+        self._level = self._array(offsets['level'], 'B', count)
+        self._category = self._array(offsets['category'], 'H', count)
+        self._russian_order = arrays['russian_order']
+        self._level_starts, self._level_ids = arrays['level_starts'], arrays['level_ids']
+        self._category_starts, self._category_ids = arrays['category_starts'], arrays['category_ids']
+        # 레벨/카테고리 이름은 몇 개 안 되므로 바로 풀어 둠
+        self.levels = [self.string(string_id) for string_id in arrays['level_names']]
+        self.categories = [self.string(string_id) for string_id in arrays['category_names']]
+        self._level_codes = {name: code for code, name in enumerate(self.levels)}
+        self._category_codes = {name: code for code, name in enumerate(self.categories)}
+        self.metadata = json.loads(self.string(0))
+
+    def _array(self, offset: int, fmt: str, length: int) -> memoryview:
+        size = struct.calcsize(fmt)
+        return self._view[offset:offset + length * size].cast(fmt)
+
+    def string(self, string_id: int) -> str:
+        start = self._string_data + self._string_offsets[string_id]
+        end = self._string_data + self._string_offsets[string_id + 1]
+        return str(self._mm[start:end], 'utf-8')
+
+    def _russian_bytes(self, entry_id: int) -> bytes:
+        string_id = self._russian[entry_id]
+        start = self._string_data + self._string_offsets[string_id]
+        return self._mm[start:self._string_data + self._string_offsets[string_id + 1]]
+
+    # --- 조회 ---
+    def __len__(self) -> int:
+        return self._count
+
+    def fields(self, entry_id: int) -> tuple:
+        """(러시아어, 한국어, 발음, 카테고리, 레벨) - 필요한 단어만 그때 문자열로 풂"""
+        return (
+            self.string(self._russian[entry_id]), self.string(self._korean[entry_id]),
+            self.string(self._pronunciation[entry_id]),
+            self.categories[self._category[entry_id]], self.levels[self._level[entry_id]]
+        )
+
+    def category_of(self, entry_id: int) -> str:
+        return self.categories[self._category[entry_id]]
+
+    def find(self, russian: str) -> Optional[int]:
+        """러시아어로 단어 번호 찾기 (정렬 배열 이진 탐색, 같은 단어가 여럿이면 첫 번째)"""
+        target = russian.encode('utf-8')
+        position = bisect.bisect_left(self._russian_order, target, key=lambda entry_id: self._russian_bytes(entry_id))
+        if position < self._count:
+            entry_id = self._russian_order[position]
+            if self._russian_bytes(entry_id) == target:
+                return entry_id
+        return None
+
+    def level_ids(self, level: str) -> Sequence[int]:
+        code = self._level_codes.get(level)
+        if code is None:
+            return ()
+        return self._level_ids[self._level_starts[code]:self._level_starts[code + 1]]
+
+    def category_ids(self, category: str) -> Sequence[int]:
+        code = self._category_codes.get(category)
+        if code is None:
+            return ()
+        return self._category_ids[self._category_starts[code]:self._category_starts[code + 1]]
+
+    def close(self) -> None:
+        """mmap 닫기 (조회 중인 배열이 남아 있으면 가비지 수집 때 닫힘)"""
+        try:
+            self._view.release()
+            self._mm.close()
+        except BufferError:
+            pass
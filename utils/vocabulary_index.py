@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import random
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import VOCAB_FILE, VOCAB_BINARY_FILE, VOCAB_RELOAD_INTERVAL
+from utils.vocab_binary import VocabBinary
+
+logger = logging.getLogger(__name__)
+
+
+class VocabEntry:
+    """단어 하나 (딕셔너리 대신 슬롯 객체 - 2000개 이상 상주해도 메모리가 작음)"""
+    __slots__ = ('id', 'russian', 'korean', 'pronunciation', 'category', 'level')
+
+    def __init__(self, id: int, russian: str, korean: str, pronunciation: str = '',
+                 category: str = '', level: str = ''):
+        self.id = id
+        self.russian = russian
+        self.korean = korean
+        self.pronunciation = pronunciation
+        self.category = category
+        self.level = level
+
+    def to_dict(self) -> Dict[str, Any]:
+        """원본 JSON과 같은 형태 (팩 저장/기존 코드 호환)"""
+        return {
+            'russian': self.russian,
+            'korean': self.korean,
+            'pronunciation': self.pronunciation,
+            'category': self.category,
+            'level': self.level
+        }
+
+
+class JsonVocab:
+    """JSON 단어장을 메모리에 올린 형태 (VocabBinary와 같은 조회 메서드)
+
+    단어 번호는 유효한 단어(러시아어/한국어가 모두 있는 것)의 순서 - 컴파일된 파일과 같음
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.path = path
+        self.metadata: Dict[str, Any] = data.get('metadata', {})
+        self._rows: List[Tuple[str, str, str, str, str]] = [
+            (item['russian'], item['korean'], item.get('pronunciation', ''),
+             item.get('category', ''), item.get('level', ''))
+            for item in data.get('vocabulary', [])
+            if item.get('russian') and item.get('korean')
+        ]
+        self._by_level: Dict[str, List[int]] = {}
+        self._by_category: Dict[str, List[int]] = {}
+        self._by_russian: Dict[str, int] = {}
+        for entry_id, (russian, _, _, category, level) in enumerate(self._rows):
+            self._by_level.setdefault(level, []).append(entry_id)
+            self._by_category.setdefault(category, []).append(entry_id)
+            self._by_russian.setdefault(russian, entry_id)
+        self.levels = list(self._by_level)
+        self.categories = list(self._by_category)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def fields(self, entry_id: int) -> tuple:
+        return self._rows[entry_id]
+
+    def category_of(self, entry_id: int) -> str:
+        return self._rows[entry_id][3]
+
+    def find(self, russian: str) -> Optional[int]:
+        return self._by_russian.get(russian)
+
+    def level_ids(self, level: str) -> Sequence[int]:
+        return self._by_level.get(level, ())
+
+    def category_ids(self, category: str) -> Sequence[int]:
+        return self._by_category.get(category, ())
+
+    def close(self) -> None:
+        pass
+
+
+class VocabularyIndex:
+    """단어장 인덱스 - 시작 시 한 번 로드하고 레벨/카테고리별 단어 번호 목록과 러시아어 조회를 제공
+
+    컴파일된 바이너리(compile_vocab.py)가 JSON보다 새것이면 mmap으로 열고 (파싱 없음, 프로세스 간 페이지 공유),
+    없으면 JSON을 읽음. 단어 객체는 조회/샘플링한 것만 그때 만듦.
+    파일이 바뀌면 다음 조회 때 다시 로드 (확인은 VOCAB_RELOAD_INTERVAL초에 한 번)
+    """
+
+    def __init__(self, path: str = VOCAB_FILE, binary_path: Optional[str] = VOCAB_BINARY_FILE,
+                 reload_interval: float = VOCAB_RELOAD_INTERVAL):
+        self.path = path
+        self.binary_path = binary_path
+        self.reload_interval = reload_interval
+        self.source: Optional[Any] = None  # JsonVocab | VocabBinary
+        self._buckets: Dict[Tuple[str, str], List[int]] = {}
+        self._prefix_crcs: Optional[List[int]] = None  # 앞에서 n개 단어의 지문 (처음 필요할 때 계산)
+        self._mtimes: Optional[Tuple[Optional[float], Optional[float]]] = None
+        self._checked_at = 0.0
+        self._metrics = {
+            'loads': 0,
+            'load_errors': 0,
+            'last_load_ms': 0.0,
+            'backend': None
+        }
+        self.load()
+
+    # --- 로드 ---
+    def _file_mtimes(self) -> Tuple[Optional[float], Optional[float]]:
+        mtimes = []
+        for path in (self.path, self.binary_path):
+            try:
+                mtimes.append(os.path.getmtime(path) if path else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def load(self) -> bool:
+        """단어장을 열어 교체 (실패하면 기존 인덱스 유지)"""
+        start = time.perf_counter()
+        mtimes = self._file_mtimes()
+        json_mtime, binary_mtime = mtimes
+        source = None
+        # 바이너리가 JSON보다 오래됐으면 (JSON만 고치고 다시 컴파일하지 않음) JSON 사용
+        if binary_mtime is not None and (json_mtime is None or binary_mtime >= json_mtime):
+            try:
+                source = VocabBinary(self.binary_path)
+            except Exception as e:
+                self._metrics['load_errors'] += 1
+                logger.error(f"단어장 바이너리 열기 오류 ({self.binary_path}): {e} - JSON 사용")
+        if source is None:
+            try:
+                source = JsonVocab(self.path)
+            except Exception as e:
+                self._metrics['load_errors'] += 1
+                logger.error(f"단어장 로드 오류 ({self.path}): {e}")
+                return False
+
+        # 조회 중에 바뀌어도 섞이지 않도록 한 번에 교체 (이전 mmap은 참조가 사라질 때 닫힘)
+        self.source, self._buckets, self._prefix_crcs = source, {}, None
+        self._mtimes = mtimes
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        backend = 'binary' if isinstance(source, VocabBinary) else 'json'
+        self._metrics['loads'] += 1
+        self._metrics['last_load_ms'] = elapsed_ms
+        self._metrics['backend'] = backend
+        logger.info(
+            f"📚 단어장 로드({backend}): {len(source)}개, 레벨 {len(source.levels)}개, "
+            f"카테고리 {len(source.categories)}개 ({elapsed_ms:.0f}ms)"
+        )
+        return True
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        mtimes = self._file_mtimes()
+        if mtimes != self._mtimes and any(mtime is not None for mtime in mtimes):
+            logger.info(f"📚 단어장 파일 변경 감지 - 다시 로드: {self.path}")
+            self.load()
+
+    # --- 조회 ---
+    def __len__(self) -> int:
+        self._maybe_reload()
+        return len(self.source) if self.source is not None else 0
+
+    def entry(self, entry_id: int) -> VocabEntry:
+        return VocabEntry(entry_id, *self.source.fields(entry_id))
+
+    def get(self, russian: str) -> Optional[VocabEntry]:
+        self._maybe_reload()
+        if self.source is None:
+            return None
+        entry_id = self.source.find(russian)
+        return self.entry(entry_id) if entry_id is not None else None
+
+    def bucket_ids(self, level: Optional[str] = None, category: Optional[str] = None) -> Sequence[int]:
+        """레벨/카테고리 조건에 맞는 단어 번호 (둘 다 주면 교집합을 한 번 만들어 보관)"""
+        self._maybe_reload()
+        source = self.source
+        if source is None:
+            return ()
+        if level is None and category is None:
+            return range(len(source))
+        if category is None:
+            return source.level_ids(level)
+        if level is None:
+            return source.category_ids(category)
+        key = (level, category)
+        if key not in self._buckets:
+            self._buckets[key] = [
+                entry_id for entry_id in source.level_ids(level) if source.category_of(entry_id) == category
+            ]
+        return self._buckets[key]
+
+    def bucket(self, level: Optional[str] = None, category: Optional[str] = None) -> List[VocabEntry]:
+        return [self.entry(entry_id) for entry_id in self.bucket_ids(level, category)]
+
+    def sample(self, k: int, level: Optional[str] = None, category: Optional[str] = None) -> List[VocabEntry]:
+        """조건에 맞는 단어 k개 무작위 (번호만 뽑고 뽑힌 단어만 객체로 만듦)"""
+        ids = self.bucket_ids(level, category)
+        return [self.entry(entry_id) for entry_id in random.sample(ids, min(k, len(ids)))]
+
+    def random(self, level: Optional[str] = None, category: Optional[str] = None) -> Optional[VocabEntry]:
+        ids = self.bucket_ids(level, category)
+        return self.entry(random.choice(ids)) if len(ids) else None
+
+    def version(self, count: Optional[int] = None) -> Optional[str]:
+        """앞에서 count개(기본 전체) 단어의 러시아어로 만든 지문 - 저장해 둔 단어 번호가 아직 같은 단어인지 확인용
+
+        뒤에 단어를 추가하기만 하면 앞부분 지문은 그대로, 중간 삽입/삭제로 번호가 밀리면 달라짐 (count가 단어 수보다 크면 None)
+        """
+        if self.source is None:
+            return None
+        if self._prefix_crcs is None:
+            crcs = [0]
+            for entry_id in range(len(self.source)):
+                crcs.append(zlib.crc32(self.source.fields(entry_id)[0].encode('utf-8') + b'\0', crcs[-1]))
+            self._prefix_crcs = crcs
+        count = len(self._prefix_crcs) - 1 if count is None else count
+        if not 0 <= count < len(self._prefix_crcs):
+            return None
+        return f"{self._prefix_crcs[count]:08x}"
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.source.metadata if self.source is not None else {}
+
+    @property
+    def levels(self) -> List[str]:
+        return list(self.source.levels) if self.source is not None else []
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self.source.categories) if self.source is not None else []
+
+    # --- 지표 ---
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._metrics)
+        source = self.source
+        metrics['entries'] = len(source) if source is not None else 0
+        metrics['levels'] = {level: len(source.level_ids(level)) for level in source.levels} if source is not None else {}
+        metrics['categories'] = len(source.categories) if source is not None else 0
+        return metrics
+
+
+# 전역 인스턴스 (봇 시작 시 한 번 로드)
+vocabulary_index = VocabularyIndex()
@@ -0,0 +1,224 @@
+import asyncio
+import atexit
+import copy
+import functools
+import logging
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from config.settings import USER_FLUSH_INTERVAL, USER_FLUSH_MAX_PENDING
+from utils.user_store import UserStore, user_store
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindUserBuffer:
+    """사용자 변경분을 메모리에 모았다가 주기적으로 한 번에 저장하는 버퍼"""
+
+    def __init__(self, store: UserStore, max_pending: int = USER_FLUSH_MAX_PENDING):
+        self.store = store
+        self.max_pending = max_pending
+        self._records: Dict[str, Dict[str, Any]] = {}      # 변경된 전체 레코드
+        self._increments: Dict[str, Dict[str, int]] = {}   # 아직 로드되지 않은 사용자의 카운터 증가분
+        self._merges: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}  # 아직 로드되지 않은 사용자의 병합 변경
+        self._listeners: List[Any] = []                    # 변경 통지를 받는 보조 인덱스 (리더보드 등)
+        self._batch_writers: List[Any] = []                # 사용자 데이터와 같은 트랜잭션에 기록하는 보조 데이터
+        self._metrics = {
+            'flush_count': 0,
+            'flushed_users': 0,
+            'coalesced_updates': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+            'last_flush_time': None,
+            'flush_errors': 0
+        }
+
+    # --- 변경 통지 ---
+    def add_listener(self, listener: Any) -> None:
+        """record_changed / stats_incremented / flush 메서드를 가진 객체 등록"""
+        self._listeners.append(listener)
+
+    def add_batch_writer(self, writer: Any) -> None:
+        """take_batch / write_batch / batch_done 메서드를 가진 객체 등록 (브로드캐스트 체크포인트 등)
+
+        플러시 때 대기 중인 항목을 가져가 사용자 레코드/카운터와 같은 트랜잭션에 기록 - 한쪽만 저장된 채로 죽지 않음
+        """
+        self._batch_writers.append(writer)
+
+    def _notify(self, method: str, *args) -> None:
+        for listener in self._listeners:
+            try:
+                getattr(listener, method)(*args)
+            except Exception as e:
+                logger.error(f"사용자 변경 통지 오류 ({type(listener).__name__}.{method}): {e}")
+
+    # --- 읽기/쓰기 ---
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """버퍼에 있으면 버퍼 값, 없으면 저장소에서 로드"""
+        if user_id in self._records:
+            return self._records[user_id]
+
+        record = self.store.get(user_id)
+        if record is not None and (user_id in self._increments or user_id in self._merges):
+            # 대기 중인 증가분/병합 변경을 레코드에 합치고 전체 레코드로 승격
+            self._apply_pending(user_id, record)
+            self._records[user_id] = record
+        return record
+
+    def put(self, user_id: str, record: Dict[str, Any]) -> None:
+        """레코드 변경 예약 (같은 사용자의 반복 저장은 하나로 합쳐짐)"""
+        if user_id in self._records:
+            self._metrics['coalesced_updates'] += 1
+        self._apply_pending(user_id, record)
+        self._records[user_id] = record
+        self._notify('record_changed', user_id, record)
+        self._maybe_flush()
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        for user_id, record in records.items():
+            self.put(user_id, record)
+
+    def increment_stats(self, user_id: str, deltas: Dict[str, int]) -> None:
+        """stats 카운터 증가 예약"""
+        if user_id in self._records:
+            self._apply_increments(self._records[user_id], deltas)
+            self._metrics['coalesced_updates'] += 1
+        elif user_id in self._increments:
+            pending = self._increments[user_id]
+            for stat, amount in deltas.items():
+                pending[stat] = pending.get(stat, 0) + amount
+            self._metrics['coalesced_updates'] += 1
+        else:
+            self._increments[user_id] = dict(deltas)
+        self._notify('stats_incremented', user_id, deltas)
+        self._maybe_flush()
+
+    def merge(self, user_id: str, change: Callable[[Dict[str, Any]], None]) -> None:
+        """레코드 일부를 합치는 변경 예약 (increment_stats처럼 나중에 저장되는 전체 레코드에도 적용되어 덮어써지지 않음)
+
+        change는 같은 레코드에 여러 번 적용해도 결과가 같아야 함 (비트 OR 등)
+        """
+        if user_id in self._records:
+            change(self._records[user_id])
+            self._metrics['coalesced_updates'] += 1
+        else:
+            self._merges.setdefault(user_id, []).append(change)
+        self._maybe_flush()
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """저장소 전체 + 아직 저장되지 않은 변경분"""
+        users = self.store.load_all()
+        users.update(self._records)
+        for user_id, deltas in self._increments.items():
+            if user_id in users:
+                self._apply_increments(users[user_id], deltas)
+        for user_id, changes in self._merges.items():
+            if user_id in users:
+                for change in changes:
+                    change(users[user_id])
+        return users
+
+    def count(self) -> int:
+        return self.store.count()
+
+    @staticmethod
+    def _apply_increments(record: Dict[str, Any], deltas: Dict[str, int]) -> None:
+        stats = record.setdefault('stats', {})
+        for stat, amount in deltas.items():
+            stats[stat] = stats.get(stat, 0) + amount
+
+    def _apply_pending(self, user_id: str, record: Dict[str, Any]) -> None:
+        if user_id in self._increments:
+            self._apply_increments(record, self._increments.pop(user_id))
+        for change in self._merges.pop(user_id, ()):
+            change(record)
+
+    # --- 플러시 ---
+    @property
+    def pending_count(self) -> int:
+        return len(self._records) + len(self._increments) + len(self._merges)
+
+    def _maybe_flush(self) -> None:
+        if self.pending_count >= self.max_pending:
+            self.flush()
+
+    def flush(self) -> int:
+        """대기 중인 변경분을 저장소에 한 번에 기록"""
+        if not self._records and not self._increments and not self._merges:
+            self._notify('flush')
+            return 0
+
+        records, self._records = self._records, {}
+        increments, self._increments = self._increments, {}
+        merges, self._merges = self._merges, {}
+
+        batches = [(writer, writer.take_batch()) for writer in self._batch_writers]
+        start = time.perf_counter()
+        try:
+            # 병합 변경만 있는 사용자는 저장된 레코드를 읽어 합친 뒤 함께 기록 (증가분은 그 위에 SQL로)
+            merged = {}
+            for user_id, changes in merges.items():
+                record = self.store.get(user_id)
+                if record is not None:
+                    for change in changes:
+                        change(record)
+                    merged[user_id] = record
+            self.store.write_batch(
+                {**records, **merged}, increments,
+                [functools.partial(writer.write_batch, taken) for writer, taken in batches if taken]
+            )
+        except Exception as e:
+            # 실패한 변경분은 다시 대기열로 (그 사이 새로 들어온 변경이 우선)
+            self._metrics['flush_errors'] += 1
+            for user_id, record in records.items():
+                self._records.setdefault(user_id, record)
+            for user_id, deltas in increments.items():
+                pending = self._increments.setdefault(user_id, {})
+                for stat, amount in deltas.items():
+                    pending[stat] = pending.get(stat, 0) + amount
+            for user_id, changes in merges.items():
+                if user_id in self._records:
+                    for change in changes:
+                        change(self._records[user_id])
+                else:
+                    self._merges[user_id] = changes + self._merges.get(user_id, [])
+            for writer, taken in batches:
+                writer.batch_done(taken, committed=False)
+            logger.error(f"사용자 데이터 플러시 오류: {e}")
+            return 0
+
+        for writer, taken in batches:
+            writer.batch_done(taken, committed=True)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        flushed = len(records) + len(increments) + len(merged)
+        self._metrics['flush_count'] += 1
+        self._metrics['flushed_users'] += flushed
+        self._metrics['last_flush_ms'] = elapsed_ms
+        self._metrics['max_flush_ms'] = max(self._metrics['max_flush_ms'], elapsed_ms)
+        self._metrics['total_flush_ms'] += elapsed_ms
+        self._metrics['last_flush_time'] = time.time()
+        logger.debug(f"💾 사용자 {flushed}명 플러시 ({elapsed_ms:.1f}ms)")
+        self._notify('flush')
+        return flushed
+
+    async def run_periodic_flush(self, interval: float = USER_FLUSH_INTERVAL) -> None:
+        """interval초마다 플러시 (봇 시작 시 태스크로 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """플러시 지연/대기 건수 지표"""
+        metrics = copy.copy(self._metrics)
+        metrics['pending_writes'] = self.pending_count
+        count = metrics['flush_count']
+        metrics['avg_flush_ms'] = metrics['total_flush_ms'] / count if count else 0.0
+        return metrics
+
+
+# 전역 인스턴스
+user_buffer = WriteBehindUserBuffer(user_store)
+
+# 프로세스 종료 시 남은 변경분 저장
+atexit.register(user_buffer.flush)